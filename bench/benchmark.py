@@ -0,0 +1,200 @@
+"""Benchmarks dos caminhos reais do S.A.C. em função do tamanho do banco.
+
+Uso:
+    python bench/benchmark.py                                  # 1k, 10k e 100k
+    python bench/benchmark.py --tamanhos 1000 10000 --saida resultados.json
+    python bench/benchmark.py --comparar base.json --saida nova.json
+
+Para cada tamanho o banco é preenchido com formulários de ``sac_core.sintetico``
+e cada operação é repetida; o JSON guarda mediana/p90/mínimo em ms. Com
+``--comparar`` as medianas são confrontadas com uma execução anterior e o
+script sai com código 1 se alguma piorou além de ``--limite``.
+
+Operações:
+    salvar               inserir_registro (botão FINALIZAR E SALVAR)
+    salvar_csv_legado    ler CSV + concat + escrita atômica (caminho antigo)
+    editar               atualizar_registro com checagem de versão
+    ler_csv_seguro       leitura do CSV completo exportado
+    exportar_<formato>   banco completo -> csv/parquet/xlsx em blocos (sem o cache por versão)
+    exportar_em_cache    o mesmo download com o banco inalterado
+    busca_indice         filtro do modo de edição (índice de trigramas, já sincronizado)
+    busca_pandas         o mesmo filtro com str.contains sobre o DataFrame
+    painel_resumo        métricas do Painel direto dos agregados
+    painel_retrato       métricas + figura do gráfico já no cache (o que cada rerun do Painel paga)
+    painel_retrato_frio  o mesmo retrato remontado (resumo + px.bar), como depois de uma gravação
+    painel_tabela_fria   carregar_dataframe_tipado logo após uma gravação
+    painel_visual        dataframe_ordenado_para_visual + tabela_respostas (frame em cache)
+    painel_pagina        uma página de 100 linhas da tabela do Painel (filtro/ordenação no SQLite)
+    painel_analise       analitica.calcular sobre o frame tipado (a primeira abertura de cada filtro)
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from sac_core import armazenamento as A  # noqa: E402
+from sac_core import exportacao as E  # noqa: E402
+from sac_core import painel  # noqa: E402
+from sac_core.analitica import calcular  # noqa: E402
+from sac_core.analise import dataframe_ordenado_para_visual, tabela_pagina, tabela_respostas  # noqa: E402
+from sac_core.busca import IndiceBusca  # noqa: E402
+from sac_core.sintetico import gerar_registros  # noqa: E402
+
+LOTE_CARGA = 5000
+TERMOS = ["silva", "ara", "5000", "gabriela lima", "xyz"]
+
+def _cronometrar(f, repeticoes: int) -> dict:
+    tempos = []
+    for i in range(repeticoes):
+        t0 = time.perf_counter()
+        f(i)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    tempos.sort()
+    return {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p90_ms": round(tempos[int(0.9 * (len(tempos) - 1))], 3),
+        "min_ms": round(tempos[0], 3),
+        "repeticoes": repeticoes,
+    }
+
+def _popular(banco: str, n: int) -> float:
+    t0 = time.perf_counter()
+    registros = gerar_registros(n)
+    while True:
+        lote = list(islice(registros, LOTE_CARGA))
+        if not lote:
+            break
+        A.inserir_registros(lote, banco)
+    return time.perf_counter() - t0
+
+def medir_tamanho(n: int, tmp: str, repeticoes: int) -> dict:
+    banco = os.path.join(tmp, f"bench_{n}.sqlite3")
+    csv = os.path.join(tmp, f"bench_{n}.csv")
+    res = {"carga_inicial_s": round(_popular(banco, n), 2)}
+    novos = list(gerar_registros(repeticoes, semente=7, inicio_id=n))
+    ids = [r["Registro_ID"] for r in islice(gerar_registros(n), 0, n, max(1, n // repeticoes))]
+
+    def exportar(formato):
+        def f(i):
+            shutil.rmtree(os.path.join(tmp, E.PASTA), ignore_errors=True)
+            E.arquivo_exportado(formato, banco)
+        return f
+    for formato in [f for f in ("csv", "parquet", "xlsx") if f in E.formatos_disponiveis()]:
+        if formato != "xlsx" or n <= 10_000:   # openpyxl puro: ~2 s a cada 1k linhas
+            res[f"exportar_{formato}"] = _cronometrar(exportar(formato), max(2, repeticoes // 10))
+    res["exportar_em_cache"] = _cronometrar(lambda i: E.arquivo_exportado("csv", banco), repeticoes)
+    A.exportar_csv(csv, banco)
+    res["ler_csv_seguro"] = _cronometrar(lambda i: A.ler_csv_seguro(csv), max(2, repeticoes // 10))
+
+    def salvar_legado(i):
+        df = A.ler_csv_seguro(csv)
+        df = pd.concat([df, pd.DataFrame([novos[i]])], ignore_index=True)
+        A.escrever_csv_atomico(df, csv)
+    res["salvar_csv_legado"] = _cronometrar(salvar_legado, max(2, repeticoes // 10))
+    res["salvar"] = _cronometrar(lambda i: A.inserir_registro(novos[i], banco), repeticoes)
+
+    def editar(i):
+        rid = ids[i % len(ids)]
+        A.atualizar_registro(rid, {"Obs_q1": f"revisão {i}"}, banco, versao_esperada=A.versao_registro(rid, banco))
+    res["editar"] = _cronometrar(editar, repeticoes)
+
+    indice = IndiceBusca()
+    t0 = time.perf_counter()
+    indice.sincronizar(banco)
+    res["busca_indice_construcao_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    res["busca_indice"] = _cronometrar(lambda i: indice.buscar(TERMOS[i % len(TERMOS)]), repeticoes)
+    df_txt = A.carregar_dataframe(banco)
+    def busca_pandas(i):
+        t = TERMOS[i % len(TERMOS)]
+        df_txt[df_txt["Nome"].str.contains(t, case=False, na=False) | df_txt["Matricula"].str.contains(t, case=False, na=False)]
+    res["busca_pandas"] = _cronometrar(busca_pandas, repeticoes)
+
+    res["painel_resumo"] = _cronometrar(lambda i: A.resumo_agregado(banco), repeticoes)
+    def tabela_fria(i):
+        A.invalidar_cache(banco)
+        A.carregar_dataframe_tipado(banco)
+    res["painel_tabela_fria"] = _cronometrar(tabela_fria, max(2, repeticoes // 10))
+    df = A.carregar_dataframe_tipado(banco)
+    def visual(i):
+        dataframe_ordenado_para_visual(df)
+        tabela_respostas(df, "silva" if i % 2 else "")
+    res["painel_visual"] = _cronometrar(visual, repeticoes)
+    def pagina(i):
+        regs, _ = A.pagina_registros(banco, nome=TERMOS[i % len(TERMOS)] if i % 2 else "", ordenar_por="Nome" if i % 3 else "Registro_ID",
+                                     pagina=i % 5, tamanho=100)
+        tabela_pagina(regs)
+    res["painel_pagina"] = _cronometrar(pagina, repeticoes)
+    res["painel_analise"] = _cronometrar(lambda i: calcular(df), max(2, repeticoes // 10))
+    res["painel_retrato_frio"] = _cronometrar(lambda i: painel.montar(A.conectar(banco)), max(2, repeticoes // 10))
+    res["painel_retrato"] = _cronometrar(lambda i: A.retrato_painel(banco), repeticoes)
+    A._retratos_abertos.pop(banco, None)   # nada a remontar em segundo plano: o banco vai ser apagado
+    A.invalidar_cache(banco)
+    return res
+
+def comparar(base: dict, atual: dict, limite: float) -> list:
+    """Lista de (tamanho, operação, mediana base, mediana atual, razão) que pioraram além de ``limite``."""
+    piores = []
+    for n, ops in atual["tamanhos"].items():
+        for op, r in ops.items():
+            antes = base.get("tamanhos", {}).get(n, {}).get(op)
+            if not isinstance(r, dict) or not isinstance(antes, dict) or not antes["mediana_ms"]:
+                continue
+            razao = r["mediana_ms"] / antes["mediana_ms"]
+            if razao > limite:
+                piores.append((n, op, antes["mediana_ms"], r["mediana_ms"], razao))
+    return piores
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeticoes", type=int, default=30)
+    ap.add_argument("--saida", help="arquivo JSON (padrão: stdout)")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior")
+    ap.add_argument("--limite", type=float, default=1.25, help="razão de mediana considerada regressão")
+    args = ap.parse_args()
+
+    resultado = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "repeticoes": args.repeticoes,
+        },
+        "tamanhos": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.tamanhos:
+            print(f"--- {n} registros ---", file=sys.stderr)
+            r = resultado["tamanhos"][str(n)] = medir_tamanho(n, tmp, args.repeticoes)
+            for op, v in r.items():
+                print(f"  {op:28s} {v['mediana_ms'] if isinstance(v, dict) else v:>12}", file=sys.stderr)
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            piores = comparar(json.load(f), resultado, args.limite)
+        for n, op, antes, depois, razao in piores:
+            print(f"REGRESSÃO {n} {op}: {antes:.2f} -> {depois:.2f} ms ({razao:.2f}x)", file=sys.stderr)
+        raise SystemExit(1 if piores else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Carga filtrada por semestre à medida que as campanhas se acumulam, com e sem arquivamento.
+
+Uso:
+    python bench/campanhas.py                           # 6 campanhas de 3000 transcrições
+    python bench/campanhas.py --campanhas 10 --registros 5000
+
+Dois bancos temporários recebem as mesmas campanhas, uma por vez (2021.1,
+2021.2, ...). No primeiro tudo fica no banco; no segundo, a cada campanha
+nova a anterior é arquivada (``armazenamento.arquivar_campanha``). Depois de
+cada campanha mede, sem cache, o que o Painel e a edição carregam para um
+semestre: o DataFrame do semestre, a 1ª página da tabela e o índice de busca
+montado do zero. Com arquivamento os tempos devem ficar estáveis; sem, crescem
+com o histórico. No fim confere que as campanhas arquivadas continuam
+legíveis (mesma contagem) e que os agregados dos dois bancos batem.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+SEMESTRE = "1º Semestre"
+
+def _ms(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+def medir(banco: str, repeticoes: int) -> dict:
+    from sac_core import armazenamento as A
+    from sac_core.busca import IndiceBusca
+
+    def dataframe():
+        A.invalidar_cache(banco)
+        A.carregar_dataframe(banco, SEMESTRE)
+
+    return {"dataframe_ms": _ms(dataframe, repeticoes),
+            "pagina_ms": _ms(lambda: A.pagina_registros(banco, semestre=SEMESTRE, tamanho=100), repeticoes),
+            "busca_ms": _ms(lambda: IndiceBusca().sincronizar(banco), repeticoes)}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--campanhas", type=int, default=6)
+    ap.add_argument("--registros", type=int, default=3000, help="transcrições por campanha")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    from sac_core import agregados, armazenamento as A
+    from sac_core.campanhas import campanha_de
+    from sac_core.sintetico import gerar_registros
+    problemas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tudo, arquivando = os.path.join(tmp, "tudo.sqlite3"), os.path.join(tmp, "arquivando.sqlite3")
+        print(f"{'campanha':>9} {'no banco':>9} | {'sem arquivar: df / página / busca (ms)':>40} | {'arquivando: df / página / busca (ms)':>38}")
+        anterior = None
+        for k in range(args.campanhas):
+            inicio = datetime(2021 + k // 2, 2 if k % 2 == 0 else 8, 1)
+            campanha = campanha_de(inicio.strftime("%Y-%m-%d"))
+            registros = list(gerar_registros(args.registros, semente=k, inicio_id=k * args.registros, inicio=inicio))
+            A.inserir_registros(registros, tudo)
+            A.inserir_registros(registros, arquivando)
+            if anterior:
+                A.arquivar_campanha(anterior, arquivando)
+            anterior = campanha
+            m1, m2 = medir(tudo, args.repeticoes), medir(arquivando, args.repeticoes)
+            print(f"{campanha:>9} {A.contar_registros(arquivando):>9} | "
+                  f"{m1['dataframe_ms']:>16.1f} / {m1['pagina_ms']:>7.1f} / {m1['busca_ms']:>7.1f}     | "
+                  f"{m2['dataframe_ms']:>14.1f} / {m2['pagina_ms']:>7.1f} / {m2['busca_ms']:>7.1f}")
+
+        for campanha, n, arquivada in A.campanhas(arquivando):
+            if n != args.registros:
+                problemas.append(f"campanha {campanha}: {n} registro(s), esperados {args.registros}")
+            if arquivada and A.resumo_agregado(A.caminho_campanha(campanha, arquivando))["formularios"] != n:
+                problemas.append(f"agregados do arquivo de {campanha} não batem")
+        total = sum(A.resumo_agregado(c)["formularios"]
+                    for c in [arquivando] + [A.caminho_campanha(c, arquivando) for c in A.campanhas_arquivadas(arquivando)])
+        if total != A.resumo_agregado(tudo)["formularios"]:
+            problemas.append(f"formulários: {total} somando banco e arquivos, {A.resumo_agregado(tudo)['formularios']} sem arquivar")
+        problemas += agregados.verificar(A.conectar(arquivando))
+        tamanhos = sum(os.path.getsize(A.caminho_campanha(c, arquivando)) for c in A.campanhas_arquivadas(arquivando))
+        print(f"arquivos das campanhas: {tamanhos / 2**20:.1f} MiB para {args.registros * (args.campanhas - 1)} registros")
+
+    for p in problemas:
+        print(f"❌ {p}", file=sys.stderr)
+    raise SystemExit(1 if problemas else 0)
+
+if __name__ == "__main__":
+    main()
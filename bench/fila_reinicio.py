@@ -0,0 +1,122 @@
+"""Fila de gravação: nada se perde (nem duplica) quando o processo cai.
+
+Uso:
+    python bench/fila_reinicio.py                 # 200 transcrições
+    python bench/fila_reinicio.py --registros 2000
+
+Roteiro, num banco temporário:
+1. com o banco travado por outra conexão (como quando está aberto em outro
+   programa), um processo filho enfileira as transcrições e é morto (SIGKILL)
+   antes de conseguir gravar qualquer uma;
+2. metade da fila é gravada no banco "por fora", sem tirar os arquivos da fila
+   (queda entre o COMMIT e a limpeza da fila);
+3. o banco é liberado e um processo novo sobe a fila (``fila.iniciar``).
+
+Confere que todas as transcrições estão no banco exatamente uma vez, que a
+fila ficou vazia e que os agregados batem; sai com código 1 se algo falhar.
+Mostra também o tempo do salvar (enfileirar) com o banco travado.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+def filho_enfileirar(banco: str, n: int):
+    """Processo que "transcreve" n formulários e fica esperando ser morto."""
+    from sac_core import fila
+    from sac_core.sintetico import gerar_registros
+    tempos = []
+    for dados in gerar_registros(n):
+        t0 = time.perf_counter()
+        fila.enfileirar(dados, banco)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    print(json.dumps({"ms": tempos}), flush=True)
+    time.sleep(3600)
+
+def filho_reiniciar(banco: str, limite_s: float):
+    from sac_core import fila
+    fila.iniciar(banco)
+    inicio = time.time()
+    while fila.situacao(banco)["pendentes"] and time.time() - inicio < limite_s:
+        time.sleep(0.05)
+    print(json.dumps({**fila.situacao(banco), "s": time.time() - inicio}), flush=True)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--registros", type=int, default=200)
+    ap.add_argument("--limite", type=float, default=120.0, help="segundos para a fila esvaziar depois do reinício")
+    ap.add_argument("--filho", choices=["enfileirar", "reiniciar"], help=argparse.SUPPRESS)
+    ap.add_argument("--banco", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.filho == "enfileirar":
+        return filho_enfileirar(args.banco, args.registros)
+    if args.filho == "reiniciar":
+        return filho_reiniciar(args.banco, args.limite)
+
+    from sac_core import agregados, armazenamento as A, fila
+    problemas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        banco = os.path.join(tmp, A.ARQUIVO_DB)
+        A.conectar(banco)
+
+        # 1) banco travado; o filho enfileira e morre
+        trava = sqlite3.connect(banco, isolation_level=None)
+        trava.execute("BEGIN IMMEDIATE")
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--filho", "enfileirar", "--banco", banco,
+                                 "--registros", str(args.registros)], stdout=subprocess.PIPE, text=True)
+        tempos = json.loads(proc.stdout.readline())["ms"]
+        proc.kill()
+        proc.wait()
+        trava.execute("ROLLBACK")
+        trava.close()
+        arquivos = fila._arquivos(fila.pasta_fila(banco))
+        esperados = []
+        for arquivo in arquivos:
+            with open(arquivo, encoding="utf-8") as f:
+                esperados.append(json.load(f)["Registro_ID"])
+        print(f"salvar com o banco travado: mediana {statistics.median(tempos):.2f} ms, máx {max(tempos):.2f} ms", file=sys.stderr)
+        print(f"filho morto: {len(arquivos)} na fila, {A.contar_registros(banco)} no banco", file=sys.stderr)
+        if len(arquivos) != args.registros or A.contar_registros(banco) != 0:
+            problemas.append("a fila não guardou tudo antes da queda")
+
+        # 2) metade já gravada, mas ainda na fila
+        metade = []
+        for arquivo in arquivos[::2]:
+            with open(arquivo, encoding="utf-8") as f:
+                metade.append(json.load(f))
+        A.inserir_registros(metade, banco)
+
+        # 3) reinício
+        saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--filho", "reiniciar", "--banco", banco,
+                                "--limite", str(args.limite)], capture_output=True, text=True, check=True).stdout
+        r = json.loads(saida.strip().splitlines()[-1])
+        print(f"reinício: fila esvaziada em {r['s']:.2f} s (pendentes {r['pendentes']}, falhas {r['falhas']})", file=sys.stderr)
+
+        ids = A.listar_ids(banco)
+        if r["pendentes"] or r["falhas"]:
+            problemas.append(f"fila não esvaziou: {r}")
+        if len(ids) != len(set(ids)):
+            problemas.append(f"{len(ids) - len(set(ids))} registro(s) duplicado(s)")
+        faltando = set(esperados) - set(ids)
+        if faltando:
+            problemas.append(f"{len(faltando)} registro(s) perdido(s)")
+        if len(ids) != args.registros:
+            problemas.append(f"{len(ids)} registro(s) no banco, esperados {args.registros}")
+        problemas += agregados.verificar(A.conectar(banco))
+
+    for p in problemas:
+        print(f"❌ {p}", file=sys.stderr)
+    if not problemas:
+        print(f"✅ {args.registros} transcrição(ões) no banco, uma vez cada, depois da queda e do reinício.", file=sys.stderr)
+    raise SystemExit(1 if problemas else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Latência de um clique de nota numa seção inteira: modo clássico x seletor.
+
+Uso:  python bench/latencia_notas.py [--cliques 20] [--secao "5. Avançadas"]
+
+Roda o app com ``streamlit.testing`` num diretório temporário, abre a seção e
+mede o tempo de cada rerun provocado por um clique (mediana e p90), além do
+nº de widgets de nota e de chaves em ``session_state``. O AppTest sempre
+reroda o script inteiro; no navegador o modo seletor ainda fica dentro de um
+``st.fragment`` por card, então o custo real por clique é menor que o medido.
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _medir(classico: bool, secao: str, cliques: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+    from sac_core.esquema import NOTA_LABELS, QUESTOES_POR_SECAO
+
+    at = AppTest.from_file(os.path.join(os.getcwd(), "sac.py"), default_timeout=120).run()
+    if classico:
+        at.toggle(key="notas_caixas").set_value(True).run()
+    at.radio(key="nav_etapa").set_value(secao).run()
+    ids = [q for q, _ in QUESTOES_POR_SECAO[secao]]
+    tempos = []
+    for i in range(cliques):
+        q, nota = ids[i % len(ids)], NOTA_LABELS[1 + i % 6]
+        if classico:
+            at.checkbox(key=f"cb_{q}_{nota}_0").check()
+        else:
+            at.radio(key=f"rd_{q}_0").set_value(nota)
+        t0 = time.perf_counter()
+        at.run()
+        tempos.append(time.perf_counter() - t0)
+        assert not at.exception, at.exception
+        assert at.session_state[f"nota_{q}_0"] == nota
+    tempos.sort()
+    return {
+        "widgets": sum(1 for w in (at.checkbox if classico else at.radio) if (w.key or "").startswith(("cb_", "rd_"))),
+        "mediana_ms": statistics.median(tempos) * 1000,
+        "p90_ms": tempos[int(0.9 * (len(tempos) - 1))] * 1000,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--cliques", type=int, default=20)
+    ap.add_argument("--secao", default="5. Avançadas")
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome in ("sac.py", "sac_core"):
+            origem = os.path.join(RAIZ, nome)
+            (shutil.copytree if os.path.isdir(origem) else shutil.copy)(origem, os.path.join(tmp, nome))
+        os.chdir(tmp)
+        sys.path.insert(0, tmp)
+        for classico, rotulo in ((True, "clássico (checkboxes)"), (False, "seletor (radio)")):
+            r = _medir(classico, args.secao, args.cliques)
+            print(f"{rotulo:24s}: {r['widgets']:4d} widgets de nota | rerun por clique: "
+                  f"mediana {r['mediana_ms']:7.1f} ms, p90 {r['p90_ms']:7.1f} ms")
+        from sac_core.rascunhos import gravar_pendentes
+        gravar_pendentes()   # antes de apagar o diretório temporário
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Partida a frio e reruns quentes do app, por modo de operação.
+
+Uso:
+    python bench/partida.py                                  # 1000 registros, 5 partidas, 20 reruns
+    python bench/partida.py --registros 10000 --saida partida.json
+    python bench/partida.py --comparar base.json --saida nova.json
+
+Partida a frio: um interpretador novo por medição importa o Streamlit e roda o
+primeiro rerun do ``sac.py`` já no modo pedido (imports do app, ``preparar_banco``
+e a página); o JSON guarda o tempo total do processo, o do primeiro rerun e
+quais dependências pesadas (pandas, numpy, plotly.express, pyarrow, openpyxl) ficaram
+carregadas. Rerun quente: o mesmo ``AppTest`` rodado de novo sem interação.
+Com ``--comparar`` as medianas são confrontadas com uma execução anterior e o
+script sai com código 1 se alguma piorou além de ``--limite``.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = ["📝 Nova Transcrição", "✏️ Editar Registro", "📊 Painel Gerencial"]
+PESADOS = ["pandas", "numpy", "plotly.express", "pyarrow", "openpyxl"]   # plotly (sem .express) vem com o próprio Streamlit
+
+def _resumo(tempos: list) -> dict:
+    tempos = sorted(tempos)
+    return {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p90_ms": round(tempos[int(0.9 * (len(tempos) - 1))], 3),
+        "min_ms": round(tempos[0], 3),
+        "repeticoes": len(tempos),
+    }
+
+def _app(modo: str):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(RAIZ, "sac.py"), default_timeout=120)
+    at.session_state["modo_operacao"] = modo
+    return at
+
+def filho(modo: str):
+    """Roda dentro do interpretador novo: mede o primeiro rerun e lista os módulos carregados."""
+    t0 = time.perf_counter()
+    at = _app(modo)
+    t1 = time.perf_counter()
+    at.run()
+    t2 = time.perf_counter()
+    if at.exception:
+        raise SystemExit(f"erro no app: {at.exception}")
+    print(json.dumps({"harness_ms": (t1 - t0) * 1000, "primeiro_rerun_ms": (t2 - t1) * 1000,
+                      "carregados": [m for m in PESADOS if m in sys.modules]}))
+
+def medir_frio(modo: str, repeticoes: int, pasta: str) -> dict:
+    totais, reruns, carregados = [], [], None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--filho", modo], cwd=pasta,
+                               capture_output=True, text=True, check=True).stdout
+        totais.append((time.perf_counter() - t0) * 1000)
+        r = json.loads(saida.strip().splitlines()[-1])
+        reruns.append(r["primeiro_rerun_ms"])
+        carregados = r["carregados"]
+    return {"processo": _resumo(totais), "primeiro_rerun": _resumo(reruns), "carregados": carregados}
+
+def medir_quente(modo: str, repeticoes: int) -> dict:
+    at = _app(modo)
+    at.run()
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        at.run()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return _resumo(tempos)
+
+def _popular(pasta: str, n: int):
+    sys.path.insert(0, RAIZ)
+    from sac_core import armazenamento as A
+    from sac_core.sintetico import gerar_registros
+    banco = os.path.join(pasta, A.ARQUIVO_DB)
+    registros = gerar_registros(n)
+    while True:
+        lote = list(islice(registros, 5000))
+        if not lote:
+            break
+        A.inserir_registros(lote, banco)
+
+def comparar(base: dict, atual: dict, limite: float) -> list:
+    """(medida, mediana base, mediana atual, razão) que pioraram além de ``limite``."""
+    def medianas(r):
+        out = {}
+        for modo, v in r.get("frio", {}).items():
+            out[f"frio {modo} processo"] = v["processo"]["mediana_ms"]
+            out[f"frio {modo} primeiro_rerun"] = v["primeiro_rerun"]["mediana_ms"]
+        for modo, v in r.get("quente", {}).items():
+            out[f"quente {modo}"] = v["mediana_ms"]
+        return out
+    antes, depois = medianas(base), medianas(atual)
+    return [(k, antes[k], v, v / antes[k]) for k, v in depois.items() if antes.get(k) and v / antes[k] > limite]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--registros", type=int, default=1000)
+    ap.add_argument("--partidas", type=int, default=5, help="processos novos por modo")
+    ap.add_argument("--reruns", type=int, default=20, help="reruns quentes por modo")
+    ap.add_argument("--saida", help="arquivo JSON (padrão: stdout)")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior")
+    ap.add_argument("--limite", type=float, default=1.25, help="razão de mediana considerada regressão")
+    ap.add_argument("--filho", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.filho:
+        return filho(args.filho)
+
+    resultado = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "registros": args.registros,
+        },
+        "frio": {},
+        "quente": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        _popular(tmp, args.registros)
+        os.chdir(tmp)   # o app usa o banco do diretório atual
+        for modo in MODOS:
+            r = resultado["frio"][modo] = medir_frio(modo, args.partidas, tmp)
+            print(f"frio   {modo:22s} processo {r['processo']['mediana_ms']:>9.1f} ms   1º rerun {r['primeiro_rerun']['mediana_ms']:>8.1f} ms   "
+                  f"carregados: {', '.join(r['carregados']) or '-'}", file=sys.stderr)
+        for modo in MODOS:
+            r = resultado["quente"][modo] = medir_quente(modo, args.reruns)
+            print(f"quente {modo:22s} rerun {r['mediana_ms']:>8.1f} ms (p90 {r['p90_ms']:.1f})", file=sys.stderr)
+        os.chdir(RAIZ)
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            piores = comparar(json.load(f), resultado, args.limite)
+        for medida, antes, depois, razao in piores:
+            print(f"REGRESSÃO {medida}: {antes:.1f} -> {depois:.1f} ms ({razao:.2f}x)", file=sys.stderr)
+        raise SystemExit(1 if piores else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compara o DataFrame todo-texto com a forma tipada (memória e tempo de leitura).
+
+Uso:  python bench/representacao_tipada.py [--tamanhos 10000 100000]
+
+Para cada tamanho gera um CSV sintético e mede:
+  * texto  – ``ler_csv_seguro`` (dtype=str) + o ``to_numeric`` coluna a coluna
+             que o Painel fazia a cada rerun;
+  * tipado – ``ler_csv_tipado`` (sem textos livres) e ``tipar_dataframe`` a
+             partir do frame texto (caminho usado pelo banco).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from sac_core.armazenamento import ler_csv_seguro  # noqa: E402
+from sac_core.esquema import IDS_QUESTOES, ler_csv_tipado, tipar_dataframe  # noqa: E402
+from sac_core.sintetico import gerar_registros  # noqa: E402
+
+def _medir(f):
+    t0 = time.perf_counter(); r = f(); return r, time.perf_counter() - t0
+
+def _mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2**20
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000])
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.tamanhos:
+            csv = os.path.join(tmp, f"sac_{n}.csv")
+            pd.DataFrame(gerar_registros(n)).to_csv(csv, index=False, encoding="utf-8-sig")
+
+            df_txt, t_txt = _medir(lambda: ler_csv_seguro(csv))
+            _, t_num = _medir(lambda: df_txt[IDS_QUESTOES].apply(pd.to_numeric, errors="coerce"))
+            df_tip, t_tip = _medir(lambda: ler_csv_tipado(csv))
+            _, t_conv = _medir(lambda: tipar_dataframe(df_txt))
+
+            print(f"--- {n} registros ---")
+            print(f"texto : {_mb(df_txt):8.1f} MB | leitura {t_txt:6.2f}s + to_numeric por rerun {t_num:6.3f}s")
+            print(f"tipado: {_mb(df_tip):8.1f} MB | leitura {t_tip:6.2f}s (tipar a partir do texto: {t_conv:6.3f}s, uma vez por versão)")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,42 @@
 
 # app.py
-import os
+import io
 import json
+import os
+import tempfile
+import threading
 import uuid
-from datetime import datetime, timedelta, timezone
+import zipfile
+from datetime import datetime
+from pathlib import Path
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+from sac_core import perfil
+from sac_core.armazenamento import (
+    ARQUIVO_CSV_LEGADO, ARQUIVO_DB, CSV_ENCODING, ConflitoDeVersao, analise_coorte,
+    ORDENACOES, arquivar_campanha, atualizar_em_lote, atualizar_registro, caminho_campanha, campanhas,
+    campanhas_arquivadas, discentes_acompanhados, reabrir_campanha,
+    contar_registros, historico_registro, importar_csv, migrar_registros, obter_registro, pagina_registros,
+    registro_em, registros_desatualizados, retrato_painel, semestres_presentes, versao_registro,
+)
+from sac_core.busca import TAMANHO_PAGINA, indice_busca
+from sac_core.campanhas import campanha_atual
+from sac_core.duplicatas import linhas_relatorio, relatorio as relatorio_duplicatas, verificar as verificar_duplicatas
+from sac_core.esquema import (
+    ID_PARA_LABEL, LISTA_CURRICULOS, LISTA_PETIANOS, LISTA_SEMESTRES, NOTA_LABELS,
+    QUESTOES_POR_SECAO, ROTULOS_REFLEXAO, SECOES, TITULOS_SECOES,
+)
+from sac_core.exportacao import FORMATOS, arquivo_exportado, formatos_disponiveis
+from sac_core.fila import enfileirar, falhas as falhas_fila, iniciar as iniciar_fila, reenviar_falhas, situacao as situacao_fila
+from sac_core.historico import ARQUIVAMENTO, INCLUSAO
+from sac_core.importacao import CABECALHO_RELATORIO, escritor_relatorio, importar_planilha
+from sac_core.rascunhos import (
+    agendar_gravacao, carregar_rascunho, descartar_rascunho, expurgar_rascunhos, gravar_pendentes,
+)
+from sac_core.progressao import progressao
+from sac_core.relatorios import estatisticas_coorte, gerar_html, gerar_relatorios, nome_arquivo
+from sac_core.registro import CAMPOS_OBRIGATORIOS, CHAVES_REFLEXAO, registro_do_formulario, validar_registro
 
 # ==============================================================================
 # 1) CONFIGURAÇÕES
@@ -19,14 +48,29 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-ARQUIVO_DB = "respostas_sac_deq.csv"
-ARQUIVO_BACKUP = "_backup_autosave.json"
-CSV_ENCODING = "utf-8-sig"   # amigável para Excel
+# Perfil dos reruns (opcional): SAC_PERFIL=1 ou interruptor oculto (?admin=1)
+perfil.iniciar_rerun(perfil.ATIVO_POR_AMBIENTE or st.session_state.get("perfil_ativo", False))
+perfil.etapa("preparar_banco")
+
+@st.cache_resource
+def preparar_banco():
+    """Uma vez por processo: traz o CSV antigo para o banco, limpa rascunhos abandonados,
+    sobe a fila de gravação (o que ficou nela de uma execução anterior vai para o banco) e,
+    se o esquema mudou, regrava os registros antigos em segundo plano (a leitura já sai migrada)."""
+    expurgar_rascunhos()
+    importados = importar_csv(ARQUIVO_CSV_LEGADO, ARQUIVO_DB)
+    iniciar_fila(ARQUIVO_DB)
+    if registros_desatualizados(ARQUIVO_DB):
+        threading.Thread(target=migrar_registros, args=(ARQUIVO_DB,), name="sac-migracao", daemon=True).start()
+    return importados
+
+preparar_banco()
 
 # ==============================================================================
 # 2) ESTILO
 # ==============================================================================
-st.markdown("""
+# textos estáticos: constantes do módulo, enviados num único elemento por rerun
+ESTILO = """
 <style>
 :root { --primary-color: #002060; }
 .stApp { font-family: 'Segoe UI', 'Roboto', sans-serif; }
@@ -59,54 +103,66 @@ h1, h2, h3, h4 {
 .edit-warning { padding: 15px; border-radius: 8px; margin-bottom: 20px; text-align: center; font-weight: bold; }
 #MainMenu{visibility:hidden} footer{visibility:hidden}
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # ==============================================================================
 # 3) CABEÇALHO
 # ==============================================================================
-st.markdown("""
+CABECALHO = """
 <div style="text-align:center;margin-bottom:30px;padding-bottom:20px;border-bottom:2px solid rgba(128,128,128,0.2);">
   <h1 style="margin:0;font-size:2.5rem;">S.A.C.</h1>
   <div style="font-size:1.2rem;font-weight:600;opacity:0.8;">SISTEMA DE AVALIAÇÃO CURRICULAR - MÓDULO DE TRANSCRIÇÃO</div>
   <div style="font-size:0.9rem;opacity:0.6;margin-top:5px;">PET ENGENHARIA QUÍMICA - UNIVERSIDADE FEDERAL DO CEARÁ</div>
 </div>
-""", unsafe_allow_html=True)
+"""
+perfil.etapa("estilo_cabecalho")
+st.markdown(ESTILO + CABECALHO, unsafe_allow_html=True)
 
 # ==============================================================================
 # 4) SUPORTE / ESTADO
 # ==============================================================================
-SECOES = ["1. Gerais", "2. Específicas", "3. Básicas", "4. Profissionais", "5. Avançadas", "6. Reflexão"]
-
-LISTA_PETIANOS = sorted(["", "Ana Carolina", "Ana Clara", "Ana Júlia", "Eric Rullian", "Gildelandio Junior", "Lucas Mossmann (trainee)", "Pedro Paulo"])
-LISTA_SEMESTRES = [f"{i}º Semestre" for i in range(1, 11)]
-LISTA_CURRICULOS = ["Novo (2023.1)", "Antigo (2005.1)", "Troca de Matriz (Velha -> Nova)"]
-
+perfil.etapa("estado_rascunho")
 # Estado inicial seguro
 if "nav_etapa" not in st.session_state:
     st.session_state["nav_etapa"] = SECOES[0]
 if 'form_key' not in st.session_state:
     st.session_state.form_key = 0
 
+# Rascunho por aba: o id vai na URL (?rascunho=...) para sobreviver a um F5
+if "rascunho_id" not in st.session_state:
+    st.session_state.rascunho_id = st.query_params.get("rascunho") or uuid.uuid4().hex
+    st.query_params["rascunho"] = st.session_state.rascunho_id
+
+def _chaves_rascunho():
+    """Campos do formulário atual, sem o sufixo do form_key (o rascunho vale para qualquer form_key)."""
+    sfx = f"_{st.session_state.form_key}"
+    return {k[:-len(sfx)]: v for k, v in st.session_state.items()
+            if k.startswith(("nota_", "obs_", "ident_")) and k.endswith(sfx) and isinstance(v, (str, int, float, bool))}
+
 def carregar_backup():
-    if os.path.exists(ARQUIVO_BACKUP):
-        try:
-            with open(ARQUIVO_BACKUP, "r", encoding='utf-8') as f:
-                dados = json.load(f)
-                for k, v in dados.items():
-                    if k.endswith(f"_{st.session_state.form_key}"):
-                        st.session_state[k] = v
-        except Exception:
-            pass
+    try:
+        dados = carregar_rascunho(st.session_state.rascunho_id)
+    except Exception:
+        dados = {}
+    sfx = f"_{st.session_state.form_key}"
+    for k, v in dados.items():
+        st.session_state[k + sfx] = v
+    st.session_state["_rascunho_gravado"] = dados
 
 if 'backup_restaurado' not in st.session_state:
     carregar_backup()
     st.session_state.backup_restaurado = True
 
+@perfil.cronometrado()
 def salvar_estado():
+    """Envia só as chaves que mudaram desde a última vez; a gravação em disco é agrupada em segundo plano."""
     try:
-        dados_salvar = {k: v for k, v in st.session_state.items() if (k.startswith(("nota_", "obs_", "ident_"))) and isinstance(v, (str, int, float, bool))}
-        with open(ARQUIVO_BACKUP, "w", encoding='utf-8') as f:
-            json.dump(dados_salvar, f, indent=4, ensure_ascii=False)
+        atual = _chaves_rascunho()
+        gravado = st.session_state.get("_rascunho_gravado", {})
+        alteracoes = {k: v for k, v in atual.items() if gravado.get(k) != v}
+        if alteracoes:
+            agendar_gravacao(st.session_state.rascunho_id, alteracoes)
+            st.session_state["_rascunho_gravado"] = {**gravado, **alteracoes}
     except Exception:
         pass
 
@@ -117,37 +173,32 @@ def navegar_proxima():
         if idx < len(SECOES) - 1:
             st.session_state["nav_etapa"] = SECOES[idx + 1]
             salvar_estado()
+            gravar_pendentes()
             st.rerun()
     except Exception:
         pass
 
 def limpar_formulario():
+    st.session_state.pop("_duplicatas_suspeitas", None)
     st.session_state.form_key += 1
-    st.session_state["nav_etapa"] = SECOES[0]
-    if os.path.exists(ARQUIVO_BACKUP):
-        try: os.remove(ARQUIVO_BACKUP)
-        except Exception: pass
-
-def obter_hora_ceara():
-    fuso = timezone(timedelta(hours=-3))
-    return datetime.now(fuso).strftime("%Y-%m-%d %H:%M:%S")
-
-def escrever_csv_atomico(df_final: pd.DataFrame, destino: str, encoding: str = CSV_ENCODING):
-    tmp = destino + ".tmp"
-    df_final.to_csv(tmp, index=False, encoding=encoding)
-    os.replace(tmp, destino)
-
-def ler_csv_seguro(caminho: str) -> pd.DataFrame:
-    if not os.path.exists(caminho): return pd.DataFrame()
-    for enc in (CSV_ENCODING, "utf-8", "latin-1"):
-        try: return pd.read_csv(caminho, dtype=str, encoding=enc)
-        except Exception: continue
-    return pd.read_csv(caminho, dtype=str)
+    st.session_state.pop("nav_etapa", None)   # o radio já existe neste rerun; volta para a 1ª etapa no próximo
+    st.session_state["_rascunho_gravado"] = {}
+    try: descartar_rascunho(st.session_state.rascunho_id)
+    except Exception: pass
+
+def ler_exportacao(formato: str) -> bytes:
+    """Arquivo do banco completo (em cache por versão do banco; ver ``sac_core.exportacao``)."""
+    with open(arquivo_exportado(formato, ARQUIVO_DB), "rb") as f:
+        return f.read()
 
 # ==============================================================================
-# 5) CHECKBOXES EXCLUSIVOS (N/A, 0..5) – fora de forms
+# 5) NOTAS (N/A, 0..5) – fora de forms
 # ==============================================================================
-NOTA_LABELS = ["N/A", "0", "1", "2", "3", "4", "5"]
+# A nota fica em ``nota_{id}{sufixo}`` (chave comum, não de widget, para não ser
+# descartada quando a seção sai da tela). Modo padrão: um radio por questão;
+# o modo clássico (7 checkboxes exclusivos) continua disponível na barra lateral.
+def _on_radio_change(grupo_id: str, k_suffix: str):
+    st.session_state[f"nota_{grupo_id}{k_suffix}"] = st.session_state[f"rd_{grupo_id}{k_suffix}"]
 
 def _on_checkbox_change(grupo_id: str, label_clicked: str, labels: list, k_suffix: str):
     """Exclusividade: apenas um marcado; nunca deixa vazio."""
@@ -163,145 +214,87 @@ def _on_checkbox_change(grupo_id: str, label_clicked: str, labels: list, k_suffi
         for lab in labels:
             st.session_state[f"cb_{grupo_id}_{lab}{k_suffix}"] = (lab == sel)
 
+@perfil.cronometrado("widgets:pergunta")
 def renderizar_pergunta(texto_pergunta, id_unica, valor_padrao="N/A", obs_padrao="", key_suffix=""):
-    """Card da pergunta: checkboxes exclusivos + observação."""
+    """Card da pergunta: nota (radio ou checkboxes exclusivos) + observação."""
     k = key_suffix if key_suffix else f"_{st.session_state.form_key}"
     labels = NOTA_LABELS
 
-    # Estado inicial da nota e checkboxes
+    # Estado inicial da nota; o widget é sempre ressincronizado a partir dela
     nota_key = f"nota_{id_unica}{k}"
     if nota_key not in st.session_state or st.session_state[nota_key] not in labels:
         st.session_state[nota_key] = str(valor_padrao) if str(valor_padrao) in labels else "N/A"
     selected = st.session_state[nota_key]
-    for lab in labels:
-        cb_key = f"cb_{id_unica}_{lab}{k}"
-        if cb_key not in st.session_state:
-            st.session_state[cb_key] = (lab == selected)
 
     with st.container():
         st.markdown(f"""<div class="pergunta-card"><div class="pergunta-texto">{texto_pergunta}</div></div>""", unsafe_allow_html=True)
         c1, c2 = st.columns([0.55, 0.45])
         with c1:
-            cols = st.columns(len(labels))
-            for i, lab in enumerate(labels):
-                cb_key = f"cb_{id_unica}_{lab}{k}"
-                cols[i].checkbox(
-                    lab,
-                    value=st.session_state.get(cb_key, lab == selected),
-                    key=cb_key,
-                    on_change=_on_checkbox_change,
-                    args=(id_unica, lab, labels, k),
-                    help="Selecione apenas uma opção. Use 'N/A' se vazio."
+            if st.session_state.get("notas_caixas"):
+                cols = st.columns(len(labels))
+                for i, lab in enumerate(labels):
+                    cb_key = f"cb_{id_unica}_{lab}{k}"
+                    if st.session_state.get(cb_key) != (lab == selected):
+                        st.session_state[cb_key] = (lab == selected)
+                    cols[i].checkbox(
+                        lab,
+                        key=cb_key,
+                        on_change=_on_checkbox_change,
+                        args=(id_unica, lab, labels, k),
+                        help="Selecione apenas uma opção. Use 'N/A' se vazio."
+                    )
+            else:
+                rd_key = f"rd_{id_unica}{k}"
+                if st.session_state.get(rd_key) != selected:
+                    st.session_state[rd_key] = selected
+                st.radio(
+                    "Nota", labels,
+                    key=rd_key,
+                    on_change=_on_radio_change,
+                    args=(id_unica, k),
+                    horizontal=True,
+                    label_visibility="collapsed",
+                    help="Use 'N/A' se vazio."
                 )
         with c2:
             st.text_input(
                 "Transcrição de Obs.",
-                value=str(obs_padrao) if pd.notna(obs_padrao) else "",
+                value=str(obs_padrao or ""),
                 placeholder="Comentários...",
                 key=f"obs_{id_unica}{k}"
             )
 
-# ==============================================================================
-# 6) MAPA DE QUESTÕES (ordem + rótulos “Questão X”)
-# ==============================================================================
-ORDEM_QUESTOES = [
-    # 1. Gerais
-    ("q1",  "Projetar e conduzir experimentos e interpretar resultados"),
-    ("q2",  "Desenvolver e/ou utilizar novas ferramentas e técnicas"),
-    ("q3",  "Conceber, projetar e analisar sistemas, produtos e processos"),
-    ("q4",  "Formular, conceber e avaliar soluções para problemas de engenharia"),
-    ("q5",  "Analisar e compreender fenômenos físicos e químicos através de modelos"),
-    ("q6",  "Comunicação técnica"),
-    ("q7",  "Trabalhar e liderar equipes profissionais"),
-    ("q8",  "Aplicar ética e legislação no exercício profissional"),
-    # 2. Específicas
-    ("q9",  "Aplicar conhecimentos matemáticos, científicos e tecnológicos"),
-    ("q10", "Compreender e modelar transferência de quantidade de movimento, calor e massa"),
-    ("q11", "Aplicar conhecimentos de fenômenos de transporte ao projeto"),
-    ("q12", "Compreender mecanismos de transformação da matéria e energia"),
-    ("q13", "Projetar sistemas de recuperação, separação e purificação"),
-    ("q14", "Compreender mecanismos cinéticos de reações químicas"),
-    ("q15", "Projetar e otimizar sistemas reacionais e reatores"),
-    ("q16", "Projetar sistemas de controle de processos industriais"),
-    ("q17", "Projetar e otimizar plantas industriais considerando ambiente e segurança"),
-    ("q18", "Aplicação de conhecimentos em projeto básico e dimensionamento"),
-    ("q19", "Execução de projetos de produção e melhorias de processos"),
-    # 3. Básicas
-    ("calc_21",   "Cálculo: Analisar grandes volumes de dados"),
-    ("calc_52",   "Cálculo: Formação Básica"),
-    ("fis_22",    "Física: Analisar criticamente a operação e manutenção de sistemas"),
-    ("fis_53",    "Física: Ciência da Engenharia"),
-    ("qui_23",    "Química: Aplicar conhecimentos de transformação a processos"),
-    ("qui_24",    "Química: Conceber e desenvolver produtos e processos"),
-    ("termo_25",  "Termodinâmica: Projetar sistemas de suprimento energético"),
-    ("termo_54",  "Termodinâmica: Ciência da Engenharia Química"),
-    ("ft_26",     "Fenômenos de Transporte: Aplicar conhecimentos de fenômenos de transporte"),
-    ("ft_27",     "Fenômenos de Transporte: Comunicação técnica e recursos gráficos"),
-    ("mecflu_28", "Mecânica dos Fluidos: Implantar, implementar e controlar soluções"),
-    ("mecflu_29", "Mecânica dos Fluidos: Operar e supervisionar instalações"),
-    # 4. Profissionais
-    ("op1_30",  "Operações Unitárias I: Inspecionar manutenção"),
-    ("op1_55",  "Operações Unitárias I: Tecnologia Industrial"),
-    ("op2_31",  "Operações Unitárias II: Elaborar estudos ambientais"),
-    ("op2_32",  "Operações Unitárias II: Projetar tratamento ambiental"),
-    ("reat_33", "Reatores Químicos: Gerir recursos"),
-    ("reat_34", "Reatores Químicos: Controle de qualidade"),
-    ("ctrl_35", "Controle de Processos: Supervisão"),
-    ("ctrl_36", "Projetos: Gestão de empreendimentos"),
-    ("proj_56", "Projetos: Gestão Industrial"),
-    ("proj_57", "Projetos: Ética e Humanidades"),
-    # 5. Avançadas
-    ("econ_37",  "Engenharia Econômica: Novos conceitos"),
-    ("econ_38",  "Engenharia Econômica: Visão global"),
-    ("gest_39",  "Gestão da Produção: Comprometimento"),
-    ("gest_40",  "Gestão da Produção: Resultados"),
-    ("amb_41",   "Engenharia Ambiental: Inovação"),
-    ("amb_42",   "Engenharia Ambiental: Novas situações"),
-    ("seg_43",   "Segurança: Incertezas"),
-    ("seg_44",   "Segurança: Decisão"),
-    ("lab_45",   "Laboratório: Criatividade"),
-    ("lab_46",   "Laboratório: Relacionamento"),
-    ("est_47",   "Estágio: Autocontrole emocional"),
-    ("est_48",   "Estágio: Capacidade empreendedora"),
-    ("bio_49",   "Biotecnologia: Dados"),
-    ("bio_50",   "Biotecnologia: Ferramentas"),
-    ("petro_51", "Petróleo: Recuperação"),
-    ("petro_52", "Petróleo: Reatores"),
-    ("poli_53",  "Polímeros: Cinética"),
-    ("poli_54",  "Polímeros: Produtos"),
-    ("cat_55",   "Catálise: Mecanismos de transformação"),
-    ("cat_56",   "Catálise: Aplicar na produção"),
-    ("sim_57",   "Simulação: Dados"),
-    ("sim_58",   "Simulação: Comunicação"),
-    ("otim_59",  "Otimização: Soluções"),
-    ("otim_60",  "Otimização: Modelos"),
-    ("tcc_61",   "TCC: Comunicação"),
-    ("tcc_62",   "TCC: Liderança"),
-    # 6. Reflexão – Geral
-    ("q20_indiv","Capacidade de aprender rapidamente novos conceitos (Geral)")
-]
-
-ID_PARA_LABEL = {id_: f"Questão {i+1}" for i, (id_, _) in enumerate(ORDEM_QUESTOES)}
-ID_PARA_TEXTO = {id_: titulo for (id_, titulo) in ORDEM_QUESTOES}
-
-def dataframe_ordenado_para_visual(df: pd.DataFrame):
-    """Retorna df numérico com colunas renomeadas para “Questão X” e em ordem natural + mapa (Questão X → texto completo)."""
-    ids_presentes = [id_ for id_, _ in ORDEM_QUESTOES if id_ in df.columns]
-    if not ids_presentes:
-        return pd.DataFrame(), []
-    df_nums = df[ids_presentes].apply(pd.to_numeric, errors='coerce')
-    labels_ordem = [ID_PARA_LABEL[id_] for id_ in ids_presentes]
-    textos_ordem = [ID_PARA_TEXTO[id_] for id_ in ids_presentes]
-    df_nums.columns = labels_ordem
-    mapa = list(zip(labels_ordem, textos_ordem))
-    return df_nums, mapa
+@st.fragment
+def card_transcricao(texto_pergunta, id_unica, key_suffix):
+    """Na Nova Transcrição nada fora do card depende da nota: um clique reroda só o card."""
+    renderizar_pergunta(texto_pergunta, id_unica, key_suffix=key_suffix)
+    salvar_estado()
 
 # ==============================================================================
-# 7) BARRA LATERAL
+# 6) BARRA LATERAL
 # ==============================================================================
+perfil.etapa("barra_lateral")
 with st.sidebar:
     st.markdown("### ⚙️ MODO DE OPERAÇÃO")
-    modo_operacao = st.radio("Selecione:", ["📝 Nova Transcrição", "✏️ Editar Registro", "📊 Painel Gerencial"], label_visibility="collapsed")
+    modo_operacao = st.radio("Selecione:", ["📝 Nova Transcrição", "✏️ Editar Registro", "📊 Painel Gerencial"], label_visibility="collapsed", key="modo_operacao")
+    st.toggle("Notas em caixas de seleção (modo clássico)", key="notas_caixas",
+              help="O modo padrão (um seletor por questão) responde mais rápido em seções longas.")
+    if "admin" in st.query_params:
+        st.toggle("⏱️ Perfil de reruns", key="perfil_ativo",
+                  help="Mede o tempo de cada trecho do script; resumo no fim da página.")
+    # fila de gravação: o salvar só confirma a entrada na fila; o banco é atualizado em segundo plano
+    fila = situacao_fila(ARQUIVO_DB)
+    if fila["falhas"]:
+        st.error(f"❌ {fila['falhas']} transcrição(ões) recusada(s) pelo banco (guardadas na fila).")
+        for nome, motivo in falhas_fila(ARQUIVO_DB):
+            st.caption(f"{nome}: {motivo}")
+        if st.button("Tentar gravar de novo", key="reenviar_fila"):
+            reenviar_falhas(ARQUIVO_DB); st.rerun()
+    if fila["pendentes"]:
+        st.warning(f"⏳ {fila['pendentes']} transcrição(ões) aguardando gravação no banco"
+                   + (f" – tentando de novo ({fila['erro']})" if fila["erro"] else "") + ".")
+    elif not fila["falhas"]:
+        st.caption("✅ Todas as transcrições estão gravadas no banco.")
     st.markdown("---")
     if modo_operacao == "📝 Nova Transcrição":
         tab_id, tab_manual = st.tabs(["👤 Identificação", "📘 Manual"])
@@ -321,10 +314,15 @@ with st.sidebar:
             st.markdown("* **N/A (Não se Aplica):** Use quando vazio/rasura/duplicado.\n* **Nota:** N/A não entra na média.")
             st.error("O sistema **BLOQUEIA** o salvamento se a Reflexão Final estiver vazia (use **EM BRANCO** / **NÃO RESPONDEU**).")
 
+perfil.anotar(modo=modo_operacao)
+perfil.etapa(f"modo:{modo_operacao}")
+
 # ==============================================================================
-# 8) NOVA TRANSCRIÇÃO (sem forms; botões com callback)
+# 7) NOVA TRANSCRIÇÃO (sem forms; botões com callback)
 # ==============================================================================
 if modo_operacao == "📝 Nova Transcrição":
+    if "_aviso_salvo" in st.session_state:
+        st.balloons(); st.success(st.session_state.pop("_aviso_salvo"))
     secao_ativa = st.radio("Etapas:", SECOES, horizontal=True, key="nav_etapa", label_visibility="collapsed")
     st.markdown("---")
     k_suffix = f"_{st.session_state.form_key}"
@@ -334,305 +332,467 @@ if modo_operacao == "📝 Nova Transcrição":
         st.button("SALVAR RASCUNHO E AVANÇAR ➡️", on_click=navegar_proxima, key=key)
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # 1. Gerais (0..7)
-    if secao_ativa == SECOES[0]:
-        st.markdown("### 1. COMPETÊNCIAS TÉCNICAS E GERAIS")
-        for id_, titulo in ORDEM_QUESTOES[:8]:
-            stt = f"{ID_PARA_LABEL[id_]} — {titulo}"
-            renderizar_pergunta(stt, id_, key_suffix=k_suffix)
-        st.markdown("---"); bloco_avancar("btn_nav1")
-
-    # 2. Específicas (8..18)
-    elif secao_ativa == SECOES[1]:
-        st.markdown("### 2. COMPETÊNCIAS ESPECÍFICAS")
-        for id_, titulo in ORDEM_QUESTOES[8:19]:
-            stt = f"{ID_PARA_LABEL[id_]} — {titulo}"
-            renderizar_pergunta(stt, id_, key_suffix=k_suffix)
-        st.markdown("---"); bloco_avancar("btn_nav2")
-
-    # 3. Básicas (19..30)
-    elif secao_ativa == SECOES[2]:
-        st.markdown("### 3. DISCIPLINAS BÁSICAS")
-        for id_, titulo in ORDEM_QUESTOES[19:31]:
-            stt = f"{ID_PARA_LABEL[id_]} — {titulo}"
-            renderizar_pergunta(stt, id_, key_suffix=k_suffix)
-        st.markdown("---"); bloco_avancar("btn_nav3")
-
-    # 4. Profissionais (31..40)
-    elif secao_ativa == SECOES[3]:
-        st.markdown("### 4. DISCIPLINAS PROFISSIONALIZANTES")
-        for id_, titulo in ORDEM_QUESTOES[31:41]:
-            stt = f"{ID_PARA_LABEL[id_]} — {titulo}"
-            renderizar_pergunta(stt, id_, key_suffix=k_suffix)
-        st.markdown("---"); bloco_avancar("btn_nav4")
-
-    # 5. Avançadas (41..-2)  |  6. Reflexão (última)
-    elif secao_ativa == SECOES[4]:
-        st.markdown("### 5. DISCIPLINAS AVANÇADAS")
-        for id_, titulo in ORDEM_QUESTOES[41:-1]:  # até antes da questão de reflexão geral
-            stt = f"{ID_PARA_LABEL[id_]} — {titulo}"
-            renderizar_pergunta(stt, id_, key_suffix=k_suffix)
-        st.markdown("---"); bloco_avancar("btn_nav5")
-
-    elif secao_ativa == SECOES[5]:
-        st.markdown("### 6. REFLEXÃO FINAL E AUTOAVALIAÇÃO")
+    if secao_ativa != SECOES[-1]:
+        st.markdown(f"### {TITULOS_SECOES[secao_ativa]}")
+        for id_, titulo in QUESTOES_POR_SECAO[secao_ativa]:
+            card_transcricao(f"{ID_PARA_LABEL[id_]} — {titulo}", id_, k_suffix)
+        st.markdown("---"); bloco_avancar(f"btn_nav{SECOES.index(secao_ativa) + 1}")
+
+    else:
+        st.markdown(f"### {TITULOS_SECOES[secao_ativa]}")
         st.warning("⚠️ Obrigatório. Se o físico estiver vazio, digite 'EM BRANCO'.")
-        id20, tit20 = ORDEM_QUESTOES[-1]
-        renderizar_pergunta(f"{ID_PARA_LABEL[id20]} — {tit20}", id20, key_suffix=k_suffix)
+        for id_, titulo in QUESTOES_POR_SECAO[secao_ativa]:
+            card_transcricao(f"{ID_PARA_LABEL[id_]} — {titulo}", id_, k_suffix)
 
         st.markdown("#### TRANSCRIÇÃO DAS RESPOSTAS ABERTAS")
-        txt_fortes = st.text_area("Pontos Fortes *", help="Obrigatório.", key=f"obs_fortes{k_suffix}")
-        txt_fracos = st.text_area("Pontos a Desenvolver *", help="Obrigatório.", key=f"obs_fracos{k_suffix}")
-        txt_prat   = st.text_area("Contribuição Prática", key=f"obs_prat{k_suffix}")
-        txt_ex     = st.text_area("Exemplos de Aplicação", key=f"obs_ex{k_suffix}")
-        txt_fut1   = st.text_area("Competências Futuras", key=f"obs_fut1{k_suffix}")
-        txt_fut2   = st.text_area("Plano de Desenvolvimento", key=f"obs_fut2{k_suffix}")
-        txt_final  = st.text_area("Comentários Finais *", help="Obrigatório.", key=f"obs_final{k_suffix}")
+        for campo, chave in CHAVES_REFLEXAO.items():
+            obrigatorio = campo in CAMPOS_OBRIGATORIOS
+            st.text_area(ROTULOS_REFLEXAO[campo] + (" *" if obrigatorio else ""),
+                         help="Obrigatório." if obrigatorio else None, key=f"obs_{chave}{k_suffix}")
 
         st.markdown("---")
         st.markdown('<div class="botao-final">', unsafe_allow_html=True)
-        if st.button("💾 FINALIZAR E SALVAR REGISTRO", type="primary"):
-            dados_salvar = {
-                "Registro_ID": str(uuid.uuid4()),
-                "Petiano_Responsavel": st.session_state.get(f"ident_pet{k_suffix}", ""),
-                "Nome": st.session_state.get(f"ident_nome{k_suffix}", ""),
-                "Matricula": st.session_state.get(f"ident_mat{k_suffix}", ""),
-                "Semestre": st.session_state.get(f"ident_sem{k_suffix}", ""),
-                "Curriculo": st.session_state.get(f"ident_curr{k_suffix}", ""),
-                "Data_Registro": obter_hora_ceara(),
-                "Autoavaliação: Pontos Fortes": (txt_fortes or "").strip(),
-                "Autoavaliação: Pontos a Desenvolver": (txt_fracos or "").strip(),
-                "Contribuição Prática": (txt_prat or "").strip(),
-                "Exemplos de Aplicação": (txt_ex or "").strip(),
-                "Competências Futuras": (txt_fut1 or "").strip(),
-                "Plano de Desenvolvimento": (txt_fut2 or "").strip(),
-                "Observações Finais": (txt_final or "").strip(),
-            }
-            # coleta notas e observações por item
-            for k, v in st.session_state.items():
-                if k.endswith(k_suffix):
-                    if k.startswith("nota_"):
-                        col_name = k.replace("nota_", "").replace(k_suffix, "")
-                        dados_salvar[col_name] = v
-                    elif k.startswith("obs_") and not any(x in k for x in ["fortes","fracos","prat","ex","fut1","fut2","final"]):
-                        col_name = "Obs_" + k.replace("obs_", "").replace(k_suffix, "")
-                        dados_salvar[col_name] = v
-
-            erros = []
-            if not dados_salvar["Nome"]: erros.append("Nome do Discente")
-            if not dados_salvar["Petiano_Responsavel"]: erros.append("Petiano Responsável")
-            if not dados_salvar["Autoavaliação: Pontos Fortes"]: erros.append("Pontos Fortes (Obrigatório)")
-            if not dados_salvar["Autoavaliação: Pontos a Desenvolver"]: erros.append("Pontos a Desenvolver (Obrigatório)")
-            if not dados_salvar["Observações Finais"]: erros.append("Comentários Finais (Obrigatório)")
+        confirmar = False
+        if st.session_state.get("_duplicatas_suspeitas"):
+            # mesma folha já transcrita? (índices de matrícula+semestre e de conteúdo; ver sac_core.duplicatas)
+            itens = "\n".join(f"- **{d['Nome']}** ({d['Matricula']}, {d['Semestre']}) por {d['Petiano_Responsavel'] or '—'} "
+                              f"em {d['Data_Registro']}: {', '.join(d['Motivos'])}" for d in st.session_state["_duplicatas_suspeitas"])
+            st.warning(f"⚠️ POSSÍVEL DUPLICATA – esta folha parece já ter sido transcrita:\n\n{itens}")
+            cd1, cd2 = st.columns(2)
+            confirmar = cd1.button("SALVAR MESMO ASSIM")
+            if cd2.button("CANCELAR"):
+                st.session_state.pop("_duplicatas_suspeitas"); st.rerun()
+        if st.button("💾 FINALIZAR E SALVAR REGISTRO", type="primary") or confirmar:
+            dados_salvar = registro_do_formulario(st.session_state, k_suffix)
+            erros = validar_registro(dados_salvar)
 
             if erros:
                 st.error(f"❌ IMPOSSÍVEL SALVAR: {', '.join(erros)}")
+            elif not confirmar and (suspeitos := verificar_duplicatas(dados_salvar, ARQUIVO_DB)):
+                st.session_state["_duplicatas_suspeitas"] = suspeitos; st.rerun()
             else:
                 try:
-                    df_new = pd.DataFrame([dados_salvar])
-                    df_antigo = ler_csv_seguro(ARQUIVO_DB)
-                    if df_antigo.empty: df_final = df_new
-                    else:
-                        if 'Data_Registro' not in df_antigo.columns:
-                            df_antigo['Data_Registro'] = obter_hora_ceara()
-                        df_final = pd.concat([df_antigo, df_new], ignore_index=True)
-                    escrever_csv_atomico(df_final, ARQUIVO_DB, encoding=CSV_ENCODING)
-                    st.balloons(); st.success(f"✅ Transcrição de {dados_salvar['Nome']} salva com sucesso!")
+                    enfileirar(dados_salvar, ARQUIVO_DB)   # durável no disco; o banco recebe em segundo plano
+                except OSError as e:
+                    st.error(f"❌ ERRO: não foi possível guardar a transcrição ({e}). O formulário continua preenchido; tente de novo.")
+                else:
+                    st.session_state["_aviso_salvo"] = f"✅ Transcrição de {dados_salvar['Nome']} salva com sucesso!"
                     limpar_formulario(); st.rerun()
-                except PermissionError:
-                    st.error("❌ ERRO: Feche o CSV/Excel aberto.")
-                except Exception as e:
-                    st.error(f"❌ ERRO: {e}")
         st.markdown('</div>', unsafe_allow_html=True)
     salvar_estado()
 
 # ==============================================================================
-# 9) EDIÇÃO DE REGISTRO (sem forms; checkboxes exclusivos)
+# 8) EDIÇÃO DE REGISTRO (sem forms)
 # ==============================================================================
 elif modo_operacao == "✏️ Editar Registro":
     st.markdown("### ✏️ MODO DE EDIÇÃO")
-    st.markdown("<div class='edit-warning'>⚠️ Atenção: Alterações sobrescrevem permanentemente o registro.</div>", unsafe_allow_html=True)
+    st.markdown("<div class='edit-warning'>⚠️ Atenção: Alterações substituem o registro atual (as versões anteriores ficam no 🕓 Histórico).</div>", unsafe_allow_html=True)
 
-    df = ler_csv_seguro(ARQUIVO_DB)
-    if df.empty:
+    if contar_registros(ARQUIVO_DB) == 0:
         st.warning("Banco de dados vazio.")
     else:
-        # Garante Registro_ID
-        if "Registro_ID" not in df.columns:
-            df["Registro_ID"] = [str(uuid.uuid4()) for _ in range(len(df))]
-            escrever_csv_atomico(df, ARQUIVO_DB, encoding=CSV_ENCODING)
-
-        # Busca / filtro
+        # quem edita assina as alterações no histórico (vazio: autor desconhecido)
+        editor = st.selectbox("Quem está editando", LISTA_PETIANOS, key="editor_edicao") or None
+        # Busca / filtro (índice em memória, sincronizado só com o que mudou no banco)
         col1, col2 = st.columns([0.5, 0.5])
-        termo = col1.text_input("🔎 Buscar por Nome/Matrícula (contém):")
-        sems_db = sorted([s for s in df.get('Semestre', pd.Series(dtype=str)).dropna().unique()])
+        termo = col1.text_input("🔎 Buscar por Nome/Matrícula (contém, ignora acentos):")
+        sems_db = semestres_presentes(ARQUIVO_DB)
         filtro_sem = col2.selectbox("Filtrar por Semestre:", ["Todos"] + sems_db)
+        indice = indice_busca(ARQUIVO_DB)
+        sem_sel = None if filtro_sem == "Todos" else filtro_sem
+        _, total = indice.buscar(termo, sem_sel, tamanho=0)
 
-        df_f = df.copy()
-        if termo:
-            t = termo.lower()
-            df_f = df_f[df_f.apply(lambda r: t in str(r.get("Nome","")).lower() or t in str(r.get("Matricula","")).lower(), axis=1)]
-        if filtro_sem != "Todos": df_f = df_f[df_f['Semestre'] == filtro_sem]
-
-        if df_f.empty:
+        if total == 0:
             st.info("Sem resultados para os filtros atuais.")
         else:
-            opcoes = df_f.apply(lambda x: f"{x.get('Registro_ID','')} • {x.get('Nome','')} ({x.get('Matricula','')})", axis=1).tolist()
+            n_paginas = -(-total // TAMANHO_PAGINA)
+            pagina = 1
+            if n_paginas > 1:
+                pagina = st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1, step=1)
+            resultados, _ = indice.buscar(termo, sem_sel, pagina=pagina - 1)
+            st.caption(f"{total} registro(s) encontrado(s).")
+            opcoes = [f"{rid} • {nome} ({mat})" for rid, nome, mat in resultados]
             sel = st.selectbox("Selecione o registro para corrigir:", opcoes)
             sel_id = sel.split(" • ")[0].strip()
-            idx_series = df.index[df['Registro_ID'] == sel_id]
-            if len(idx_series) == 0:
+            # Lê o registro fresco do banco e guarda a versão vista ao abrir (concorrência otimista)
+            dados = obter_registro(sel_id, ARQUIVO_DB)
+            if dados is None:
                 st.error("Registro não encontrado.")
             else:
-                idx = idx_series[0]
-                dados = df.iloc[idx]
+                versao_key = f"versao_edit_{sel_id}"
+                if versao_key not in st.session_state:
+                    st.session_state[versao_key] = versao_registro(sel_id, ARQUIVO_DB)
+                if "_aviso_edicao" in st.session_state:
+                    st.error(st.session_state.pop("_aviso_edicao"))
+
+                # chaves próprias por registro e versão: ao recarregar após conflito, os widgets nascem de novo
+                k_edit = f"_edit_{sel_id}_{st.session_state[versao_key]}"
 
                 # Cadastrais
                 st.subheader("1) Dados Cadastrais")
                 c1, c2 = st.columns(2)
-                new_nome = c1.text_input("Nome", value=dados.get("Nome", ""))
-                new_mat  = c2.text_input("Matrícula", value=dados.get("Matricula", ""))
+                novos = {}
+                novos["Nome"] = c1.text_input("Nome", value=dados.get("Nome", ""))
+                novos["Matricula"] = c2.text_input("Matrícula", value=dados.get("Matricula", ""))
                 val_sem  = dados.get("Semestre", "")
                 idx_sem  = LISTA_SEMESTRES.index(val_sem) if val_sem in LISTA_SEMESTRES else 0
-                new_sem  = c1.selectbox("Semestre", LISTA_SEMESTRES, index=idx_sem)
+                novos["Semestre"] = c1.selectbox("Semestre", LISTA_SEMESTRES, index=idx_sem)
                 val_curr = dados.get("Curriculo", "")
                 idx_curr = LISTA_CURRICULOS.index(val_curr) if val_curr in LISTA_CURRICULOS else 0
-                new_curr = c2.radio("Currículo", LISTA_CURRICULOS, index=idx_curr)
+                novos["Curriculo"] = c2.radio("Currículo", LISTA_CURRICULOS, index=idx_curr)
                 val_pet  = dados.get("Petiano_Responsavel", "")
                 idx_pet  = LISTA_PETIANOS.index(val_pet) if val_pet in LISTA_PETIANOS else 0
-                new_pet  = st.selectbox("Responsável pela Transcrição", LISTA_PETIANOS, index=idx_pet)
+                novos["Petiano_Responsavel"] = st.selectbox("Responsável pela Transcrição", LISTA_PETIANOS, index=idx_pet)
 
                 st.markdown("---")
-                st.subheader("2) Corrigir Nota de uma Questão")
-                cols_notas_existentes = [id_ for id_, _ in ORDEM_QUESTOES if id_ in df.columns]
-                labels_disp = [ID_PARA_LABEL[id_] for id_ in cols_notas_existentes]
-                escolha_label = st.selectbox("Questão:", labels_disp)
-                col_edit = cols_notas_existentes[labels_disp.index(escolha_label)]
-
-                # Checkboxes exclusivos para nova nota
-                edit_labels = NOTA_LABELS
-                k_edit = "_edit"
-                nota_edit_key = f"nota_edit{k_edit}"
-                valor_atual = dados.get(col_edit, "N/A")
-                if nota_edit_key not in st.session_state or st.session_state[nota_edit_key] not in edit_labels:
-                    st.session_state[nota_edit_key] = valor_atual if valor_atual in edit_labels else "N/A"
-                sel_edit = st.session_state[nota_edit_key]
-                for lab in edit_labels:
-                    cb_key = f"cb_edit_{lab}{k_edit}"
-                    if cb_key not in st.session_state:
-                        st.session_state[cb_key] = (lab == sel_edit)
-                cols_e = st.columns(len(edit_labels))
-                for i, lab in enumerate(edit_labels):
-                    cb_key = f"cb_edit_{lab}{k_edit}"
-                    def _cb_edit_change(label_clicked=lab):
-                        cur = st.session_state.get(cb_key, False)
-                        if cur:
-                            st.session_state[nota_edit_key] = label_clicked
-                            for L in edit_labels:
-                                st.session_state[f"cb_edit_{L}{k_edit}"] = (L == label_clicked)
-                        else:
-                            current_sel = st.session_state.get(nota_edit_key, "N/A")
-                            for L in edit_labels:
-                                st.session_state[f"cb_edit_{L}{k_edit}"] = (L == current_sel)
-                    cols_e[i].checkbox(lab, value=st.session_state.get(cb_key, lab == sel_edit), key=cb_key, on_change=_cb_edit_change, help="Selecione apenas uma opção.")
+                st.subheader("2) Notas e Observações por Questão")
+                abas = st.tabs(SECOES)
+                for aba, secao in zip(abas, SECOES):
+                    with aba:
+                        for id_, titulo in QUESTOES_POR_SECAO[secao]:
+                            renderizar_pergunta(f"{ID_PARA_LABEL[id_]} — {titulo}", id_,
+                                                valor_padrao=dados.get(id_, "N/A"), obs_padrao=dados.get(f"Obs_{id_}", ""),
+                                                key_suffix=k_edit)
+                            novos[id_] = st.session_state[f"nota_{id_}{k_edit}"]
+                            novos[f"Obs_{id_}"] = st.session_state.get(f"obs_{id_}{k_edit}", "")
 
                 st.markdown("---")
                 editar_obs = st.checkbox("Editar observações abertas (opcional)")
                 if editar_obs:
                     st.subheader("3) Observações/Abertas")
-                    new_fortes = st.text_area("Pontos Fortes", value=dados.get("Autoavaliação: Pontos Fortes", ""))
-                    new_fracos = st.text_area("Pontos a Desenvolver", value=dados.get("Autoavaliação: Pontos a Desenvolver", ""))
-                    new_final  = st.text_area("Comentários Finais", value=dados.get("Observações Finais", ""))
-                else:
-                    new_fortes = dados.get("Autoavaliação: Pontos Fortes", "")
-                    new_fracos = dados.get("Autoavaliação: Pontos a Desenvolver", "")
-                    new_final  = dados.get("Observações Finais", "")
+                    for coluna, rotulo in ROTULOS_REFLEXAO.items():
+                        novos[coluna] = st.text_area(rotulo, value=dados.get(coluna, ""))
+
+                # Só o que mudou vai para o banco, em uma única gravação
+                padroes = {id_: "N/A" for id_ in ID_PARA_LABEL}
+                alteracoes = {k: v for k, v in novos.items() if str(dados.get(k, padroes.get(k, ""))) != str(v)}
 
                 st.markdown("---")
-                if st.button("💾 SALVAR ALTERAÇÕES"):
-                    df.at[idx, "Nome"] = new_nome
-                    df.at[idx, "Matricula"] = new_mat
-                    df.at[idx, "Semestre"] = new_sem
-                    df.at[idx, "Curriculo"] = new_curr
-                    df.at[idx, "Petiano_Responsavel"] = new_pet
-                    df.at[idx, col_edit] = st.session_state.get(nota_edit_key, "N/A")
-                    df.at[idx, "Autoavaliação: Pontos Fortes"] = new_fortes
-                    df.at[idx, "Autoavaliação: Pontos a Desenvolver"] = new_fracos
-                    df.at[idx, "Observações Finais"] = new_final
-                    escrever_csv_atomico(df, ARQUIVO_DB, encoding=CSV_ENCODING)
-                    st.success("Registro atualizado com sucesso!"); st.rerun()
+                st.download_button("📄 Relatório individual (HTML)",
+                                   lambda: gerar_html(dados, estatisticas_coorte(ARQUIVO_DB)).encode("utf-8"),
+                                   file_name=nome_arquivo(dados), mime="text/html", on_click="ignore")
+                st.caption(f"{len(alteracoes)} campo(s) alterado(s)." if alteracoes else "Nenhuma alteração pendente.")
+                if st.button("💾 SALVAR ALTERAÇÕES", disabled=not alteracoes):
+                    try:
+                        atualizar_registro(sel_id, alteracoes, ARQUIVO_DB, versao_esperada=st.session_state[versao_key], autor=editor)
+                    except ConflitoDeVersao:
+                        st.session_state.pop(versao_key, None)
+                        st.session_state["_aviso_edicao"] = "❌ Este registro foi alterado por outra pessoa enquanto você editava. Os dados foram recarregados; revise e salve novamente."
+                        st.rerun()
+                    else:
+                        st.session_state.pop(versao_key, None)
+                        st.success(f"Registro atualizado com sucesso! ({len(alteracoes)} campo(s))"); st.rerun()
+
+                # Histórico (log só de inclusão): o que mudou, quando, e volta a qualquer versão
+                with st.expander("🕓 Histórico deste registro"):
+                    eventos = historico_registro(sel_id, ARQUIVO_DB)
+                    momentos, fora_do_banco = {}, set()
+                    for ev in eventos:
+                        if ev["campo"] == INCLUSAO:
+                            texto = "inclusão"
+                        elif ev["campo"] == ARQUIVAMENTO:
+                            texto = f"arquivado com a campanha {ev['novo']}"
+                            fora_do_banco.add(ev["momento"])
+                        else:
+                            rotulo = ID_PARA_LABEL.get(ev["campo"]) or ev["campo"].replace("Obs_", "Obs. ").replace("_", " ")
+                            texto = f"{rotulo}: “{str(ev['antigo'] or '')[:60]}” → “{str(ev['novo'] or '')[:60]}”"
+                        momentos.setdefault((ev["momento"], ev["autor"] or "—"), []).append(texto)
+                    st.markdown("\n".join(f"- **{m}** · {autor} — {'; '.join(itens)}" for (m, autor), itens in momentos.items()))
+                    anteriores = [m for m, _ in list(momentos)[:-1] if m not in fora_do_banco]   # arquivado: não há versão a restaurar
+                    if anteriores:
+                        ch1, ch2 = st.columns([0.6, 0.4])
+                        momento_sel = ch1.selectbox("Voltar o registro para como estava em", anteriores[::-1], key="momento_historico")
+                        if ch2.button("RESTAURAR ESTA VERSÃO"):
+                            versao_antiga = registro_em(sel_id, momento_sel, ARQUIVO_DB)
+                            restaurar = {k: v for k, v in versao_antiga.items() if dados.get(k) != v}
+                            restaurar.update({k: padroes.get(k, "") for k in dados if k not in versao_antiga})
+                            try:
+                                atualizar_registro(sel_id, restaurar, ARQUIVO_DB, versao_esperada=st.session_state[versao_key], autor=editor)
+                            except ConflitoDeVersao:
+                                st.session_state["_aviso_edicao"] = "❌ Este registro foi alterado por outra pessoa enquanto você editava. Os dados foram recarregados; revise e restaure novamente."
+                            st.session_state.pop(versao_key, None)
+                            st.rerun()
+
+            # Correção em lote sobre todos os registros do filtro atual
+            with st.expander(f"🧰 Correção em lote ({total} registro(s) filtrado(s))"):
+                campos_lote = {"Semestre": LISTA_SEMESTRES, "Curriculo": LISTA_CURRICULOS, "Petiano_Responsavel": LISTA_PETIANOS}
+                cl1, cl2, cl3 = st.columns(3)
+                campo_lote = cl1.selectbox("Campo", list(campos_lote))
+                de_lote = cl2.selectbox("Trocar de", campos_lote[campo_lote], key="lote_de")
+                para_lote = cl3.selectbox("Para", campos_lote[campo_lote], key="lote_para")
+                if st.button("Aplicar nos registros filtrados", disabled=de_lote == para_lote):
+                    todos, _ = indice.buscar(termo, sem_sel, tamanho=total)
+                    n = atualizar_em_lote({rid: {campo_lote: para_lote} for rid, _, _ in todos}, ARQUIVO_DB,
+                                          condicao={campo_lote: de_lote}, autor=editor)
+                    st.success(f"{n} registro(s) corrigido(s) em uma única gravação.")
 
 # ==============================================================================
-# 10) PAINEL GERENCIAL (rótulos “Questão X” + ordem + hover texto completo)
+# 9) PAINEL GERENCIAL (rótulos “Questão X” + ordem + hover texto completo)
 # ==============================================================================
 elif modo_operacao == "📊 Painel Gerencial":
+    # dependências pesadas só neste modo (Nova Transcrição e Edição não carregam pandas nem plotly)
+    import pandas as pd
+    import plotly.express as px
+    from sac_core.analise import tabela_pagina
+
     st.markdown("### 📊 INDICADORES DE DESEMPENHO")
-    df = ler_csv_seguro(ARQUIVO_DB)
-    if df.empty:
+    # campanha arquivada: o Painel lê o arquivo dela (só leitura) no lugar do banco
+    banco_painel = ARQUIVO_DB
+    arquivadas = campanhas_arquivadas(ARQUIVO_DB)
+    if arquivadas:
+        campanha_sel = st.sidebar.selectbox("Campanha:", ["Em andamento"] + arquivadas[::-1], key="campanha_painel",
+                                            format_func=lambda c: c if c == "Em andamento" else f"{c} (arquivada)")
+        if campanha_sel != "Em andamento":
+            banco_painel = caminho_campanha(campanha_sel, ARQUIVO_DB)
+    sems_db = semestres_presentes(banco_painel)
+    filtro_sem = st.sidebar.selectbox("Filtrar por Semestre:", ["Todos"] + sems_db)
+    sem_sel = None if filtro_sem == "Todos" else filtro_sem
+
+    with st.expander("📥 Importar planilhas transcritas offline (XLSX/CSV)"):
+        st.caption("Cabeçalhos aceitos: ids das questões (ex.: q12) ou “Questão 12”, Nome, Matricula, Semestre, Curriculo, Petiano_Responsavel e os campos de reflexão. Cada linha passa pela mesma validação do botão de salvar.")
+        arquivos = st.file_uploader("Planilhas", type=["xlsx", "csv"], accept_multiple_files=True, key="upload_importacao")
+        if st.button("IMPORTAR", disabled=not arquivos, type="primary"):
+            resultados = []
+            # todas as rejeições vão para um CSV em disco; a tela mostra só as primeiras de cada arquivo
+            caminho_rel = os.path.join(tempfile.gettempdir(), f"sac_importacao_{uuid.uuid4().hex}.csv")
+            with open(caminho_rel, "w", newline="", encoding=CSV_ENCODING) as f_rel:
+                relatorio = escritor_relatorio(f_rel)
+                for arq in arquivos:
+                    with tempfile.TemporaryDirectory() as tmp:   # em disco: leitura em streaming e detecção de encoding
+                        destino = os.path.join(tmp, os.path.basename(arq.name))
+                        with open(destino, "wb") as f:
+                            f.write(arq.getbuffer())
+                        r = importar_planilha(destino, ARQUIVO_DB, relatorio=relatorio)
+                    resultados.append((arq.name, r))
+            anterior = st.session_state.get("_relatorio_importacao")
+            if anterior and os.path.exists(anterior):
+                os.remove(anterior)
+            st.session_state["_resultado_importacao"] = resultados
+            st.session_state["_relatorio_importacao"] = caminho_rel
+        resultados = st.session_state.get("_resultado_importacao", [])
+        for nome_arq, r in resultados:
+            st.write(f"**{nome_arq}**: {r['importados']} importado(s), {r['rejeitados']} rejeitado(s)")
+            if r["ignoradas"]:
+                st.caption(f"Colunas ignoradas: {', '.join(r['ignoradas'])}")
+            if r["rejeitados"] > len(r["erros"]):
+                st.caption(f"Mostrando as {len(r['erros'])} primeiras rejeições; todas estão no relatório.")
+        erros_imp = [(n, l, "; ".join(p)) for n, r in resultados for l, p in r["erros"]]
+        if erros_imp:
+            st.dataframe(pd.DataFrame(erros_imp, columns=CABECALHO_RELATORIO), use_container_width=True, height=240)
+        if erros_imp and os.path.exists(st.session_state["_relatorio_importacao"]):
+            st.download_button("📥 Baixar relatório de rejeições", Path(st.session_state["_relatorio_importacao"]).read_bytes,
+                               file_name="sac_importacao_rejeicoes.csv", mime="text/csv", on_click="ignore")
+
+    with st.expander("🧾 Relatórios individuais (HTML por discente)"):
+        st.caption("Um relatório por formulário do filtro de semestre atual, com as médias por seção comparadas às do semestre e da coorte.")
+        if st.button("GERAR RELATÓRIOS", type="primary"):
+            with tempfile.TemporaryDirectory() as tmp, st.spinner("Gerando relatórios..."):
+                r = gerar_relatorios(tmp, banco_painel, semestre=sem_sel)
+                buf = io.BytesIO()
+                with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+                    for nome in sorted(os.listdir(tmp)):
+                        z.write(os.path.join(tmp, nome), nome)
+            st.session_state["_relatorios_zip"] = (buf.getvalue(), r)
+        if "_relatorios_zip" in st.session_state:
+            zip_bytes, r = st.session_state["_relatorios_zip"]
+            st.caption(f"{r['gerados']} relatório(s) em {r['segundos']:.1f}s – {r['por_segundo']:.0f}/s com {r['processos']} processo(s).")
+            st.download_button("📥 Baixar relatórios (.zip)", zip_bytes, file_name="sac_relatorios.zip",
+                               mime="application/zip", on_click="ignore")
+
+    with st.expander("🧬 Possíveis transcrições duplicadas"):
+        st.caption("Agrupa o banco inteiro por matrícula+semestre e por conteúdo (notas e reflexões) numa só passada.")
+        if st.button("VERIFICAR DUPLICATAS"):
+            st.session_state["_relatorio_duplicatas"] = linhas_relatorio(relatorio_duplicatas(ARQUIVO_DB))
+        if "_relatorio_duplicatas" in st.session_state:
+            linhas_dup = st.session_state["_relatorio_duplicatas"]
+            if not linhas_dup:
+                st.success("Nenhuma duplicata encontrada.")
+            else:
+                df_dup = pd.DataFrame(linhas_dup)
+                st.caption(f"{df_dup['Grupo'].nunique()} grupo(s), {len(df_dup)} registro(s).")
+                st.dataframe(df_dup, use_container_width=True, height=300, hide_index=True)
+                st.download_button("📥 Baixar relatório de duplicatas", df_dup.to_csv(index=False).encode(CSV_ENCODING),
+                                   file_name="sac_duplicatas.csv", mime="text/csv", on_click="ignore")
+
+    with st.expander("📈 Progressão por discente (avaliações em mais de um semestre)"):
+        # índice por matrícula normalizada: só as linhas do discente são lidas
+        cp1, cp2 = st.columns([0.4, 0.6])
+        curr_prog = cp1.selectbox("Currículo", ["Todos"] + LISTA_CURRICULOS, key="curriculo_progressao")
+        acompanhados = discentes_acompanhados(ARQUIVO_DB, None if curr_prog == "Todos" else curr_prog)
+        opcoes_prog = {f"{nome} ({discente}) – {n} avaliações": discente for discente, nome, n in acompanhados[:1000]}
+        escolha_prog = cp2.selectbox(f"Discente ({len(acompanhados)} com duas ou mais avaliações)", [""] + list(opcoes_prog),
+                                     key="discente_progressao")
+        mat_prog = st.text_input("…ou digite a matrícula", key="matricula_progressao").strip() or opcoes_prog.get(escolha_prog, "")
+        if mat_prog:
+            prog = progressao(mat_prog, ARQUIVO_DB)
+            if not prog["avaliacoes"]:
+                st.info("Nenhuma avaliação para esta matrícula.")
+            else:
+                df_av = pd.DataFrame(prog["avaliacoes"])
+                st.markdown(f"**{prog['nome']}** – {len(df_av)} avaliação(ões)")
+                st.dataframe(df_av.round(2), use_container_width=True, hide_index=True)
+                if prog["variacoes"]:
+                    st.caption("Variação da média por seção entre avaliações seguidas")
+                    st.dataframe(pd.DataFrame(prog["variacoes"]).round(2), use_container_width=True, hide_index=True)
+                    df_linhas = df_av.assign(Avaliação=df_av["Semestre"] + " · " + df_av["Data_Registro"].str[:10]).melt(
+                        id_vars="Avaliação", value_vars=SECOES, var_name="Seção", value_name="Média")
+                    fig_prog = px.line(df_linhas, x="Avaliação", y="Média", color="Seção", markers=True, range_y=[0, 5.2])
+                    fig_prog.update_layout(height=380, margin=dict(l=0, r=0, t=10, b=0))
+                    st.plotly_chart(fig_prog, use_container_width=True)
+
+    with st.expander("🗄️ Campanhas (arquivar períodos encerrados)"):
+        st.caption("Campanha = período da coleta pela data do registro (AAAA.1: jan–jun; AAAA.2: jul–dez). "
+                   "Arquivar tira os registros do banco para um arquivo comprimido e só de leitura, que continua "
+                   "disponível no Painel (barra lateral) e na progressão por discente; reabrir devolve ao banco para edição.")
+        lista_camp = campanhas(ARQUIVO_DB)
+        st.dataframe([{"Campanha": c or "sem data", "Registros": n, "Situação": "arquivada" if arq else "no banco"}
+                      for c, n, arq in lista_camp], use_container_width=True, hide_index=True)
+        encerradas = [c for c, _, arq in lista_camp if not arq and c and c != campanha_atual()]
+        ca1, ca2 = st.columns(2)
+        camp_arq = ca1.selectbox("Campanha encerrada", encerradas, key="campanha_arquivar")
+        # a lista pode ter mudado em outra sessão (campanha virou a atual, já reaberta…): erro vira aviso, não traceback
+        if ca1.button("ARQUIVAR", disabled=not encerradas):
+            try:
+                with st.spinner("Arquivando..."):
+                    n = arquivar_campanha(camp_arq, ARQUIVO_DB)
+            except ValueError as e:
+                st.session_state["_aviso_campanhas"] = ("error", f"❌ {e}")
+            else:
+                st.session_state["_aviso_campanhas"] = ("success", f"{n} registro(s) de {camp_arq} arquivado(s).")
+            st.rerun()
+        camp_reab = ca2.selectbox("Campanha arquivada", arquivadas, key="campanha_reabrir")
+        if ca2.button("REABRIR", disabled=not arquivadas):
+            if st.session_state.get("campanha_painel") == camp_reab:
+                st.session_state.pop("campanha_painel")
+            try:
+                n = reabrir_campanha(camp_reab, ARQUIVO_DB)
+            except LookupError as e:
+                st.session_state["_aviso_campanhas"] = ("error", f"❌ {e}")
+            else:
+                st.session_state["_aviso_campanhas"] = ("success", f"{n} registro(s) de {camp_reab} de volta ao banco.")
+            st.rerun()
+        if "_aviso_campanhas" in st.session_state:
+            tipo, texto = st.session_state.pop("_aviso_campanhas")
+            getattr(st, tipo)(texto)
+
+    # resumo, médias e figura prontos por (versão do banco, semestre), compartilhados entre sessões e
+    # remontados em segundo plano depois das gravações (ver sac_core.painel)
+    retrato = retrato_painel(banco_painel, sem_sel)
+    resumo = retrato["resumo"]
+    if not resumo["formularios"]:
         st.info("Nenhum dado.")
     else:
-        sems_db = sorted(list(df['Semestre'].dropna().unique())) if 'Semestre' in df.columns else []
-        filtro_sem = st.sidebar.selectbox("Filtrar por Semestre:", ["Todos"] + sems_db)
-        if filtro_sem != "Todos": df = df[df['Semestre'] == filtro_sem]
-
-        df_nums, mapa = dataframe_ordenado_para_visual(df)  # respostas em ordem com “Questão X”
         st.markdown("#### 📍 Resumo")
         c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Formulários", len(df))
-        if not df_nums.empty:
-            todos_valores = df_nums.stack()
-            media = todos_valores.mean()
-            desvio = todos_valores.std()
-            c2.metric("Média Geral (Válidas)", f"{media:.2f}/5.0")
-            c3.metric("Desvio Padrão", f"{desvio:.2f}")
-            if 'Data_Registro' in df.columns:
-                try:
-                    last = pd.to_datetime(df['Data_Registro'], errors='coerce').max()
-                    c4.metric("Última Atividade", last.strftime("%d/%m %H:%M") if pd.notna(last) else "-")
-                except Exception:
-                    c4.metric("Última Atividade", "-")
+        c1.metric("Formulários", resumo["formularios"])
+        if resumo["medias_por_questao"]:
+            media, desvio = resumo["media"], resumo["desvio"]
+            c2.metric("Média Geral (Válidas)", f"{media:.2f}/5.0" if pd.notna(media) else "-")
+            c3.metric("Desvio Padrão", f"{desvio:.2f}" if pd.notna(desvio) else "-")
+            last = pd.to_datetime(resumo["ultima_atividade"], errors='coerce')
+            c4.metric("Última Atividade", last.strftime("%d/%m %H:%M") if pd.notna(last) else "-")
         st.markdown("---")
 
         st.markdown("#### 📈 Média por Questão (ordem)")
-        if not df_nums.empty:
-            medias = df_nums.mean().reset_index()
-            medias.columns = ["Questão", "Média"]
-            desc_map = {q: desc for q, desc in mapa}
-            medias["Descrição Completa"] = medias["Questão"].map(desc_map)
-            fig = px.bar(
-                medias,
-                x="Média", y="Questão",
-                orientation="h",
-                text="Média",
-                hover_data={"Questão": True, "Média": True, "Descrição Completa": True},
-                labels={"Média": "Média (0–5)", "Questão": ""},
-                color="Média",
-                color_continuous_scale=[(0, '#cfd8dc'), (0.5, '#dba800'), (1, '#002060')]
-            )
-            fig.update_layout(
-                height=max(420, len(medias) * 26),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                coloraxis_showscale=False
-            )
-            fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
-            st.plotly_chart(fig, use_container_width=True)
+        if retrato["figura"] is not None:
+            perfil.etapa("painel:grafico_plotly")
+            st.plotly_chart(retrato["figura"], use_container_width=True)
+            perfil.etapa(f"modo:{modo_operacao}")
         else:
             st.info("Sem colunas de nota numéricas para calcular médias.")
 
+        st.markdown("---")
+        st.markdown("#### 🔬 Análise da coorte")
+        perfil.etapa("painel:analise_coorte")
+        filtro_curr = st.selectbox("Currículo:", ["Todos"] + LISTA_CURRICULOS, key="filtro_curriculo_analise")
+        analise = analise_coorte(banco_painel, sem_sel, None if filtro_curr == "Todos" else filtro_curr)   # em cache por versão e filtro
+        if not analise["formularios"]:
+            st.info("Nenhum formulário para este filtro.")
+        else:
+            ab_dist, ab_sec, ab_cruz, ab_transc = st.tabs(["Distribuições", "Seções", "Semestre × Currículo", "Transcritores"])
+            with ab_dist:
+                st.caption("Contagem de cada nota por questão; % N/A sobre os formulários do filtro.")
+                st.dataframe(analise["distribuicoes"], use_container_width=True, height=420,
+                             column_config={"% N/A": st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100),
+                                            "Média": st.column_config.NumberColumn(format="%.2f"),
+                                            "Desvio": st.column_config.NumberColumn(format="%.2f")})
+            with ab_sec:
+                st.caption("Composto da seção: média das notas válidas de cada formulário na seção.")
+                st.dataframe(analise["secoes"].style.format({"Média": "{:.2f}", "Desvio": "{:.2f}", "Mediana": "{:.2f}"}),
+                             use_container_width=True, hide_index=True)
+            with ab_cruz:
+                st.caption("Formulários")
+                st.dataframe(analise["cruzada_formularios"], use_container_width=True)
+                st.caption("Nota média dos formulários")
+                st.dataframe(analise["cruzada_medias"].style.format("{:.2f}", na_rep="–"), use_container_width=True)
+            with ab_transc:
+                st.dataframe(analise["transcritores"], use_container_width=True, hide_index=True,
+                             column_config={"Formulários/dia ativo": st.column_config.NumberColumn(format="%.1f"),
+                                            "Primeiro registro": st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm"),
+                                            "Último registro": st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm")})
+        perfil.etapa(f"modo:{modo_operacao}")
+
         st.markdown("---")
         st.markdown("#### 📋 Tabela (respostas em ordem)")
-        if not df_nums.empty:
-            id_cols = ["Registro_ID","Nome","Matricula","Semestre","Curriculo","Petiano_Responsavel","Data_Registro"]
-            id_cols_presentes = [c for c in id_cols if c in df.columns]
-            df_view = pd.concat([df[id_cols_presentes], df_nums], axis=1)
-            colA, colB = st.columns(2)
-            nome_q = colA.text_input("Filtrar por Nome (contém):", "")
-            mat_q  = colB.text_input("Filtrar por Matrícula (contém):", "")
-            if nome_q: df_view = df_view[df_view['Nome'].str.contains(nome_q, case=False, na=False)]
-            if mat_q:  df_view = df_view[df_view['Matricula'].str.contains(mat_q, case=False, na=False)]
-            st.dataframe(df_view, use_container_width=True, height=520)
-            csv_bytes = df_view.to_csv(index=False, encoding=CSV_ENCODING).encode(CSV_ENCODING)
-            st.download_button("📥 Baixar CSV (visualização)", csv_bytes, file_name=f"sac_visual_{datetime.now().strftime('%Y%m%d')}.csv", mime="text/csv")
+        colA, colB = st.columns(2)
+        nome_q = colA.text_input("Filtrar por Nome (contém):", "")
+        mat_q  = colB.text_input("Filtrar por Matrícula (contém):", "")
+        colO, colS, colT = st.columns([0.4, 0.3, 0.3])
+        ordenar_por = colO.selectbox("Ordenar por", list(ORDENACOES), key="ordem_tabela",
+                                     format_func=lambda c: {"Registro_ID": "Ordem de registro", "Matricula": "Matrícula", "Data_Registro": "Data do registro"}.get(c, c))
+        decrescente = colS.radio("Sentido", ["Crescente", "Decrescente"], horizontal=True, key="sentido_tabela") == "Decrescente"
+        por_pagina = colT.selectbox("Linhas por página", [50, 100, 250, 500], index=1)
+        # filtro, ordenação e recorte no SQLite: só a página visível é lida, tipada e enviada ao navegador
+        filtros = dict(semestre=sem_sel, nome=nome_q, matricula=mat_q, ordenar_por=ordenar_por, decrescente=decrescente)
+        if st.session_state.get("_filtros_tabela") != (filtros, por_pagina):   # filtro novo: volta à 1ª página
+            st.session_state["_filtros_tabela"] = (filtros, por_pagina)
+            st.session_state["pagina_tabela"] = 1
+        pag = st.session_state.get("pagina_tabela", 1)
+        registros_pag, total_tab = pagina_registros(banco_painel, pagina=pag - 1, tamanho=por_pagina, **filtros)
+        n_pags = max(1, -(-total_tab // por_pagina))
+        if pag > n_pags:   # o banco encolheu desde o último rerun
+            pag = st.session_state["pagina_tabela"] = n_pags
+            registros_pag, total_tab = pagina_registros(banco_painel, pagina=pag - 1, tamanho=por_pagina, **filtros)
+        df_view = tabela_pagina(registros_pag)
+        if not df_view.empty or nome_q or mat_q:
+            perfil.contar("linhas_tabela", len(df_view), somar=False)
+            st.caption(f"{total_tab} registro(s) • linhas {(pag - 1) * por_pagina + 1 if total_tab else 0}–{min(pag * por_pagina, total_tab)}")
+            with perfil.trecho("painel:tabela"):
+                st.dataframe(df_view, use_container_width=True, height=min(520, 38 + 35 * max(len(df_view), 1)), hide_index=True)
+            if n_pags > 1:
+                st.number_input(f"Página (de {n_pags})", min_value=1, max_value=n_pags, step=1, key="pagina_tabela")
+            # downloads gerados só no clique (callable), sem rerun; o CSV da visualização leva todas as páginas
+            st.download_button("📥 Baixar CSV (visualização)",
+                               lambda: tabela_pagina(pagina_registros(banco_painel, **filtros)[0])
+                               .to_csv(index=False).encode(CSV_ENCODING),
+                               file_name=f"sac_visual_{datetime.now().strftime('%Y%m%d')}.csv", mime="text/csv", on_click="ignore")
+            if banco_painel == ARQUIVO_DB:   # banco completo: o das campanhas em andamento (arquivadas: tabela acima)
+                colF, colD = st.columns([0.3, 0.7])
+                formato = colF.selectbox("Formato", formatos_disponiveis(), label_visibility="collapsed",
+                                         format_func=lambda f: {"csv": "CSV (Excel)", "xlsx": "XLSX formatado", "parquet": "Parquet", "feather": "Feather"}[f])
+                ext, mime = FORMATOS[formato]
+                colD.download_button("📥 Baixar banco completo", lambda: ler_exportacao(formato),
+                                     file_name=f"sac_completo_{datetime.now().strftime('%Y%m%d')}.{ext}", mime=mime, on_click="ignore")
         else:
             st.info("Sem dados numéricos para a tabela de respostas.")
+
+# ==============================================================================
+# 10) PERFIL DOS RERUNS (admin)
+# ==============================================================================
+if st.session_state.get("perfil_ativo") or perfil.ATIVO_POR_AMBIENTE:
+    perfil.etapa("painel_perfil")
+    with st.expander("⏱️ Perfil dos reruns (janela recente deste processo)"):
+        linhas_perfil = perfil.resumo()
+        if linhas_perfil:
+            st.dataframe(linhas_perfil, use_container_width=True, hide_index=True)
+            ultimo = perfil.reruns_recentes(1)[0]
+            st.caption(f"Último rerun ({ultimo.get('modo', '')}): {ultimo['total_ms']:.0f} ms · contadores: {ultimo['contadores']}")
+        else:
+            st.caption("Nenhum rerun medido ainda.")
+        cA, cB = st.columns(2)
+        cA.download_button("📥 Baixar janela (JSONL)",
+                           "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in perfil.reruns_recentes()).encode("utf-8"),
+                           file_name="perfil_sac.jsonl", mime="application/jsonl")
+        if cB.button("Limpar janela"):
+            perfil.limpar()
+perfil.finalizar_rerun(chaves_session_state=len(st.session_state))
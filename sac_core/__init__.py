@@ -0,0 +1,9 @@
+"""Núcleo de dados do S.A.C. – importável sem Streamlit.
+
+esquema (questionário), armazenamento (banco), registro (montagem/validação),
+analise (tabelas do Painel), painel (retratos do Painel), analitica
+(indicadores de coorte), agregados, busca, duplicatas, historico, fila
+(gravação em segundo plano), migracoes, progressao (discente entre semestres),
+campanhas (arquivamento dos períodos encerrados), importacao, exportacao,
+relatorios, rascunhos e perfil; o ``sac.py`` é só a tela sobre estes módulos.
+"""
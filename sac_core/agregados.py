@@ -0,0 +1,190 @@
+"""Agregados incrementais para o Painel Gerencial.
+
+Para cada (questão, semestre, currículo) guardamos contagem, soma, soma dos
+quadrados, nº de N/A e o histograma 0..5; por (semestre, currículo), o nº de
+formulários. ``aplicar`` roda dentro da mesma transação que grava o registro
+(subtrai a contribuição antiga, soma a nova), então as métricas do Painel saem
+em O(questões), qualquer que seja o tamanho do banco.
+
+Conferência contra um recálculo completo:
+    python -m sac_core.agregados --verificar
+    python -m sac_core.agregados --reconstruir
+"""
+import json
+import math
+import sqlite3
+from collections import defaultdict
+
+from sac_core.esquema import ID_PARA_LABEL, NOTA_LABELS, ORDEM_QUESTOES
+
+ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS agregados (
+    questao   TEXT NOT NULL,
+    semestre  TEXT NOT NULL,
+    curriculo TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0, soma INTEGER NOT NULL DEFAULT 0, soma_quad INTEGER NOT NULL DEFAULT 0,
+    n_na INTEGER NOT NULL DEFAULT 0,
+    h0 INTEGER NOT NULL DEFAULT 0, h1 INTEGER NOT NULL DEFAULT 0, h2 INTEGER NOT NULL DEFAULT 0,
+    h3 INTEGER NOT NULL DEFAULT 0, h4 INTEGER NOT NULL DEFAULT 0, h5 INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (questao, semestre, curriculo)
+);
+CREATE TABLE IF NOT EXISTS agregados_formularios (
+    semestre    TEXT NOT NULL,
+    curriculo   TEXT NOT NULL,
+    formularios INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (semestre, curriculo)
+);
+"""
+
+_CAMPOS = ["n", "soma", "soma_quad", "n_na", "h0", "h1", "h2", "h3", "h4", "h5"]
+_NOTAS = {lab: int(lab) for lab in NOTA_LABELS[1:]}
+
+def _contribuicao(dados: dict):
+    """(questão, semestre, currículo) -> vetor na ordem de ``_CAMPOS``; mais a chave do formulário."""
+    sem, curr = dados.get("Semestre") or "", dados.get("Curriculo") or ""
+    vetores = {}
+    for q, valor in dados.items():
+        if q not in ID_PARA_LABEL:
+            continue
+        v = [0] * len(_CAMPOS)
+        nota = _NOTAS.get(str(valor))
+        if nota is None:
+            v[3] = 1
+        else:
+            v[0], v[1], v[2], v[4 + nota] = 1, nota, nota * nota, 1
+        vetores[(q, sem, curr)] = v
+    return vetores, (sem, curr)
+
+def aplicar(con: sqlite3.Connection, antigo: dict = None, novo: dict = None):
+    """Troca a contribuição de ``antigo`` pela de ``novo`` (qualquer um pode ser None)."""
+    _gravar_delta(con, ((antigo, -1), (novo, 1)))
+
+def aplicar_inclusoes(con: sqlite3.Connection, registros):
+    """Soma vários registros novos de uma vez: um único UPSERT por chave em inserções em lote."""
+    _gravar_delta(con, ((dados, 1) for dados in registros))
+
+def aplicar_exclusoes(con: sqlite3.Connection, registros):
+    """Tira a contribuição de vários registros que saem do banco (campanha arquivada)."""
+    _gravar_delta(con, ((dados, -1) for dados in registros))
+
+def _gravar_delta(con: sqlite3.Connection, pares):
+    delta = defaultdict(lambda: [0] * len(_CAMPOS))
+    forms = defaultdict(int)
+    for dados, sinal in pares:
+        if dados is None:
+            continue
+        vetores, chave_form = _contribuicao(dados)
+        forms[chave_form] += sinal
+        for chave, v in vetores.items():
+            acc = delta[chave]
+            for i, x in enumerate(v):
+                acc[i] += sinal * x
+    linhas = [(*chave, *v) for chave, v in delta.items() if any(v)]
+    if linhas:
+        con.executemany(
+            f"INSERT INTO agregados (questao, semestre, curriculo, {', '.join(_CAMPOS)}) VALUES ({', '.join('?' * (3 + len(_CAMPOS)))}) "
+            f"ON CONFLICT(questao, semestre, curriculo) DO UPDATE SET {', '.join(f'{c} = {c} + excluded.{c}' for c in _CAMPOS)}",
+            linhas,
+        )
+    linhas = [(*chave, d) for chave, d in forms.items() if d]
+    if linhas:
+        con.executemany(
+            "INSERT INTO agregados_formularios (semestre, curriculo, formularios) VALUES (?, ?, ?) "
+            "ON CONFLICT(semestre, curriculo) DO UPDATE SET formularios = formularios + excluded.formularios",
+            linhas,
+        )
+
+# ==============================================================================
+# LEITURA
+# ==============================================================================
+def _filtro(semestre):
+    return ("WHERE semestre = ?", (semestre,)) if semestre is not None else ("", ())
+
+def resumo(con: sqlite3.Connection, semestre: str = None) -> dict:
+    """Métricas do Painel: formulários, média/desvio das notas válidas, médias por questão e última atividade."""
+    where, params = _filtro(semestre)
+    formularios = con.execute(f"SELECT COALESCE(SUM(formularios), 0) FROM agregados_formularios {where}", params).fetchone()[0]
+    por_questao = {q: (n, soma, n_na) for q, n, soma, n_na in con.execute(
+        f"SELECT questao, SUM(n), SUM(soma), SUM(n_na) FROM agregados {where} GROUP BY questao", params)}
+    n, soma, soma_quad = con.execute(
+        f"SELECT COALESCE(SUM(n), 0), COALESCE(SUM(soma), 0), COALESCE(SUM(soma_quad), 0) FROM agregados {where}", params).fetchone()
+    ultima = con.execute(f"SELECT MAX(data_registro) FROM registros {where}", params).fetchone()[0]
+    medias = []   # [(id_questao, média, nº de notas válidas)] na ordem do questionário
+    for q, _ in ORDEM_QUESTOES:
+        k, s, n_na = por_questao.get(q, (0, 0, 0))
+        if k or n_na:
+            medias.append((q, s / k if k else math.nan, k))
+    return {
+        "formularios": formularios,
+        "media": soma / n if n else math.nan,
+        "desvio": math.sqrt(max(soma_quad - soma * soma / n, 0) / (n - 1)) if n > 1 else math.nan,
+        "medias_por_questao": medias,
+        "ultima_atividade": ultima,
+    }
+
+def semestres(con: sqlite3.Connection) -> list:
+    """Semestres com pelo menos um formulário."""
+    return [s for (s,) in con.execute(
+        "SELECT semestre FROM agregados_formularios WHERE semestre != '' GROUP BY semestre HAVING SUM(formularios) > 0 ORDER BY semestre")]
+
+def somas_por_semestre(con: sqlite3.Connection) -> dict:
+    """(id_questao, semestre) -> (nº de notas válidas, soma): base das médias de coorte e de semestre."""
+    return {(q, s): (n, soma) for q, s, n, soma in con.execute(
+        "SELECT questao, semestre, SUM(n), SUM(soma) FROM agregados GROUP BY questao, semestre")}
+
+# ==============================================================================
+# RECONSTRUÇÃO / CONFERÊNCIA
+# ==============================================================================
+def _recalcular(con: sqlite3.Connection):
+    agg = defaultdict(lambda: [0] * len(_CAMPOS))
+    forms = defaultdict(int)
+    for (d,) in con.execute("SELECT dados FROM registros"):
+        vetores, chave_form = _contribuicao(json.loads(d))
+        forms[chave_form] += 1
+        for chave, v in vetores.items():
+            acc = agg[chave]
+            for i, x in enumerate(v):
+                acc[i] += x
+    return agg, forms
+
+def reconstruir(con: sqlite3.Connection):
+    """Refaz as tabelas do zero (chamar dentro de uma transação)."""
+    agg, forms = _recalcular(con)
+    con.execute("DELETE FROM agregados")
+    con.execute("DELETE FROM agregados_formularios")
+    con.executemany(f"INSERT INTO agregados (questao, semestre, curriculo, {', '.join(_CAMPOS)}) VALUES ({', '.join('?' * (3 + len(_CAMPOS)))})",
+                    [(*k, *v) for k, v in agg.items()])
+    con.executemany("INSERT INTO agregados_formularios (semestre, curriculo, formularios) VALUES (?, ?, ?)",
+                    [(*k, f) for k, f in forms.items()])
+
+def verificar(con: sqlite3.Connection) -> list:
+    """Diferenças entre as tabelas e um recálculo completo (lista vazia = tudo certo)."""
+    agg, forms = _recalcular(con)
+    salvos = {tuple(r[:3]): list(r[3:]) for r in con.execute(f"SELECT questao, semestre, curriculo, {', '.join(_CAMPOS)} FROM agregados")}
+    salvos_forms = dict(((s, c), f) for s, c, f in con.execute("SELECT semestre, curriculo, formularios FROM agregados_formularios"))
+    zero = [0] * len(_CAMPOS)
+    difs = [f"{k}: salvo={salvos.get(k, zero)} recalculado={agg.get(k, zero)}"
+            for k in set(agg) | set(salvos) if salvos.get(k, zero) != agg.get(k, zero)]
+    difs += [f"formulários {k}: salvo={salvos_forms.get(k, 0)} recalculado={forms.get(k, 0)}"
+             for k in set(forms) | set(salvos_forms) if salvos_forms.get(k, 0) != forms.get(k, 0)]
+    return sorted(difs)
+
+def main():
+    import argparse
+    from sac_core.armazenamento import ARQUIVO_DB, conectar, reconstruir_agregados
+    ap = argparse.ArgumentParser(description="Confere ou reconstrói os agregados do Painel.")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--reconstruir", action="store_true", help="refaz as tabelas a partir dos registros")
+    ap.add_argument("--verificar", action="store_true", help="compara com um recálculo completo (padrão)")
+    args = ap.parse_args()
+    if args.reconstruir:
+        reconstruir_agregados(args.banco)
+        print("Agregados reconstruídos.")
+    difs = verificar(conectar(args.banco))
+    for d in difs:
+        print(d)
+    print("✅ Agregados conferem." if not difs else f"❌ {len(difs)} diferença(s).")
+    raise SystemExit(1 if difs else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Tabelas e séries do Painel Gerencial, sem Streamlit.
+
+Recebem o DataFrame do banco (texto ou tipado) ou o resumo dos agregados e
+devolvem DataFrames prontos para exibir, com as questões em ordem e rotuladas
+como “Questão X”.
+"""
+import pandas as pd
+
+from sac_core.esquema import ID_PARA_LABEL, ID_PARA_TEXTO, NOTA_LABELS, ORDEM_QUESTOES
+
+_NOTAS = {lab: int(lab) for lab in NOTA_LABELS[1:]}
+
+COLUNAS_IDENTIFICACAO = ["Registro_ID", "Nome", "Matricula", "Semestre", "Curriculo", "Petiano_Responsavel", "Data_Registro"]
+
+def dataframe_ordenado_para_visual(df: pd.DataFrame):
+    """Retorna df numérico com colunas renomeadas para “Questão X” e em ordem natural + mapa (Questão X → texto completo)."""
+    ids_presentes = [id_ for id_, _ in ORDEM_QUESTOES if id_ in df.columns]
+    if not ids_presentes:
+        return pd.DataFrame(), []
+    df_nums = df[ids_presentes]
+    if not all(pd.api.types.is_numeric_dtype(t) for t in df_nums.dtypes):  # frame todo-texto (já tipado: só renomeia)
+        df_nums = df_nums.apply(pd.to_numeric, errors='coerce')
+    else:
+        df_nums = df_nums.copy()
+    labels_ordem = [ID_PARA_LABEL[id_] for id_ in ids_presentes]
+    textos_ordem = [ID_PARA_TEXTO[id_] for id_ in ids_presentes]
+    df_nums.columns = labels_ordem
+    mapa = list(zip(labels_ordem, textos_ordem))
+    return df_nums, mapa
+
+def tabela_respostas(df: pd.DataFrame, nome: str = "", matricula: str = "") -> pd.DataFrame:
+    """Identificação + respostas em ordem, com os filtros “contém” da tela (vazio se não há notas)."""
+    df_nums, _ = dataframe_ordenado_para_visual(df)
+    if df_nums.empty:
+        return df_nums
+    ids = [c for c in COLUNAS_IDENTIFICACAO if c in df.columns]
+    df_view = pd.concat([df[ids], df_nums], axis=1)
+    if nome:
+        df_view = df_view[df_view["Nome"].str.contains(nome, case=False, na=False, regex=False)]
+    if matricula:
+        df_view = df_view[df_view["Matricula"].str.contains(matricula, case=False, na=False, regex=False)]
+    return df_view
+
+def tabela_pagina(registros: list) -> pd.DataFrame:
+    """Mesmo formato de ``tabela_respostas`` direto dos dicts de uma página (sem tipar o frame inteiro)."""
+    if not registros:
+        return pd.DataFrame()
+    colunas = {c: [r.get(c) for r in registros] for c in COLUNAS_IDENTIFICACAO}
+    for id_, _ in ORDEM_QUESTOES:
+        colunas[ID_PARA_LABEL[id_]] = pd.array([_NOTAS.get(r.get(id_)) for r in registros], dtype="Int8")
+    return pd.DataFrame(colunas)
+
+def medias_por_questao(resumo: dict) -> pd.DataFrame:
+    """Série do gráfico de médias a partir de ``agregados.resumo``."""
+    return pd.DataFrame(
+        [(ID_PARA_LABEL[q], m, ID_PARA_TEXTO[q]) for q, m, _ in resumo["medias_por_questao"]],
+        columns=["Questão", "Média", "Descrição Completa"],
+    )
@@ -0,0 +1,173 @@
+"""Indicadores de coorte para o Painel: distribuições, seções, cruzamentos e transcritores.
+
+Tudo sai de uma passada vetorizada sobre a matriz de notas do frame tipado
+(``int8``, N/A = -1): histogramas por ``bincount`` sobre (questão, nota),
+compostos de seção por ``add.reduceat`` nas colunas agrupadas por seção e os
+cruzamentos Semestre × Currículo e por transcritor por ``bincount`` sobre os
+códigos das categorias – nenhum ``groupby`` repetido. Em cache por versão do
+banco e filtro: ver ``armazenamento.analise_coorte``.
+"""
+import numpy as np
+import pandas as pd
+
+from sac_core.esquema import ID_PARA_LABEL, ID_PARA_TEXTO, LISTA_CURRICULOS, LISTA_SEMESTRES, NOTA_LABELS, QUESTOES_POR_SECAO, SECOES
+
+BLOCO_LINHAS = 16_384   # limita o vetor temporário do histograma (linhas × questões em int64)
+SEM_VALOR = "(vazio)"
+
+# ==============================================================================
+# MATRIZ DE NOTAS
+# ==============================================================================
+def _colunas_por_secao(df: pd.DataFrame):
+    """Questões presentes, agrupadas por seção, e o início de cada seção não vazia."""
+    colunas, inicios, secoes = [], [], []
+    for sec in SECOES:
+        ids = [q for q, _ in QUESTOES_POR_SECAO[sec] if q in df.columns]
+        if ids:
+            inicios.append(len(colunas))
+            secoes.append(sec)
+            colunas += ids
+    return colunas, np.array(inicios, dtype=np.intp), secoes
+
+def matriz_notas(df: pd.DataFrame, colunas: list) -> np.ndarray:
+    """Linhas × questões em ``int8``; N/A e inválidos viram -1."""
+    m = np.empty((len(df), len(colunas)), dtype=np.int8)
+    for j, c in enumerate(colunas):
+        serie = df[c]
+        if not pd.api.types.is_integer_dtype(serie.dtype):   # frame todo-texto
+            serie = pd.to_numeric(serie, errors="coerce").where(lambda s: s.isin(range(6))).astype("Int8")
+        m[:, j] = serie.to_numpy(dtype=np.int8, na_value=-1)
+    return m
+
+def _codigos(serie: pd.Series, ordem: list):
+    """Códigos na ordem de ``ordem`` (valores de fora no fim, vazio por último) e os rótulos."""
+    if not isinstance(serie.dtype, pd.CategoricalDtype):   # frame todo-texto
+        serie = serie.astype("category")
+    cat = serie.cat
+    usados = np.bincount(cat.codes.to_numpy() + 1, minlength=len(cat.categories) + 1)
+    presentes = {str(v) for v, n in zip(cat.categories, usados[1:]) if n}
+    vazio = bool(usados[0]) or "" in presentes
+    presentes.discard("")
+    rotulos = [v for v in ordem if v in presentes] + sorted(presentes - set(ordem))
+    posicao = {v: i for i, v in enumerate(rotulos)}
+    # código antigo -> novo (NaN, índice -1 aqui, e "" vão para a última posição)
+    mapa = np.array([posicao.get(str(v), len(rotulos)) for v in cat.categories] + [len(rotulos)], dtype=np.intp)
+    codigos = mapa[cat.codes.to_numpy().astype(np.intp)]
+    return codigos, rotulos + [SEM_VALOR] * vazio
+
+def _media(soma, n):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, soma / np.maximum(n, 1), np.nan)
+
+# ==============================================================================
+# CÁLCULO
+# ==============================================================================
+def calcular(df: pd.DataFrame, curriculo: str = None) -> dict:
+    """Indicadores do frame (tipado ou texto), opcionalmente só de um currículo.
+
+    Devolve ``{"formularios", "distribuicoes", "secoes", "cruzada_formularios",
+    "cruzada_medias", "transcritores"}`` (os quatro últimos são DataFrames).
+    """
+    if curriculo is not None and "Curriculo" in df.columns:
+        df = df[(df["Curriculo"] == curriculo).to_numpy(dtype=bool, na_value=False)]
+    colunas, inicios, secoes = _colunas_por_secao(df)
+    n_linhas = len(df)
+    if not n_linhas or not colunas:
+        return {"formularios": n_linhas, "distribuicoes": pd.DataFrame(), "secoes": pd.DataFrame(),
+                "cruzada_formularios": pd.DataFrame(), "cruzada_medias": pd.DataFrame(), "transcritores": pd.DataFrame()}
+    m = matriz_notas(df, colunas)
+    n_q, n_cat = len(colunas), len(NOTA_LABELS)
+
+    # histogramas: (questão, nota+1) achatado num único bincount por bloco de linhas
+    deslocamento = np.arange(n_q, dtype=np.intp) * n_cat
+    hist = np.zeros(n_q * n_cat, dtype=np.int64)
+    for i in range(0, n_linhas, BLOCO_LINHAS):
+        bloco = m[i:i + BLOCO_LINHAS]
+        hist += np.bincount((bloco.astype(np.intp) + 1 + deslocamento).ravel(), minlength=n_q * n_cat)
+    hist = hist.reshape(n_q, n_cat)
+    notas = np.arange(6)
+    validas = hist[:, 1:].sum(axis=1)
+    soma_q = hist[:, 1:] @ notas
+    distribuicoes = pd.DataFrame(hist, columns=NOTA_LABELS, index=[ID_PARA_LABEL[q] for q in colunas])
+    distribuicoes.insert(0, "Descrição", [ID_PARA_TEXTO[q] for q in colunas])
+    distribuicoes["% N/A"] = hist[:, 0] / n_linhas * 100
+    distribuicoes["Média"] = _media(soma_q, validas)
+    distribuicoes["Desvio"] = np.sqrt(np.maximum(_media(hist[:, 1:] @ notas ** 2, validas) - distribuicoes["Média"] ** 2, 0))
+
+    # compostos de seção por formulário: média das notas válidas de cada seção
+    valido = m >= 0
+    pontos = np.where(valido, m, 0).astype(np.int16)
+    soma_sec = np.add.reduceat(pontos, inicios, axis=1)
+    n_sec = np.add.reduceat(valido, inicios, axis=1, dtype=np.int16)
+    comp = _media(soma_sec, n_sec)                              # linhas × seções (NaN: só N/A)
+    com_nota = ~np.isnan(comp)
+    comp0 = np.where(com_nota, comp, 0.0)
+    k = com_nota.sum(axis=0)
+    media_sec = _media(comp0.sum(axis=0), k)
+    secoes_df = pd.DataFrame({
+        "Seção": secoes,
+        "Questões": np.diff(np.append(inicios, n_q)),
+        "Formulários com nota": k,
+        "Média": media_sec,
+        "Desvio": np.sqrt(np.maximum(_media((comp0 ** 2).sum(axis=0), k) - media_sec ** 2, 0)),
+        "Mediana": [np.median(comp[com_nota[:, j], j]) if k[j] else np.nan for j in range(len(secoes))],
+    })
+    geral = _media(pontos.sum(axis=1, dtype=np.int32), valido.sum(axis=1))   # nota média de cada formulário
+    tem_geral = ~np.isnan(geral)
+
+    # Semestre × Currículo
+    cod_sem, rot_sem = _codigos(df["Semestre"], LISTA_SEMESTRES) if "Semestre" in df else (np.zeros(n_linhas, np.intp), [SEM_VALOR])
+    cod_cur, rot_cur = _codigos(df["Curriculo"], LISTA_CURRICULOS) if "Curriculo" in df else (np.zeros(n_linhas, np.intp), [SEM_VALOR])
+    celulas = len(rot_sem) * len(rot_cur)
+    g = cod_sem * len(rot_cur) + cod_cur
+    forms = np.bincount(g, minlength=celulas).reshape(len(rot_sem), len(rot_cur))
+    soma_g = np.bincount(g[tem_geral], weights=geral[tem_geral], minlength=celulas)
+    n_g = np.bincount(g[tem_geral], minlength=celulas)
+    cruzada_formularios = pd.DataFrame(forms, index=pd.Index(rot_sem, name="Semestre"), columns=pd.Index(rot_cur, name="Currículo"))
+    cruzada_formularios["Total"] = cruzada_formularios.sum(axis=1)
+    cruzada_formularios.loc["Total"] = cruzada_formularios.sum(axis=0)
+    cruzada_medias = pd.DataFrame(_media(soma_g, n_g).reshape(len(rot_sem), len(rot_cur)),
+                                  index=cruzada_formularios.index[:-1], columns=cruzada_formularios.columns[:-1])
+
+    return {
+        "formularios": n_linhas,
+        "distribuicoes": distribuicoes,
+        "secoes": secoes_df,
+        "cruzada_formularios": cruzada_formularios,
+        "cruzada_medias": cruzada_medias,
+        "transcritores": _transcritores(df, n_linhas),
+    }
+
+def _transcritores(df: pd.DataFrame, n_linhas: int) -> pd.DataFrame:
+    """Por Petiano_Responsavel: formulários, dias com transcrição, média por dia ativo, primeiro e último registro."""
+    if "Petiano_Responsavel" not in df or "Data_Registro" not in df:
+        return pd.DataFrame()
+    cod, rotulos = _codigos(df["Petiano_Responsavel"], [])
+    n_p = len(rotulos)
+    quando = pd.to_datetime(df["Data_Registro"], errors="coerce", format="%Y-%m-%d %H:%M:%S").to_numpy("datetime64[s]")
+    ok = ~np.isnat(quando)
+    segundos = quando[ok].astype(np.int64)
+    cod_ok = cod[ok]
+    dias = segundos // 86_400
+    dias_ativos = np.zeros(n_p, dtype=np.int64)
+    if len(dias):   # pares (transcritor, dia) distintos num único vetor de inteiros
+        d0, base = dias.min(), dias.max() - dias.min() + 1
+        dias_ativos = np.bincount(np.unique(cod_ok * base + (dias - d0)) // base, minlength=n_p)
+    primeiro = np.full(n_p, np.iinfo(np.int64).max)
+    ultimo = np.full(n_p, np.iinfo(np.int64).min)
+    np.minimum.at(primeiro, cod_ok, segundos)
+    np.maximum.at(ultimo, cod_ok, segundos)
+    formularios = np.bincount(cod, minlength=n_p)
+    tem_data = dias_ativos > 0
+
+    def datas(v):
+        return pd.to_datetime(np.where(tem_data, v, 0), unit="s").where(tem_data)
+    out = pd.DataFrame({
+        "Transcritor": rotulos,
+        "Formulários": formularios,
+        "Dias ativos": dias_ativos,
+        "Formulários/dia ativo": _media(np.bincount(cod_ok, minlength=n_p), dias_ativos),
+        "Primeiro registro": datas(primeiro),
+        "Último registro": datas(ultimo),
+    })
+    return out.sort_values("Formulários", ascending=False, ignore_index=True)
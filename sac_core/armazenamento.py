@@ -0,0 +1,834 @@
+"""Armazenamento dos registros do S.A.C. em SQLite (modo WAL).
+
+Cada formulário é uma linha da tabela ``registros`` com o conteúdo completo em
+JSON; salvar custa um INSERT, independente de quantos registros já existem.
+O CSV antigo é importado uma única vez e continua disponível como exportação.
+
+Concorrência: toda escrita é uma transação ``BEGIN IMMEDIATE`` (o SQLite trava
+o arquivo entre processos) e cada registro tem um número de ``versao`` para
+detectar edições simultâneas do mesmo formulário.
+
+Nada se perde ao editar: cada inclusão e cada campo alterado ficam no log
+``historico`` (ver ``sac_core.historico``), na mesma transação.
+
+Cada linha guarda a versão do esquema em que foi gravada (``esquema``); a
+leitura devolve o registro já migrado para a versão atual (``sac_core.migracoes``)
+e ``migrar_registros`` regrava os antigos numa passada em lotes.
+
+Campanhas encerradas podem sair do banco para arquivos à parte, comprimidos e
+somente leitura (ver ``sac_core.campanhas``); as funções de leitura aceitam o
+caminho de um desses arquivos no lugar do banco.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sac_core import agregados, historico, perfil
+from sac_core.campanhas import campanha_atual, campanha_de
+from sac_core.esquema import CAMPO_VERSAO, LISTA_SEMESTRES, VERSAO_ESQUEMA, definicao_esquema, tipar_dataframe
+from sac_core.migracoes import decodificar, migrar
+from sac_core.registro import chave_identidade, impressao_conteudo, normalizar, normalizar_matricula
+
+if TYPE_CHECKING:   # pandas só é importado por quem lê DataFrames (Painel, CSV); salvar não precisa dele
+    import pandas as pd
+
+ARQUIVO_DB = "respostas_sac_deq.sqlite3"
+ARQUIVO_CSV_LEGADO = "respostas_sac_deq.csv"
+CSV_ENCODING = "utf-8-sig"   # amigável para Excel
+SUFIXO_ARQUIVADA = ".arquivada.sqlite3"   # campanha arquivada: somente leitura, JSON comprimido
+
+_ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS registros (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    registro_id   TEXT NOT NULL UNIQUE,
+    versao        INTEGER NOT NULL DEFAULT 1,
+    nome          TEXT,
+    matricula     TEXT,
+    semestre      TEXT,
+    data_registro TEXT,
+    dados         TEXT NOT NULL,
+    rev           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_registros_semestre_data ON registros(semestre, data_registro);
+CREATE INDEX IF NOT EXISTS idx_registros_data ON registros(data_registro);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE IF NOT EXISTS esquemas (
+    versao    INTEGER PRIMARY KEY,
+    definicao TEXT NOT NULL
+);
+"""
+
+# colunas acrescentadas depois da primeira versão da tabela (bancos antigos ganham via ALTER TABLE)
+_COLUNAS_NOVAS = {"rev": "INTEGER NOT NULL DEFAULT 0", "chave_identidade": "TEXT", "impressao": "TEXT",
+                  "esquema": "INTEGER NOT NULL DEFAULT 0",   # 0 = anterior ao esquema versionado
+                  "discente": "TEXT", "ordem_semestre": "INTEGER", "curriculo": "TEXT", "campanha": "TEXT",
+                  "nome_busca": "TEXT", "matricula_busca": "TEXT"}   # nome/matrícula sem acentos e minúsculos
+_INDICES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_registros_rev ON registros(rev);
+CREATE INDEX IF NOT EXISTS idx_registros_semestre ON registros(semestre);
+CREATE INDEX IF NOT EXISTS idx_registros_filtros ON registros(nome, matricula, semestre, data_registro);
+CREATE INDEX IF NOT EXISTS idx_registros_chave_identidade ON registros(chave_identidade) WHERE chave_identidade IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_registros_impressao ON registros(impressao) WHERE impressao IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_registros_esquema ON registros(esquema);
+CREATE INDEX IF NOT EXISTS idx_registros_discente ON registros(discente, ordem_semestre, data_registro, curriculo, nome)
+    WHERE discente IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_registros_campanha ON registros(campanha, semestre);
+CREATE INDEX IF NOT EXISTS idx_registros_busca ON registros(nome_busca, matricula_busca, semestre, data_registro, nome, matricula);
+"""
+
+# colunas da tabela que espelham campos do registro (para filtros sem abrir o JSON)
+_COLUNAS_ESPELHO = {"nome": "Nome", "matricula": "Matricula", "semestre": "Semestre", "data_registro": "Data_Registro"}
+
+_local = threading.local()
+
+# cache por processo: caminho -> (versao_banco, {(forma, semestre): DataFrame})
+_cache_df = {}
+_lock_cache = threading.Lock()
+# encoding que funcionou para cada (arquivo, mtime, tamanho)
+_encodings_csv = {}
+
+class ConflitoDeVersao(Exception):
+    """O registro foi alterado por outra pessoa desde que foi aberto para edição."""
+
+# ==============================================================================
+# CSV (legado / exportação)
+# ==============================================================================
+def escrever_csv_atomico(df_final: pd.DataFrame, destino: str, encoding: str = CSV_ENCODING):
+    tmp = destino + ".tmp"
+    df_final.to_csv(tmp, index=False, encoding=encoding)
+    os.replace(tmp, destino)
+
+@perfil.cronometrado()
+def ler_csv_seguro(caminho: str) -> pd.DataFrame:
+    import pandas as pd
+    if not os.path.exists(caminho): return pd.DataFrame()
+    info = os.stat(caminho)
+    chave = (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+    conhecido = _encodings_csv.get(chave)
+    for enc in ([conhecido] if conhecido else []) + [CSV_ENCODING, "utf-8", "latin-1"]:
+        try: df = pd.read_csv(caminho, dtype=str, encoding=enc)
+        except Exception:
+            perfil.contar("csv_encoding_fallbacks")
+            continue
+        _encodings_csv[chave] = enc
+        return df
+    return pd.read_csv(caminho, dtype=str)
+
+# ==============================================================================
+# CONEXÃO
+# ==============================================================================
+def conectar(caminho: str = ARQUIVO_DB) -> sqlite3.Connection:
+    """Uma conexão por thread e por arquivo (o Streamlit roda cada sessão em uma thread)."""
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+    if caminho.endswith(SUFIXO_ARQUIVADA):
+        return _conectar_arquivada(caminho, conexoes)
+    con = conexoes.get(caminho)
+    if con is None:
+        con = sqlite3.connect(caminho, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.executescript(_ESQUEMA_SQL + agregados.ESQUEMA_SQL + historico.ESQUEMA_SQL)
+        existentes = {c[1] for c in con.execute("PRAGMA table_info(registros)")}
+        for coluna, tipo in _COLUNAS_NOVAS.items():
+            if coluna not in existentes:
+                con.execute(f"ALTER TABLE registros ADD COLUMN {coluna} {tipo}")
+        con.executescript(_INDICES_SQL)
+        con.execute("INSERT OR IGNORE INTO esquemas (versao, definicao) VALUES (?, ?)",
+                    (VERSAO_ESQUEMA, json.dumps(definicao_esquema(), ensure_ascii=False)))
+        if not _meta(con, "agregados_ok"):
+            with _transacao(con):
+                if not _meta(con, "agregados_ok"):   # banco anterior aos agregados
+                    agregados.reconstruir(con)
+                    con.execute("INSERT INTO meta (chave, valor) VALUES ('agregados_ok', '1')")
+        if not _meta(con, "duplicatas_ok"):
+            with _transacao(con):
+                if not _meta(con, "duplicatas_ok"):   # banco anterior às chaves de duplicata
+                    con.executemany("UPDATE registros SET chave_identidade = ?, impressao = ? WHERE seq = ?",
+                                    ((*_chaves_duplicata(json.loads(d)), seq) for seq, d in con.execute("SELECT seq, dados FROM registros").fetchall()))
+                    con.execute("INSERT INTO meta (chave, valor) VALUES ('duplicatas_ok', '1')")
+        if not _meta(con, "discentes_ok"):
+            with _transacao(con):
+                if not _meta(con, "discentes_ok"):   # banco anterior ao índice por discente
+                    con.executemany("UPDATE registros SET discente = ?, ordem_semestre = ?, curriculo = ? WHERE seq = ?",
+                                    ((*_chaves_discente(decodificar(d, e)), seq) for seq, d, e in con.execute("SELECT seq, dados, esquema FROM registros").fetchall()))
+                    con.execute("INSERT INTO meta (chave, valor) VALUES ('discentes_ok', '1')")
+        if not _meta(con, "campanhas_ok"):
+            with _transacao(con):
+                if not _meta(con, "campanhas_ok"):   # banco anterior às campanhas
+                    con.executemany("UPDATE registros SET campanha = ? WHERE seq = ?",
+                                    ((campanha_de(d), seq) for seq, d in con.execute("SELECT seq, data_registro FROM registros").fetchall()))
+                    con.execute("INSERT INTO meta (chave, valor) VALUES ('campanhas_ok', '1')")
+        if not _meta(con, "historico_ok"):
+            with _transacao(con):
+                if not _meta(con, "historico_ok"):   # banco anterior ao histórico
+                    historico.registrar_existentes(con)
+                    con.execute("INSERT INTO meta (chave, valor) VALUES ('historico_ok', '1')")
+        if not _meta(con, "busca_ok"):
+            with _transacao(con):
+                if not _meta(con, "busca_ok"):   # banco anterior às colunas normalizadas dos filtros
+                    con.executemany("UPDATE registros SET nome_busca = ?, matricula_busca = ? WHERE seq = ?",
+                                    ((*_busca({"Nome": n, "Matricula": m}), seq) for seq, n, m in con.execute("SELECT seq, nome, matricula FROM registros").fetchall()))
+                    con.execute("INSERT INTO meta (chave, valor) VALUES ('busca_ok', '1')")
+        conexoes[caminho] = con
+    return con
+
+def _conectar_arquivada(caminho: str, conexoes: dict) -> sqlite3.Connection:
+    """Arquivo de campanha: só leitura (``immutable``), sem preparar esquema; reaberto se o arquivo foi trocado."""
+    info = os.stat(caminho)
+    chave = (caminho, info.st_ino, info.st_mtime_ns)
+    con = conexoes.get(chave)
+    if con is None:
+        _fechar_arquivada(caminho, conexoes)   # de um arquivo anterior com o mesmo nome (reaberto e arquivado de novo)
+        con = conexoes[chave] = sqlite3.connect(Path(caminho).resolve().as_uri() + "?mode=ro&immutable=1",
+                                                uri=True, isolation_level=None)
+    return con
+
+def _fechar_arquivada(caminho: str, conexoes: dict = None):
+    """Fecha e tira do cache da thread as conexões a um arquivo de campanha (antes de apagá-lo)."""
+    conexoes = getattr(_local, "conexoes", {}) if conexoes is None else conexoes
+    for chave in [c for c in conexoes if isinstance(c, tuple) and c[0] == caminho]:
+        conexoes.pop(chave).close()
+
+def _meta(con: sqlite3.Connection, chave: str):
+    linha = con.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+    return linha[0] if linha else None
+
+@contextmanager
+def _transacao(con: sqlite3.Connection):
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        yield con
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    con.execute("COMMIT")
+
+def _incrementar_versao(con: sqlite3.Connection) -> int:
+    """Chamado no início de toda transação de escrita; invalida os caches de todos os processos.
+
+    O valor devolvido é gravado em ``registros.rev`` das linhas tocadas, para
+    quem mantém índices em memória buscar só o que mudou (``alterados_desde``).
+    """
+    con.execute("INSERT INTO meta (chave, valor) VALUES ('versao_banco', 1) "
+                "ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1")
+    return int(_meta(con, "versao_banco"))
+
+def versao_banco(caminho: str = ARQUIVO_DB) -> int:
+    """Contador que muda a cada escrita confirmada (barato: uma leitura na tabela meta)."""
+    return int(_meta(conectar(caminho), "versao_banco") or 0)
+
+def invalidar_cache(caminho: str = ARQUIVO_DB):
+    """Chamado depois de toda gravação: descarta o cache do processo e agenda a remontagem dos retratos do Painel."""
+    with _lock_cache:
+        _cache_df.pop(caminho, None)
+    _renovar_retratos(caminho)
+
+def _sem_nulos(dados: dict) -> dict:
+    """Campos vazios (None/NaN vindos do pandas) não são gravados no JSON."""
+    return {k: v for k, v in dados.items() if isinstance(v, str) or not _nulo(v)}
+
+def _nulo(v) -> bool:
+    """None, NaN/NaT ou pd.NA, sem importar pandas."""
+    if v is None:
+        return True
+    try:
+        return bool(v != v)
+    except TypeError:   # pd.NA
+        return True
+
+def _espelho(dados: dict) -> tuple:
+    return tuple(dados.get(campo) for campo in _COLUNAS_ESPELHO.values())
+
+def _busca(dados: dict) -> tuple:
+    """(nome_busca, matricula_busca): os filtros “contém” comparam sem acento nem caixa (LIKE só ignora caixa em ASCII)."""
+    return normalizar(dados.get("Nome")) or None, normalizar(dados.get("Matricula")) or None
+
+def _chaves_duplicata(dados: dict) -> tuple:
+    """(chave_identidade, impressao): ver ``registro.chave_identidade``/``impressao_conteudo`` e ``duplicatas``."""
+    return chave_identidade(dados), impressao_conteudo(dados)
+
+_ORDEM_SEMESTRES = {s: i for i, s in enumerate(LISTA_SEMESTRES, start=1)}
+
+def _chaves_discente(dados: dict) -> tuple:
+    """(discente, ordem_semestre, curriculo) do índice longitudinal: matrícula normalizada e a posição do semestre."""
+    return normalizar_matricula(dados.get("Matricula")) or None, _ORDEM_SEMESTRES.get(dados.get("Semestre")), dados.get("Curriculo")
+
+def _inserir(con: sqlite3.Connection, dados: dict, rev: int) -> dict:
+    """Grava a linha e devolve os dados gravados; os agregados ficam com quem chama (``aplicar_inclusoes``)."""
+    dados = _sem_nulos(dados)
+    dados = migrar(dados, dados.pop(CAMPO_VERSAO, 0))   # da tela/fila já vem na versão atual; sem marca, passa por todas
+    if not dados.get("Registro_ID"):
+        dados["Registro_ID"] = str(uuid.uuid4())
+    con.execute(
+        "INSERT INTO registros (registro_id, nome, matricula, semestre, data_registro, dados, rev, chave_identidade, impressao, esquema, "
+        "discente, ordem_semestre, curriculo, campanha, nome_busca, matricula_busca) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (dados["Registro_ID"], *_espelho(dados), json.dumps(dados, ensure_ascii=False), rev, *_chaves_duplicata(dados), VERSAO_ESQUEMA,
+         *_chaves_discente(dados), campanha_de(dados.get("Data_Registro")), *_busca(dados)),
+    )
+    return dados
+
+# ==============================================================================
+# API DO REPOSITÓRIO
+# ==============================================================================
+def inserir_registro(dados: dict, caminho: str = ARQUIVO_DB) -> str:
+    """Grava um formulário novo e devolve o Registro_ID."""
+    return inserir_registros([dados], caminho)[0]
+
+def inserir_registros(registros, caminho: str = ARQUIVO_DB, ignorar_existentes: bool = False) -> list:
+    """Grava vários formulários em uma única transação.
+
+    Com ``ignorar_existentes``, Registro_IDs que já estão no banco são pulados
+    dentro da mesma transação (reenvio sem duplicar; ver ``sac_core.fila``).
+    """
+    con = conectar(caminho)
+    with _transacao(con):
+        if ignorar_existentes:
+            registros = [d for d in registros if not d.get("Registro_ID") or con.execute(
+                "SELECT 1 FROM registros WHERE registro_id = ?", (d["Registro_ID"],)).fetchone() is None]
+            if not registros:
+                return []
+        rev = _incrementar_versao(con)
+        gravados = [_inserir(con, dados, rev) for dados in registros]
+        agregados.aplicar_inclusoes(con, gravados)
+        historico.registrar_inclusoes(con, gravados)
+    invalidar_cache(caminho)
+    _fotografar_historico(caminho)
+    return [d["Registro_ID"] for d in gravados]
+
+def _atualizar(con: sqlite3.Connection, registro_id: str, campos: dict, rev: int, versao_esperada: int = None, autor: str = None) -> int:
+    linha = con.execute("SELECT dados, versao, esquema FROM registros WHERE registro_id = ?", (registro_id,)).fetchone()
+    if linha is None:
+        raise LookupError(f"Registro {registro_id} não encontrado.")
+    if versao_esperada is not None and linha[1] != versao_esperada:
+        raise ConflitoDeVersao(f"Registro {registro_id} está na versão {linha[1]} (esperada {versao_esperada}).")
+    antigo = json.loads(linha[0])
+    dados = {**migrar(antigo, linha[2]), **_sem_nulos(campos)}
+    _regravar(con, registro_id, antigo, dados, rev, versao=linha[1] + 1, autor=autor)
+    return linha[1] + 1
+
+def _regravar(con: sqlite3.Connection, registro_id: str, antigo: dict, dados: dict, rev: int, versao: int = None, autor: str = None):
+    """Grava ``dados`` (versão atual do esquema) no lugar de ``antigo``, com agregados e histórico."""
+    con.execute(
+        "UPDATE registros SET versao = COALESCE(?, versao), nome = ?, matricula = ?, semestre = ?, data_registro = ?, dados = ?, "
+        "rev = ?, chave_identidade = ?, impressao = ?, esquema = ?, discente = ?, ordem_semestre = ?, curriculo = ?, campanha = ?, "
+        "nome_busca = ?, matricula_busca = ? WHERE registro_id = ?",
+        (versao, *_espelho(dados), json.dumps(dados, ensure_ascii=False), rev, *_chaves_duplicata(dados), VERSAO_ESQUEMA,
+         *_chaves_discente(dados), campanha_de(dados.get("Data_Registro")), *_busca(dados), registro_id),
+    )
+    agregados.aplicar(con, antigo, dados)
+    historico.registrar_alteracao(con, antigo, dados, autor)
+
+def atualizar_registro(registro_id: str, campos: dict, caminho: str = ARQUIVO_DB, versao_esperada: int = None,
+                       autor: str = None) -> int:
+    """Aplica ``campos`` (só os que mudaram) sobre o registro existente e devolve a nova versão.
+
+    Com ``versao_esperada``, recusa a gravação (``ConflitoDeVersao``) se o
+    registro mudou desde que foi lido. ``autor`` é quem editou, para o
+    histórico (None quando não se sabe).
+    """
+    con = conectar(caminho)
+    with _transacao(con):
+        nova_versao = _atualizar(con, registro_id, campos, _incrementar_versao(con), versao_esperada, autor)
+    invalidar_cache(caminho)
+    _fotografar_historico(caminho)
+    return nova_versao
+
+def atualizar_em_lote(alteracoes: dict, caminho: str = ARQUIVO_DB, condicao: dict = None, autor: str = None) -> int:
+    """Aplica ``{registro_id: campos}`` em uma única transação; devolve quantos registros mudaram.
+
+    Com ``condicao`` (ex.: ``{"Semestre": "3º Semestre"}``), só altera os
+    registros cujos campos atuais batem com ela – a conferência é feita dentro
+    da transação, então não depende de uma leitura anterior.
+    """
+    con = conectar(caminho)
+    alterados = 0
+    with _transacao(con):
+        rev = _incrementar_versao(con)
+        for registro_id, campos in alteracoes.items():
+            if condicao:
+                linha = con.execute("SELECT dados, esquema FROM registros WHERE registro_id = ?", (registro_id,)).fetchone()
+                if linha is None:
+                    continue
+                atual = decodificar(*linha)
+                if any(atual.get(k) != v for k, v in condicao.items()):
+                    continue
+            _atualizar(con, registro_id, campos, rev, autor=autor)
+            alterados += 1
+    invalidar_cache(caminho)
+    _fotografar_historico(caminho)
+    return alterados
+
+def obter_registro(registro_id: str, caminho: str = ARQUIVO_DB):
+    linha = conectar(caminho).execute("SELECT dados, esquema FROM registros WHERE registro_id = ?", (registro_id,)).fetchone()
+    return decodificar(*linha) if linha else None
+
+def obter_registros(registro_ids: list, caminho: str = ARQUIVO_DB) -> list:
+    """Vários registros de uma vez, na ordem de ``registro_ids`` (ausentes ficam de fora)."""
+    con, achados = conectar(caminho), {}
+    for i in range(0, len(registro_ids), 500):   # limite de parâmetros do SQLite
+        parte = registro_ids[i:i + 500]
+        achados.update((r, (d, e)) for r, d, e in con.execute(
+            f"SELECT registro_id, dados, esquema FROM registros WHERE registro_id IN ({', '.join('?' * len(parte))})", parte))
+    return [decodificar(*achados[r]) for r in registro_ids if r in achados]
+
+def listar_ids(caminho: str = ARQUIVO_DB, semestre: str = None) -> list:
+    """Registro_IDs em ordem de inserção, sem abrir o JSON."""
+    if semestre is None:
+        cur = conectar(caminho).execute("SELECT registro_id FROM registros ORDER BY seq")
+    else:
+        cur = conectar(caminho).execute("SELECT registro_id FROM registros WHERE semestre = ? ORDER BY seq", (semestre,))
+    return [r for (r,) in cur]
+
+def versao_registro(registro_id: str, caminho: str = ARQUIVO_DB):
+    linha = conectar(caminho).execute("SELECT versao FROM registros WHERE registro_id = ?", (registro_id,)).fetchone()
+    return linha[0] if linha else None
+
+def ids_existentes(registro_ids: list, caminho: str = ARQUIVO_DB) -> set:
+    """Quais destes Registro_IDs já estão no banco (uma consulta por bloco de 500)."""
+    con, existentes = conectar(caminho), set()
+    for i in range(0, len(registro_ids), 500):
+        lote = registro_ids[i:i + 500]
+        existentes.update(r for (r,) in con.execute(
+            f"SELECT registro_id FROM registros WHERE registro_id IN ({', '.join('?' * len(lote))})", lote))
+    return existentes
+
+def listar_registros(caminho: str = ARQUIVO_DB, semestre: str = None) -> list:
+    """Registros em ordem de inserção (opcionalmente de um só semestre)."""
+    con = conectar(caminho)
+    if semestre is None:
+        cur = con.execute("SELECT dados, esquema FROM registros ORDER BY seq")
+    else:
+        cur = con.execute("SELECT dados, esquema FROM registros WHERE semestre = ? ORDER BY seq", (semestre,))
+    return [decodificar(d, e) for d, e in cur]
+
+# ordenações da tabela paginada: coluna do registro -> coluna espelho (indexada)
+ORDENACOES = {"Registro_ID": "seq", "Nome": "nome", "Matricula": "matricula", "Semestre": "semestre", "Data_Registro": "data_registro"}
+
+def _contem(texto: str) -> str:
+    """Padrão LIKE de “contém” sobre as colunas ``*_busca``: texto normalizado, curingas escapados."""
+    texto = normalizar(texto)
+    return "%" + texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+@perfil.cronometrado("banco:pagina_registros")
+def pagina_registros(caminho: str = ARQUIVO_DB, semestre: str = None, nome: str = "", matricula: str = "",
+                     ordenar_por: str = "Registro_ID", decrescente: bool = False, pagina: int = 0, tamanho: int = None):
+    """Uma página de registros filtrada e ordenada no SQLite: ``(lista de dicts, total filtrado)``.
+
+    Filtros e ordenação usam só as colunas espelho e seus índices; apenas as
+    linhas da página são lidas e decodificadas. ``tamanho=None`` devolve tudo o que casa.
+    """
+    condicoes, params = [], []
+    if semestre is not None:
+        condicoes.append("semestre = ?"); params.append(semestre)
+    if nome:
+        condicoes.append("nome_busca LIKE ? ESCAPE '\\'"); params.append(_contem(nome))
+    if matricula:
+        condicoes.append("matricula_busca LIKE ? ESCAPE '\\'"); params.append(_contem(matricula))
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    direcao = "DESC" if decrescente else "ASC"
+    ordem = f"{ORDENACOES[ordenar_por]} {direcao}" + (f", seq {direcao}" if ordenar_por != "Registro_ID" else "")
+    # “contém” não usa índice de busca: varre o índice de cobertura (só as colunas espelho), nunca as linhas com o JSON
+    tabela = "registros INDEXED BY idx_registros_busca" if nome or matricula else "registros"
+    limite = f"LIMIT {int(tamanho)} OFFSET {int(pagina) * int(tamanho)}" if tamanho else ""
+    con = conectar(caminho)
+    con.execute("BEGIN")   # total e página do mesmo retrato
+    try:
+        total = con.execute(f"SELECT COUNT(*) FROM {tabela} {where}", params).fetchone()[0]
+        seqs = [s for (s,) in con.execute(f"SELECT seq FROM {tabela} {where} ORDER BY {ordem} {limite}", params)]
+        dados = {}
+        for i in range(0, len(seqs), 500):
+            lote = seqs[i:i + 500]
+            dados.update((s, (d, e)) for s, d, e in con.execute(
+                f"SELECT seq, dados, esquema FROM registros WHERE seq IN ({', '.join('?' * len(lote))})", lote))
+    finally:
+        con.execute("COMMIT")
+    return [decodificar(*dados[s]) for s in seqs], total
+
+def alterados_desde(rev: int, caminho: str = ARQUIVO_DB) -> list:
+    """Linhas gravadas depois de ``rev``: (seq, registro_id, nome, matricula, semestre, rev), sem abrir o JSON."""
+    return conectar(caminho).execute(
+        "SELECT seq, registro_id, nome, matricula, semestre, rev FROM registros WHERE rev > ? ORDER BY rev", (rev,)).fetchall()
+
+def contar_registros(caminho: str = ARQUIVO_DB) -> int:
+    return conectar(caminho).execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+
+def carregar_dataframe(caminho: str = ARQUIVO_DB, semestre: str = None) -> pd.DataFrame:
+    """Mesmo formato que ``ler_csv_seguro`` devolvia: tudo texto, faltantes como NaN.
+
+    O DataFrame é compartilhado entre sessões enquanto ``versao_banco`` não
+    muda – não altere o objeto devolvido (filtre ou use ``.copy()``).
+    """
+    return _em_cache(caminho, ("texto", semestre), lambda: _ler_dataframe(caminho, semestre))
+
+@perfil.cronometrado("banco:ler_registros")
+def _ler_dataframe(caminho: str, semestre: str) -> pd.DataFrame:
+    import pandas as pd
+    return pd.DataFrame.from_records(listar_registros(caminho, semestre))
+
+def carregar_dataframe_tipado(caminho: str = ARQUIVO_DB, semestre: str = None, incluir_textos: bool = False) -> pd.DataFrame:
+    """Forma compacta (ver ``esquema.tipar_dataframe``), também em cache por versão."""
+    return _em_cache(caminho, ("tipado", semestre, incluir_textos),
+                     lambda: tipar_dataframe(carregar_dataframe(caminho, semestre), incluir_textos))
+
+@perfil.cronometrado("banco:analise_coorte")
+def analise_coorte(caminho: str = ARQUIVO_DB, semestre: str = None, curriculo: str = None) -> dict:
+    """Indicadores de ``analitica.calcular``, em cache por versão do banco e filtro (não altere os DataFrames)."""
+    from sac_core import analitica
+    return _em_cache(caminho, ("analise", semestre, curriculo),
+                     lambda: analitica.calcular(carregar_dataframe_tipado(caminho, semestre), curriculo))
+
+def _em_cache(caminho: str, chave, construir):
+    versao = versao_banco(caminho)
+    with _lock_cache:
+        versao_cache, entradas = _cache_df.get(caminho, (None, {}))
+        if versao_cache == versao and chave in entradas:
+            return entradas[chave]
+    perfil.contar("cache_df_falhas")
+    df = construir()
+    with _lock_cache:
+        versao_cache, entradas = _cache_df.get(caminho, (None, {}))
+        if versao_cache != versao:
+            entradas = {}
+            _cache_df[caminho] = (versao, entradas)
+        entradas[chave] = df
+    return df
+
+@perfil.cronometrado("banco:resumo_agregado")
+def resumo_agregado(caminho: str = ARQUIVO_DB, semestre: str = None) -> dict:
+    """Métricas do Painel a partir dos agregados incrementais (ver ``agregados.resumo``)."""
+    return agregados.resumo(conectar(caminho), semestre)
+
+@perfil.cronometrado("banco:retrato_painel")
+def retrato_painel(caminho: str = ARQUIVO_DB, semestre: str = None) -> dict:
+    """Resumo, médias e gráfico do Painel (``painel.montar``), em cache por versão do banco e filtro (não altere).
+
+    O filtro passa a ser remontado em segundo plano depois de cada gravação (``_renovar_retratos``).
+    """
+    from sac_core import painel
+    with _lock_retratos:
+        _retratos_abertos.setdefault(caminho, set()).add(semestre)
+    return _em_cache(caminho, ("painel", semestre), lambda: painel.montar(conectar(caminho), semestre))
+
+_retratos_abertos = {}   # caminho -> {semestre} já pedidos por alguma sessão deste processo
+_retratos_em_andamento = set()
+_lock_retratos = threading.Lock()
+
+def _renovar_retratos(caminho: str):
+    """Depois de uma gravação: remonta em segundo plano os retratos já abertos, até alcançar a versão do banco."""
+    if caminho.endswith(SUFIXO_ARQUIVADA):   # não mudam
+        return
+    with _lock_retratos:
+        if not _retratos_abertos.get(caminho) or caminho in _retratos_em_andamento:
+            return
+        _retratos_em_andamento.add(caminho)
+
+    def renovar():
+        try:
+            while True:
+                versao = versao_banco(caminho)
+                with _lock_retratos:
+                    filtros = list(_retratos_abertos[caminho])
+                for semestre in filtros:
+                    retrato_painel(caminho, semestre)
+                with _lock_retratos:   # gravação durante a remontagem: mais uma volta
+                    if versao_banco(caminho) == versao:
+                        _retratos_em_andamento.discard(caminho)
+                        return
+        except BaseException:
+            with _lock_retratos:
+                _retratos_em_andamento.discard(caminho)
+            raise
+    threading.Thread(target=renovar, name="sac-painel-retratos", daemon=True).start()
+
+def semestres_presentes(caminho: str = ARQUIVO_DB) -> list:
+    return agregados.semestres(conectar(caminho))
+
+def reconstruir_agregados(caminho: str = ARQUIVO_DB):
+    con = conectar(caminho)
+    with _transacao(con):
+        agregados.reconstruir(con)
+        _incrementar_versao(con)
+    invalidar_cache(caminho)
+
+# ==============================================================================
+# DISCENTES (índice longitudinal)
+# ==============================================================================
+def _com_arquivadas(caminho: str) -> list:
+    """O banco e os arquivos das campanhas arquivadas (consultas que atravessam campanhas)."""
+    return [caminho] + [caminho_campanha(c, caminho) for c in campanhas_arquivadas(caminho)]
+
+def avaliacoes_discente(matricula: str, caminho: str = ARQUIVO_DB) -> list:
+    """Registros do discente em ordem de semestre e data, pelo índice ``discente`` (matrícula normalizada).
+
+    Inclui as campanhas arquivadas: uma busca no índice de cada arquivo.
+    """
+    chave = normalizar_matricula(matricula)
+    if not chave:
+        return []
+    linhas = [linha for c in _com_arquivadas(caminho) for linha in conectar(c).execute(
+        "SELECT ordem_semestre, data_registro, seq, dados, esquema FROM registros WHERE discente = ?", (chave,))]
+    linhas.sort(key=lambda l: (l[0] is None, l[0] or 0, l[1] or "", l[2]))
+    return [decodificar(d, e) for *_, d, e in linhas]
+
+def discentes_acompanhados(caminho: str = ARQUIVO_DB, curriculo: str = None, minimo: int = 2) -> list:
+    """``[(discente, nome, nº de avaliações)]`` com ao menos ``minimo`` avaliações (e alguma no ``curriculo``).
+
+    Sai só do índice ``idx_registros_discente`` (cobre as colunas usadas) do
+    banco e de cada campanha arquivada, em cache por versão do banco.
+    """
+    def construir():
+        contagens = {}
+        for c in _com_arquivadas(caminho):
+            for discente, nome, n, no_curriculo in conectar(c).execute(
+                    "SELECT discente, MAX(nome), COUNT(*), MAX(curriculo = ?) FROM registros INDEXED BY idx_registros_discente "
+                    "WHERE discente IS NOT NULL GROUP BY discente", (curriculo,)):
+                nome0, n0, no0 = contagens.get(discente, ("", 0, 0))
+                contagens[discente] = (max(nome0, nome or ""), n0 + n, no0 or no_curriculo)
+        return sorted(((d, nome, n) for d, (nome, n, no_curriculo) in contagens.items()
+                       if n >= minimo and (no_curriculo or not curriculo)), key=lambda t: (t[1], t[0]))
+    return _em_cache(caminho, ("discentes", curriculo, minimo), construir)
+
+# ==============================================================================
+# CAMPANHAS (o banco com as em andamento; as encerradas em arquivos à parte)
+# ==============================================================================
+def pasta_campanhas(caminho: str = ARQUIVO_DB) -> str:
+    return caminho + ".campanhas"
+
+def caminho_campanha(campanha: str, caminho: str = ARQUIVO_DB) -> str:
+    """Arquivo da campanha arquivada; serve de ``caminho`` para as funções de leitura deste módulo."""
+    return os.path.join(pasta_campanhas(caminho), campanha + SUFIXO_ARQUIVADA)
+
+def campanhas_arquivadas(caminho: str = ARQUIVO_DB) -> list:
+    try:
+        nomes = os.listdir(pasta_campanhas(caminho))
+    except FileNotFoundError:
+        return []
+    return sorted(n[:-len(SUFIXO_ARQUIVADA)] for n in nomes if n.endswith(SUFIXO_ARQUIVADA))
+
+def campanhas(caminho: str = ARQUIVO_DB) -> list:
+    """``[(campanha, nº de registros, arquivada?)]``: as do banco (pelo índice ``campanha``) e as arquivadas."""
+    no_banco = [(c, n, False) for c, n in conectar(caminho).execute(
+        "SELECT campanha, COUNT(*) FROM registros GROUP BY campanha")]
+    arquivadas = [(c, contar_registros(caminho_campanha(c, caminho)), True) for c in campanhas_arquivadas(caminho)]
+    return sorted(no_banco + arquivadas, key=lambda t: (t[0] or "", t[2]))
+
+def arquivamentos(caminho: str = ARQUIVO_DB) -> int:
+    """Quantas vezes linhas saíram do banco (índices em memória recomeçam quando muda)."""
+    return int(_meta(conectar(caminho), "arquivamentos") or 0)
+
+def _colunas_registros(con: sqlite3.Connection) -> list:
+    return [c[1] for c in con.execute("PRAGMA table_info(registros)")]
+
+def _escrever_arquivada(destino: str, colunas: list, linhas: list, registros: list, versao: int, campanha: str):
+    """Monta o arquivo da campanha (mesmo esquema do banco, ``dados`` comprimido) e o deixa só para leitura."""
+    if os.path.exists(destino):
+        os.remove(destino)
+    con = sqlite3.connect(destino, isolation_level=None)
+    try:
+        con.executescript(_ESQUEMA_SQL + agregados.ESQUEMA_SQL)
+        existentes = set(_colunas_registros(con))
+        for coluna, tipo in _COLUNAS_NOVAS.items():
+            if coluna not in existentes:
+                con.execute(f"ALTER TABLE registros ADD COLUMN {coluna} {tipo}")
+        i = colunas.index("dados")
+        with _transacao(con):
+            con.executemany(f"INSERT INTO registros ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                            (l[:i] + (zlib.compress(l[i].encode("utf-8"), 9),) + l[i + 1:] for l in linhas))
+            agregados.aplicar_inclusoes(con, registros)
+            con.executemany("INSERT INTO meta (chave, valor) VALUES (?, ?)", [("versao_banco", versao), ("campanha", campanha)])
+            con.execute("INSERT INTO esquemas (versao, definicao) VALUES (?, ?)",
+                        (VERSAO_ESQUEMA, json.dumps(definicao_esquema(), ensure_ascii=False)))
+        con.executescript(_INDICES_SQL)
+        con.execute("VACUUM")
+    finally:
+        con.close()
+    os.chmod(destino, 0o444)
+
+def arquivar_campanha(campanha: str, caminho: str = ARQUIVO_DB) -> int:
+    """Tira do banco os registros de uma campanha encerrada, para o arquivo dela; devolve quantos.
+
+    O arquivo é montado dentro da transação que apaga as linhas e só entra no
+    lugar logo antes do COMMIT; se o processo cair entre as duas coisas, a
+    campanha aparece nos dois lados e arquivar de novo termina o serviço. O
+    histórico continua no banco, com um evento de saída por registro.
+    """
+    if campanha == campanha_atual():
+        raise ValueError(f"A campanha {campanha} ainda está em andamento.")
+    destino = caminho_campanha(campanha, caminho)
+    con = conectar(caminho)
+    os.makedirs(pasta_campanhas(caminho), exist_ok=True)
+    with _transacao(con):
+        colunas = _colunas_registros(con)
+        linhas = con.execute(f"SELECT {', '.join(colunas)} FROM registros WHERE campanha = ? ORDER BY seq", (campanha,)).fetchall()
+        if not linhas:
+            return 0
+        i_id, i_dados = colunas.index("registro_id"), colunas.index("dados")
+        registros = [json.loads(l[i_dados]) for l in linhas]   # como entraram nos agregados
+        versao = _incrementar_versao(con)
+        con.execute("DELETE FROM registros WHERE campanha = ?", (campanha,))
+        agregados.aplicar_exclusoes(con, registros)
+        historico.registrar_arquivamento(con, [l[i_id] for l in linhas], campanha)
+        con.execute("INSERT INTO meta (chave, valor) VALUES ('arquivamentos', 1) "
+                    "ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1")
+        if os.path.exists(destino):   # arquivamento interrompido depois de o arquivo entrar no lugar
+            if {l[i_id] for l in linhas} - set(listar_ids(destino)):
+                raise ValueError(f"A campanha {campanha} já está arquivada e tem registros novos no banco; reabra-a antes.")
+        else:
+            _escrever_arquivada(destino + ".tmp", colunas, linhas, registros, versao, campanha)
+            os.replace(destino + ".tmp", destino)
+    invalidar_cache(caminho)
+    return len(linhas)
+
+def reabrir_campanha(campanha: str, caminho: str = ARQUIVO_DB) -> int:
+    """Devolve ao banco (editáveis, mesma ordem) os registros de uma campanha arquivada e apaga o arquivo; devolve quantos."""
+    origem = caminho_campanha(campanha, caminho)
+    if not os.path.exists(origem):
+        raise LookupError(f"A campanha {campanha} não está arquivada.")
+    arq = conectar(origem)
+    colunas = _colunas_registros(arq)
+    linhas = arq.execute(f"SELECT {', '.join(colunas)} FROM registros ORDER BY seq").fetchall()
+    i_dados, i_rev = colunas.index("dados"), colunas.index("rev")
+    con = conectar(caminho)
+    with _transacao(con):
+        rev = _incrementar_versao(con)
+        voltaram = []
+        for l in linhas:
+            texto = zlib.decompress(l[i_dados]).decode("utf-8")
+            valores = [*l[:i_dados], texto, *l[i_dados + 1:]]
+            valores[i_rev] = rev   # índices em memória (``alterados_desde``) enxergam a volta
+            if con.execute(f"INSERT OR IGNORE INTO registros ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                           valores).rowcount:
+                voltaram.append(json.loads(texto))
+        agregados.aplicar_inclusoes(con, voltaram)
+        historico.registrar_inclusoes(con, voltaram)
+    # no Windows, arquivo aberto ou só de leitura não pode ser apagado
+    _fechar_arquivada(origem)
+    invalidar_cache(origem)
+    os.chmod(origem, 0o644)
+    os.remove(origem)
+    invalidar_cache(caminho)
+    return len(voltaram)
+
+# ==============================================================================
+# VERSÃO DO ESQUEMA
+# ==============================================================================
+def registros_desatualizados(caminho: str = ARQUIVO_DB) -> int:
+    """Quantos registros ainda estão gravados numa versão anterior do esquema (lidos já migrados)."""
+    return conectar(caminho).execute("SELECT COUNT(*) FROM registros WHERE esquema < ?", (VERSAO_ESQUEMA,)).fetchone()[0]
+
+def migrar_registros(caminho: str = ARQUIVO_DB, lote: int = 500) -> int:
+    """Regrava na versão atual os registros de versões anteriores, ``lote`` por transação; devolve quantos.
+
+    Lê só os desatualizados, em ordem de ``seq`` (nunca o banco inteiro na
+    memória); quem muda de conteúdo é regravado com agregados, chaves e
+    histórico, os demais só ganham o número da versão.
+    """
+    con = conectar(caminho)
+    total, ultimo = 0, 0
+    while True:
+        with _transacao(con):
+            linhas = con.execute("SELECT seq, registro_id, dados, esquema FROM registros WHERE esquema < ? AND seq > ? "
+                                 "ORDER BY seq LIMIT ?", (VERSAO_ESQUEMA, ultimo, lote)).fetchall()
+            if not linhas:
+                break
+            rev, sem_mudanca = _incrementar_versao(con), []
+            for seq, registro_id, texto, esquema in linhas:
+                antigo = json.loads(texto)
+                novo = migrar(antigo, esquema)
+                if novo == antigo:   # a maioria: só o número da versão muda
+                    sem_mudanca.append((VERSAO_ESQUEMA, seq))
+                else:
+                    _regravar(con, registro_id, antigo, novo, rev, autor=f"migração v{VERSAO_ESQUEMA}")
+            con.executemany("UPDATE registros SET esquema = ? WHERE seq = ?", sem_mudanca)
+            ultimo = linhas[-1][0]
+        total += len(linhas)
+    if total:
+        invalidar_cache(caminho)
+    return total
+
+# ==============================================================================
+# HISTÓRICO
+# ==============================================================================
+_fotos_em_andamento = set()
+_lock_fotos = threading.Lock()
+
+def _fotografar_historico(caminho: str):
+    """Depois de uma gravação: se o histórico pede uma foto nova, tira em segundo plano (não atrasa o salvar)."""
+    if not historico.foto_pendente(conectar(caminho)):
+        return
+    with _lock_fotos:
+        if caminho in _fotos_em_andamento:
+            return
+        _fotos_em_andamento.add(caminho)
+
+    def tirar():
+        try:
+            historico.fotografar(conectar(caminho))
+        finally:
+            with _lock_fotos:
+                _fotos_em_andamento.discard(caminho)
+    threading.Thread(target=tirar, name="sac-historico-foto", daemon=True).start()
+
+def historico_registro(registro_id: str, caminho: str = ARQUIVO_DB) -> list:
+    """Eventos do registro (inclusão e cada campo alterado), do mais antigo ao mais recente."""
+    return historico.eventos(conectar(caminho), registro_id)
+
+def registro_em(registro_id: str, momento: str, caminho: str = ARQUIVO_DB):
+    """O registro como estava em ``momento`` ("AAAA-MM-DD[ HH:MM:SS]"); None se ainda não existia."""
+    dados = historico.registro_em(conectar(caminho), registro_id, momento)
+    return migrar(dados) if dados else None   # o histórico guarda cada versão como foi gravada
+
+def registros_em(momento: str, caminho: str = ARQUIVO_DB) -> list:
+    """O banco inteiro como estava em ``momento`` (última foto + eventos seguintes)."""
+    return [migrar(d) for d in historico.estado_em(conectar(caminho), momento)]
+
+# ==============================================================================
+# IMPORTAÇÃO ÚNICA / EXPORTAÇÃO CSV
+# ==============================================================================
+def importar_csv(caminho_csv: str = ARQUIVO_CSV_LEGADO, caminho: str = ARQUIVO_DB) -> int:
+    """Importa o CSV antigo uma única vez; devolve quantas linhas entraram."""
+    con = conectar(caminho)
+    if _meta(con, "csv_importado") or not os.path.exists(caminho_csv):
+        return 0
+    df = ler_csv_seguro(caminho_csv)
+    if df.empty:
+        return 0
+    with _transacao(con):
+        if _meta(con, "csv_importado"):
+            return 0
+        rev = _incrementar_versao(con)
+        vistos, gravados = set(), []
+        for linha in df.to_dict("records"):
+            dados = _sem_nulos(linha)
+            if dados.get("Registro_ID") in vistos:
+                dados.pop("Registro_ID")
+            gravados.append(_inserir(con, dados, rev))
+            vistos.add(gravados[-1]["Registro_ID"])
+        agregados.aplicar_inclusoes(con, gravados)
+        historico.registrar_inclusoes(con, gravados)
+        con.execute("INSERT INTO meta (chave, valor) VALUES ('csv_importado', ?)", (os.path.abspath(caminho_csv),))
+    invalidar_cache(caminho)
+    _fotografar_historico(caminho)
+    return len(df)
+
+def exportar_csv(destino: str, caminho: str = ARQUIVO_DB) -> int:
+    """Gera um CSV completo (para Excel) a partir do banco; devolve o nº de linhas (ver ``exportacao``)."""
+    from sac_core.exportacao import arquivo_exportado
+    tmp = destino + ".tmp"
+    shutil.copyfile(arquivo_exportado("csv", caminho), tmp)
+    os.replace(tmp, destino)
+    return contar_registros(caminho)
@@ -0,0 +1,95 @@
+"""Índice de busca por Nome/Matrícula para o modo de edição.
+
+Nome e Matrícula são normalizados (sem acento, minúsculos) e indexados por
+trigramas; uma busca por "contém" vira interseção de conjuntos + conferência
+final, sem percorrer linha a linha. O índice vive na memória do processo e se
+atualiza só com as linhas gravadas desde a última sincronização
+(``armazenamento.alterados_desde``); recomeça do zero quando uma campanha sai
+do banco (``armazenamento.arquivamentos``).
+"""
+import threading
+from collections import defaultdict
+
+from sac_core import perfil
+from sac_core.armazenamento import ARQUIVO_DB, alterados_desde, arquivamentos
+from sac_core.registro import normalizar
+
+TAMANHO_PAGINA = 50
+_SEPARADOR = "\x00"   # impede que um trecho case atravessando nome e matrícula
+
+def _trigramas(texto: str) -> set:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class IndiceBusca:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limpar()
+
+    def _limpar(self):
+        self.rev = -1
+        self.arquivamentos = 0
+        self._docs = {}                        # seq -> (registro_id, nome, matricula, semestre, chave normalizada)
+        self._trigramas = defaultdict(set)     # trigrama -> {seq}
+        self._por_semestre = defaultdict(set)  # semestre -> {seq}
+
+    def _remover(self, seq: int):
+        antigo = self._docs.pop(seq, None)
+        if antigo is None:
+            return
+        for tg in _trigramas(antigo[4]):
+            self._trigramas[tg].discard(seq)
+        self._por_semestre[antigo[3]].discard(seq)
+
+    def atualizar(self, seq: int, registro_id: str, nome, matricula, semestre):
+        chave = normalizar(nome) + _SEPARADOR + normalizar(matricula)
+        self._remover(seq)
+        self._docs[seq] = (registro_id, nome or "", matricula or "", semestre, chave)
+        for tg in _trigramas(chave):
+            self._trigramas[tg].add(seq)
+        self._por_semestre[semestre].add(seq)
+
+    @perfil.cronometrado("busca:sincronizar")
+    def sincronizar(self, caminho: str = ARQUIVO_DB):
+        """Aplica só as linhas gravadas desde a última chamada."""
+        with self._lock:
+            n = arquivamentos(caminho)
+            if n != self.arquivamentos:   # linhas saíram do banco
+                self._limpar()
+                self.arquivamentos = n
+            for seq, registro_id, nome, matricula, semestre, rev in alterados_desde(self.rev, caminho):
+                self.atualizar(seq, registro_id, nome, matricula, semestre)
+                self.rev = max(self.rev, rev)
+
+    @perfil.cronometrado("busca:buscar")
+    def buscar(self, termo: str = "", semestre: str = None, pagina: int = 0, tamanho: int = TAMANHO_PAGINA):
+        """Devolve ``(página de (registro_id, nome, matricula), total)`` em ordem de inserção."""
+        t = normalizar(termo)
+        with self._lock:
+            if semestre is not None:
+                candidatos = set(self._por_semestre.get(semestre, ()))
+            else:
+                candidatos = None
+            if len(t) >= 3:
+                for tg in sorted(_trigramas(t), key=lambda g: len(self._trigramas.get(g, ()))):
+                    postings = self._trigramas.get(tg, set())
+                    candidatos = set(postings) if candidatos is None else candidatos & postings
+                    if not candidatos:
+                        break
+            if candidatos is None:
+                candidatos = self._docs.keys()
+            achados = sorted(s for s in candidatos if not t or t in self._docs[s][4])
+            inicio = pagina * tamanho
+            pagina_docs = [self._docs[s][:3] for s in achados[inicio:inicio + tamanho]]
+        return pagina_docs, len(achados)
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+def indice_busca(caminho: str = ARQUIVO_DB) -> IndiceBusca:
+    """Índice compartilhado pelo processo, já sincronizado com o banco."""
+    with _lock_indices:
+        indice = _indices.get(caminho)
+        if indice is None:
+            indice = _indices[caminho] = IndiceBusca()
+    indice.sincronizar(caminho)
+    return indice
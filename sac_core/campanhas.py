@@ -0,0 +1,50 @@
+"""Campanhas: os períodos de coleta, pela data do registro ("2025.1" = jan–jun, "2025.2" = jul–dez).
+
+Cada linha do banco guarda a sua campanha (coluna indexada ``campanha``). Uma
+campanha encerrada pode ser arquivada: os registros saem do banco para um
+arquivo SQLite à parte (``<banco>.campanhas/2024.2.arquivada.sqlite3``), com
+as mesmas tabelas e índices, o JSON de cada registro comprimido e agregados
+próprios, aberto só para leitura. O banco fica só com o que está em
+andamento, então o que as telas carregam não cresce com o histórico; o Painel
+lê uma campanha arquivada quando ela é escolhida na barra lateral, e a
+progressão por discente consulta os arquivos também. Reabrir devolve os
+registros ao banco (editáveis) e apaga o arquivo.
+
+Uso:
+    python -m sac_core.campanhas                        # campanhas e nº de registros
+    python -m sac_core.campanhas --arquivar 2024.2
+    python -m sac_core.campanhas --arquivar-encerradas
+    python -m sac_core.campanhas --reabrir 2024.2
+"""
+import re
+
+from sac_core.registro import obter_hora_ceara
+
+def campanha_de(data_registro):
+    """"AAAA.1" ou "AAAA.2" a partir de "AAAA-MM-DD..." (None se a data não estiver nesse formato)."""
+    m = re.match(r"(\d{4})-(\d{2})", str(data_registro or ""))
+    return f"{m[1]}.{1 if int(m[2]) <= 6 else 2}" if m else None
+
+def campanha_atual() -> str:
+    return campanha_de(obter_hora_ceara())
+
+def main():
+    import argparse
+    from sac_core.armazenamento import ARQUIVO_DB, arquivar_campanha, campanhas, reabrir_campanha
+    ap = argparse.ArgumentParser(description="Campanhas de coleta: lista, arquiva as encerradas ou reabre.")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--arquivar", action="append", default=[], metavar="CAMPANHA")
+    ap.add_argument("--arquivar-encerradas", action="store_true", help="arquiva todas as campanhas do banco, menos a atual")
+    ap.add_argument("--reabrir", action="append", default=[], metavar="CAMPANHA")
+    args = ap.parse_args()
+    alvos = args.arquivar + ([c for c, _, arquivada in campanhas(args.banco)
+                              if not arquivada and c and c != campanha_atual()] if args.arquivar_encerradas else [])
+    for campanha in alvos:
+        print(f"{campanha}: {arquivar_campanha(campanha, args.banco)} registro(s) arquivado(s)")
+    for campanha in args.reabrir:
+        print(f"{campanha}: {reabrir_campanha(campanha, args.banco)} registro(s) de volta ao banco")
+    for campanha, n, arquivada in campanhas(args.banco):
+        print(f"{campanha or 'sem data':>9}  {n:>7} registro(s)  {'arquivada' if arquivada else 'no banco'}")
+
+if __name__ == "__main__":
+    main()
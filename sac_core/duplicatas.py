@@ -0,0 +1,82 @@
+"""Transcrições em duplicidade: a mesma folha digitada duas vezes.
+
+Cada linha de ``registros`` guarda duas chaves, indexadas e mantidas a cada
+gravação (ver ``registro.chave_identidade`` e ``registro.impressao_conteudo``):
+
+* identidade – matrícula normalizada + semestre (o mesmo discente no mesmo semestre);
+* impressão  – hash das notas e das reflexões normalizadas (o mesmo conteúdo,
+  ainda que com nome ou matrícula digitados de outro jeito).
+
+Antes de salvar, ``verificar`` faz duas buscas por índice (custo constante); o
+relatório agrupa o banco inteiro por chave numa passada, sem comparar pares.
+
+Uso:  python -m sac_core.duplicatas [--relatorio duplicatas.csv]
+"""
+import csv
+
+from sac_core.armazenamento import ARQUIVO_DB, CSV_ENCODING, conectar
+from sac_core.registro import chave_identidade, impressao_conteudo
+
+MOTIVOS = {"chave_identidade": "mesma matrícula e semestre", "impressao": "mesmo conteúdo (notas e reflexões)"}
+COLUNAS_RELATORIO = ["Grupo", "Motivo", "Registro_ID", "Nome", "Matricula", "Semestre", "Petiano_Responsavel", "Data_Registro"]
+
+_CAMPOS_SQL = ("registro_id, nome, matricula, semestre, json_extract(dados, '$.Petiano_Responsavel'), data_registro")
+
+def _linha(valores) -> dict:
+    return dict(zip(COLUNAS_RELATORIO[2:], valores))
+
+def verificar(dados: dict, caminho: str = ARQUIVO_DB) -> list:
+    """Registros já gravados que parecem a mesma transcrição de ``dados`` (cada um com ``Motivos``)."""
+    con = conectar(caminho)
+    achados = {}
+    for coluna, valor in (("chave_identidade", chave_identidade(dados)), ("impressao", impressao_conteudo(dados))):
+        if valor is None:
+            continue
+        for linha in con.execute(f"SELECT {_CAMPOS_SQL} FROM registros WHERE {coluna} = ? ORDER BY seq", (valor,)):
+            if linha[0] == dados.get("Registro_ID"):
+                continue
+            achados.setdefault(linha[0], {**_linha(linha), "Motivos": []})["Motivos"].append(MOTIVOS[coluna])
+    return list(achados.values())
+
+def relatorio(caminho: str = ARQUIVO_DB) -> list:
+    """Grupos de duplicatas do banco: ``[{"motivo", "chave", "registros": [...]}]``, os maiores primeiro."""
+    con = conectar(caminho)
+    grupos = []
+    for coluna, motivo in MOTIVOS.items():
+        atual = None
+        for chave, *resto in con.execute(
+                f"SELECT {coluna}, {_CAMPOS_SQL} FROM registros WHERE {coluna} IN "
+                f"(SELECT {coluna} FROM registros WHERE {coluna} IS NOT NULL GROUP BY {coluna} HAVING COUNT(*) > 1) "
+                f"ORDER BY {coluna}, seq"):
+            if atual is None or atual["chave"] != chave:
+                atual = {"motivo": motivo, "chave": chave, "registros": []}
+                grupos.append(atual)
+            atual["registros"].append(_linha(resto))
+    return sorted(grupos, key=lambda g: -len(g["registros"]))
+
+def linhas_relatorio(grupos: list) -> list:
+    """Uma linha por registro (colunas de ``COLUNAS_RELATORIO``), grupos numerados a partir de 1."""
+    return [{"Grupo": i, "Motivo": g["motivo"], **r} for i, g in enumerate(grupos, start=1) for r in g["registros"]]
+
+def escrever_relatorio(grupos: list, destino: str):
+    with open(destino, "w", newline="", encoding=CSV_ENCODING) as f:
+        w = csv.DictWriter(f, fieldnames=COLUNAS_RELATORIO)
+        w.writeheader()
+        w.writerows(linhas_relatorio(grupos))
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Relatório de transcrições em duplicidade.")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--relatorio", help="CSV com um registro por linha, agrupados")
+    args = ap.parse_args()
+    grupos = relatorio(args.banco)
+    for motivo in MOTIVOS.values():
+        do_motivo = [g for g in grupos if g["motivo"] == motivo]
+        print(f"{motivo}: {len(do_motivo)} grupo(s), {sum(len(g['registros']) for g in do_motivo)} registro(s)")
+    if args.relatorio:
+        escrever_relatorio(grupos, args.relatorio)
+        print(f"Relatório em {args.relatorio}")
+
+if __name__ == "__main__":
+    main()
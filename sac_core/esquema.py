@@ -0,0 +1,206 @@
+"""Esquema do questionário: seções, listas fixas, questões e tipos das colunas.
+
+Daqui saem as colunas do registro e a representação tipada usada pelo Painel:
+notas como inteiros pequenos anuláveis (N/A → ausente), colunas de baixa
+cardinalidade como categorias e textos livres apenas quando pedidos.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from sac_core import perfil
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SECOES = ["1. Gerais", "2. Específicas", "3. Básicas", "4. Profissionais", "5. Avançadas", "6. Reflexão"]
+
+LISTA_PETIANOS = sorted(["", "Ana Carolina", "Ana Clara", "Ana Júlia", "Eric Rullian", "Gildelandio Junior", "Lucas Mossmann (trainee)", "Pedro Paulo"])
+LISTA_SEMESTRES = [f"{i}º Semestre" for i in range(1, 11)]
+LISTA_CURRICULOS = ["Novo (2023.1)", "Antigo (2005.1)", "Troca de Matriz (Velha -> Nova)"]
+
+NOTA_LABELS = ["N/A", "0", "1", "2", "3", "4", "5"]
+
+ORDEM_QUESTOES = [
+    # 1. Gerais
+    ("q1",  "Projetar e conduzir experimentos e interpretar resultados"),
+    ("q2",  "Desenvolver e/ou utilizar novas ferramentas e técnicas"),
+    ("q3",  "Conceber, projetar e analisar sistemas, produtos e processos"),
+    ("q4",  "Formular, conceber e avaliar soluções para problemas de engenharia"),
+    ("q5",  "Analisar e compreender fenômenos físicos e químicos através de modelos"),
+    ("q6",  "Comunicação técnica"),
+    ("q7",  "Trabalhar e liderar equipes profissionais"),
+    ("q8",  "Aplicar ética e legislação no exercício profissional"),
+    # 2. Específicas
+    ("q9",  "Aplicar conhecimentos matemáticos, científicos e tecnológicos"),
+    ("q10", "Compreender e modelar transferência de quantidade de movimento, calor e massa"),
+    ("q11", "Aplicar conhecimentos de fenômenos de transporte ao projeto"),
+    ("q12", "Compreender mecanismos de transformação da matéria e energia"),
+    ("q13", "Projetar sistemas de recuperação, separação e purificação"),
+    ("q14", "Compreender mecanismos cinéticos de reações químicas"),
+    ("q15", "Projetar e otimizar sistemas reacionais e reatores"),
+    ("q16", "Projetar sistemas de controle de processos industriais"),
+    ("q17", "Projetar e otimizar plantas industriais considerando ambiente e segurança"),
+    ("q18", "Aplicação de conhecimentos em projeto básico e dimensionamento"),
+    ("q19", "Execução de projetos de produção e melhorias de processos"),
+    # 3. Básicas
+    ("calc_21",   "Cálculo: Analisar grandes volumes de dados"),
+    ("calc_52",   "Cálculo: Formação Básica"),
+    ("fis_22",    "Física: Analisar criticamente a operação e manutenção de sistemas"),
+    ("fis_53",    "Física: Ciência da Engenharia"),
+    ("qui_23",    "Química: Aplicar conhecimentos de transformação a processos"),
+    ("qui_24",    "Química: Conceber e desenvolver produtos e processos"),
+    ("termo_25",  "Termodinâmica: Projetar sistemas de suprimento energético"),
+    ("termo_54",  "Termodinâmica: Ciência da Engenharia Química"),
+    ("ft_26",     "Fenômenos de Transporte: Aplicar conhecimentos de fenômenos de transporte"),
+    ("ft_27",     "Fenômenos de Transporte: Comunicação técnica e recursos gráficos"),
+    ("mecflu_28", "Mecânica dos Fluidos: Implantar, implementar e controlar soluções"),
+    ("mecflu_29", "Mecânica dos Fluidos: Operar e supervisionar instalações"),
+    # 4. Profissionais
+    ("op1_30",  "Operações Unitárias I: Inspecionar manutenção"),
+    ("op1_55",  "Operações Unitárias I: Tecnologia Industrial"),
+    ("op2_31",  "Operações Unitárias II: Elaborar estudos ambientais"),
+    ("op2_32",  "Operações Unitárias II: Projetar tratamento ambiental"),
+    ("reat_33", "Reatores Químicos: Gerir recursos"),
+    ("reat_34", "Reatores Químicos: Controle de qualidade"),
+    ("ctrl_35", "Controle de Processos: Supervisão"),
+    ("ctrl_36", "Projetos: Gestão de empreendimentos"),
+    ("proj_56", "Projetos: Gestão Industrial"),
+    ("proj_57", "Projetos: Ética e Humanidades"),
+    # 5. Avançadas
+    ("econ_37",  "Engenharia Econômica: Novos conceitos"),
+    ("econ_38",  "Engenharia Econômica: Visão global"),
+    ("gest_39",  "Gestão da Produção: Comprometimento"),
+    ("gest_40",  "Gestão da Produção: Resultados"),
+    ("amb_41",   "Engenharia Ambiental: Inovação"),
+    ("amb_42",   "Engenharia Ambiental: Novas situações"),
+    ("seg_43",   "Segurança: Incertezas"),
+    ("seg_44",   "Segurança: Decisão"),
+    ("lab_45",   "Laboratório: Criatividade"),
+    ("lab_46",   "Laboratório: Relacionamento"),
+    ("est_47",   "Estágio: Autocontrole emocional"),
+    ("est_48",   "Estágio: Capacidade empreendedora"),
+    ("bio_49",   "Biotecnologia: Dados"),
+    ("bio_50",   "Biotecnologia: Ferramentas"),
+    ("petro_51", "Petróleo: Recuperação"),
+    ("petro_52", "Petróleo: Reatores"),
+    ("poli_53",  "Polímeros: Cinética"),
+    ("poli_54",  "Polímeros: Produtos"),
+    ("cat_55",   "Catálise: Mecanismos de transformação"),
+    ("cat_56",   "Catálise: Aplicar na produção"),
+    ("sim_57",   "Simulação: Dados"),
+    ("sim_58",   "Simulação: Comunicação"),
+    ("otim_59",  "Otimização: Soluções"),
+    ("otim_60",  "Otimização: Modelos"),
+    ("tcc_61",   "TCC: Comunicação"),
+    ("tcc_62",   "TCC: Liderança"),
+    # 6. Reflexão – Geral
+    ("q20_indiv","Capacidade de aprender rapidamente novos conceitos (Geral)")
+]
+
+ID_PARA_LABEL = {id_: f"Questão {i+1}" for i, (id_, _) in enumerate(ORDEM_QUESTOES)}
+ID_PARA_TEXTO = {id_: titulo for (id_, titulo) in ORDEM_QUESTOES}
+
+# questões de cada seção (a 6ª seção traz só a questão geral; o resto são textos abertos)
+QUESTOES_POR_SECAO = {
+    SECOES[0]: ORDEM_QUESTOES[:8],
+    SECOES[1]: ORDEM_QUESTOES[8:19],
+    SECOES[2]: ORDEM_QUESTOES[19:31],
+    SECOES[3]: ORDEM_QUESTOES[31:41],
+    SECOES[4]: ORDEM_QUESTOES[41:-1],
+    SECOES[5]: ORDEM_QUESTOES[-1:],
+}
+
+TITULOS_SECOES = {
+    SECOES[0]: "1. COMPETÊNCIAS TÉCNICAS E GERAIS",
+    SECOES[1]: "2. COMPETÊNCIAS ESPECÍFICAS",
+    SECOES[2]: "3. DISCIPLINAS BÁSICAS",
+    SECOES[3]: "4. DISCIPLINAS PROFISSIONALIZANTES",
+    SECOES[4]: "5. DISCIPLINAS AVANÇADAS",
+    SECOES[5]: "6. REFLEXÃO FINAL E AUTOAVALIAÇÃO",
+}
+
+# ==============================================================================
+# COLUNAS DO REGISTRO
+# ==============================================================================
+IDS_QUESTOES = [id_ for id_, _ in ORDEM_QUESTOES]
+COLUNAS_CATEGORICAS = ["Semestre", "Curriculo", "Petiano_Responsavel"]
+# coluna -> rótulo do campo na tela
+ROTULOS_REFLEXAO = {
+    "Autoavaliação: Pontos Fortes": "Pontos Fortes",
+    "Autoavaliação: Pontos a Desenvolver": "Pontos a Desenvolver",
+    "Contribuição Prática": "Contribuição Prática",
+    "Exemplos de Aplicação": "Exemplos de Aplicação",
+    "Competências Futuras": "Competências Futuras",
+    "Plano de Desenvolvimento": "Plano de Desenvolvimento",
+    "Observações Finais": "Comentários Finais",
+}
+COLUNAS_REFLEXAO = list(ROTULOS_REFLEXAO)
+
+# ordem canônica das colunas do registro (exportações)
+COLUNAS_IDENTIFICACAO = ["Registro_ID", "Petiano_Responsavel", "Nome", "Matricula", "Semestre", "Curriculo", "Data_Registro"]
+COLUNAS_REGISTRO = COLUNAS_IDENTIFICACAO + COLUNAS_REFLEXAO + [c for q in IDS_QUESTOES for c in (q, f"Obs_{q}")]
+
+# ==============================================================================
+# VERSÃO DO ESQUEMA
+# ==============================================================================
+# Suba ao mudar ids ou textos das questões, os currículos ou o formato de algum
+# campo, e registre em ``sac_core.migracoes`` como levar um registro da versão
+# anterior para a nova. Cada registro guarda a versão em que foi gravado.
+VERSAO_ESQUEMA = 1
+# marca da versão em que um registro novo foi montado (tela, fila); sai antes de gravar.
+# Quem chega sem ela (CSV antigo, planilhas) passa por todas as migrações.
+CAMPO_VERSAO = "_esquema"
+
+def definicao_esquema() -> dict:
+    """O questionário desta versão, como fica guardado no banco (tabela ``esquemas``)."""
+    return {
+        "questoes": [list(q) for q in ORDEM_QUESTOES],
+        "curriculos": LISTA_CURRICULOS,
+        "reflexao": COLUNAS_REFLEXAO,
+    }
+
+def eh_coluna_texto_livre(coluna: str) -> bool:
+    """Reflexões e observações por questão (Obs_*): pesadas e só usadas sob demanda."""
+    return coluna in COLUNAS_REFLEXAO or coluna.startswith("Obs_")
+
+_NOTAS_VALIDAS = NOTA_LABELS[1:]   # "0".."5": o código da categoria é a própria nota
+
+def notas_para_int8(serie: pd.Series) -> pd.Series:
+    """Texto "0".."5" → Int8; "N/A", vazio ou qualquer outro valor → <NA>. Sem parse numérico."""
+    import pandas as pd
+    codigos = pd.Categorical(serie, categories=_NOTAS_VALIDAS).codes
+    return pd.Series(pd.arrays.IntegerArray(codigos, codigos < 0), index=serie.index, name=serie.name)
+
+@perfil.cronometrado()
+def tipar_dataframe(df: pd.DataFrame, incluir_textos: bool = False) -> pd.DataFrame:
+    """Converte o DataFrame todo-texto do banco para a forma compacta.
+
+    Notas viram ``Int8`` (N/A e valores inválidos → <NA>), Semestre/Curriculo/
+    Petiano_Responsavel viram ``category`` e, sem ``incluir_textos``, as colunas
+    de texto livre ficam de fora.
+    """
+    import pandas as pd
+    if df.empty:
+        return df
+    colunas = [c for c in df.columns if incluir_textos or not eh_coluna_texto_livre(c)]
+    tipado = {}
+    for c in colunas:
+        if c in ID_PARA_LABEL:
+            tipado[c] = notas_para_int8(df[c])
+        elif c in COLUNAS_CATEGORICAS:
+            tipado[c] = df[c].astype("category")
+        else:
+            tipado[c] = df[c]
+    return pd.DataFrame(tipado, index=df.index)
+
+def ler_csv_tipado(caminho: str, encoding: str = "utf-8-sig") -> pd.DataFrame:
+    """Lê um CSV no formato do banco já na forma compacta, sem as colunas de texto livre."""
+    import pandas as pd
+    colunas = [c for c in pd.read_csv(caminho, nrows=0, encoding=encoding).columns if not eh_coluna_texto_livre(c)]
+    dtypes = {c: "category" for c in colunas if c in ID_PARA_LABEL or c in COLUNAS_CATEGORICAS}
+    df = pd.read_csv(caminho, usecols=colunas, dtype=dtypes, keep_default_na=False, na_values=[""], encoding=encoding)
+    for c in df.columns:
+        if c in ID_PARA_LABEL:
+            df[c] = notas_para_int8(df[c].astype(str))
+    return df
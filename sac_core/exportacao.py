@@ -0,0 +1,210 @@
+"""Exportações do banco completo: CSV em blocos, Parquet/Feather e XLSX.
+
+Os registros são lidos do SQLite em blocos de ``TAMANHO_BLOCO`` dentro de uma
+única transação de leitura (retrato consistente) e escritos direto no arquivo,
+então o pico de memória é um bloco, qualquer que seja o tamanho do banco. O
+arquivo pronto fica em ``_exportacoes/`` com a ``versao_banco`` no nome:
+enquanto o banco não muda, baixar de novo só reabre o arquivo.
+
+Parquet/Feather: notas como ``int8`` (N/A → nulo), demais colunas texto.
+XLSX: openpyxl em modo write-only, cabeçalho formatado e congelado.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING
+
+from sac_core import perfil
+from sac_core.armazenamento import ARQUIVO_DB, CSV_ENCODING, conectar
+from sac_core.esquema import COLUNAS_REGISTRO, ID_PARA_LABEL, notas_para_int8
+from sac_core.migracoes import decodificar
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TAMANHO_BLOCO = 2000
+PASTA = "_exportacoes"
+
+FORMATOS = {   # formato -> (extensão, mime)
+    "csv": ("csv", "text/csv"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "feather": ("feather", "application/vnd.apache.arrow.file"),
+}
+
+_locks = {}
+_lock_locks = threading.Lock()
+
+def formatos_disponiveis() -> list:
+    """Formatos cujas dependências estão instaladas (Parquet/Feather pedem pyarrow)."""
+    try:
+        import pyarrow  # noqa: F401
+        return list(FORMATOS)
+    except ImportError:
+        return [f for f in FORMATOS if f not in ("parquet", "feather")]
+
+def _pasta(caminho: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(caminho)), PASTA)
+
+# ==============================================================================
+# LEITURA EM BLOCOS
+# ==============================================================================
+class _Leitura:
+    """Transação de leitura própria: versão, colunas e blocos saem do mesmo retrato do banco."""
+
+    def __init__(self, caminho: str):
+        self.con = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self.con.execute("BEGIN")
+        linha = self.con.execute("SELECT valor FROM meta WHERE chave = 'versao_banco'").fetchone()
+        self.versao = int(linha[0]) if linha else 0
+
+    def colunas(self) -> list:
+        """Ordem canônica do esquema + campos extras que existam em algum registro (CSV legado)."""
+        presentes = {k for (k,) in self.con.execute("SELECT DISTINCT j.key FROM registros, json_each(registros.dados) j")}
+        return [c for c in COLUNAS_REGISTRO if c in presentes] + sorted(presentes - set(COLUNAS_REGISTRO))
+
+    def lotes(self, tamanho: int = TAMANHO_BLOCO):
+        """Listas de registros (dicts) em ordem de inserção."""
+        cur = self.con.execute("SELECT dados, esquema FROM registros ORDER BY seq")
+        while True:
+            linhas = cur.fetchmany(tamanho)
+            if not linhas:
+                break
+            yield [decodificar(d, e) for d, e in linhas]
+
+    def blocos(self, colunas: list, tamanho: int = TAMANHO_BLOCO):
+        import pandas as pd
+        for lote in self.lotes(tamanho):
+            yield pd.DataFrame.from_records(lote, columns=colunas)
+
+    def fechar(self):
+        self.con.execute("COMMIT")
+        self.con.close()
+
+# ==============================================================================
+# ESCRITORES
+# ==============================================================================
+def _escrever_csv(leitura: _Leitura, destino: str) -> int:
+    import pandas as pd
+    colunas, n = leitura.colunas(), 0
+    with open(destino, "w", newline="", encoding=CSV_ENCODING) as f:   # BOM uma vez só, no início
+        for i, bloco in enumerate(leitura.blocos(colunas)):
+            bloco.to_csv(f, index=False, header=(i == 0))
+            n += len(bloco)
+        if n == 0:
+            pd.DataFrame(columns=colunas).to_csv(f, index=False)
+    return n
+
+def _esquema_arrow(colunas: list):
+    import pyarrow as pa
+    return pa.schema([(c, pa.int8() if c in ID_PARA_LABEL else pa.string()) for c in colunas])
+
+def _tabela_arrow(bloco: pd.DataFrame, esquema):
+    import pyarrow as pa
+    for c in bloco.columns:
+        if c in ID_PARA_LABEL:
+            bloco[c] = notas_para_int8(bloco[c].astype("string"))
+        else:
+            bloco[c] = bloco[c].astype("string")
+    return pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False)
+
+def _escrever_parquet(leitura: _Leitura, destino: str) -> int:
+    import pyarrow.parquet as pq
+    colunas = leitura.colunas()
+    esquema, n = _esquema_arrow(colunas), 0
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as w:
+        for bloco in leitura.blocos(colunas):
+            w.write_table(_tabela_arrow(bloco, esquema))
+            n += len(bloco)
+    return n
+
+def _escrever_feather(leitura: _Leitura, destino: str) -> int:
+    import pyarrow as pa
+    colunas = leitura.colunas()
+    esquema, n = _esquema_arrow(colunas), 0
+    with pa.OSFile(destino, "wb") as sink, \
+            pa.ipc.new_file(sink, esquema, options=pa.ipc.IpcWriteOptions(compression="zstd")) as w:
+        for bloco in leitura.blocos(colunas):
+            w.write_table(_tabela_arrow(bloco, esquema))
+            n += len(bloco)
+    return n
+
+def _escrever_xlsx(leitura: _Leitura, destino: str) -> int:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    colunas = leitura.colunas()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Respostas")
+    ws.freeze_panes = "A2"
+    for i, c in enumerate(colunas, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = 9 if c in ID_PARA_LABEL else 22
+    fonte, fundo = Font(bold=True, color="FFFFFF"), PatternFill("solid", fgColor="002060")
+    cabecalho = []
+    for c in colunas:
+        cel = WriteOnlyCell(ws, value=ID_PARA_LABEL.get(c, c))
+        cel.font, cel.fill, cel.alignment = fonte, fundo, Alignment(wrap_text=True, vertical="center")
+        cabecalho.append(cel)
+    ws.append(cabecalho)
+    notas = [c in ID_PARA_LABEL for c in colunas]
+    n = 0
+    for lote in leitura.lotes():   # direto dos dicts: sem DataFrame no caminho mais lento
+        for dados in lote:
+            ws.append([
+                int(v) if eh_nota and isinstance(v, str) and v.isdigit() else (v if v != "" else None)
+                for v, eh_nota in ((dados.get(c), e) for c, e in zip(colunas, notas))
+            ])
+        n += len(lote)
+    wb.save(destino)
+    return n
+
+_ESCRITORES = {"csv": _escrever_csv, "xlsx": _escrever_xlsx, "parquet": _escrever_parquet, "feather": _escrever_feather}
+
+# ==============================================================================
+# API
+# ==============================================================================
+def arquivo_exportado(formato: str, caminho: str = ARQUIVO_DB) -> str:
+    """Caminho do arquivo do banco completo em ``formato``, gerado só se ainda não existe para esta versão."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    with _lock_locks:
+        lock = _locks.setdefault((os.path.abspath(caminho), formato), threading.Lock())
+    conectar(caminho)   # banco antigo ganha as colunas novas (ex.: ``esquema``) antes da leitura própria
+    with lock, perfil.trecho(f"exportar:{formato}"):
+        leitura = _Leitura(caminho)
+        try:
+            pasta = _pasta(caminho)
+            base = os.path.splitext(os.path.basename(caminho))[0]
+            ext = FORMATOS[formato][0]
+            destino = os.path.join(pasta, f"{base}_v{leitura.versao}.{ext}")
+            if os.path.exists(destino):
+                return destino
+            os.makedirs(pasta, exist_ok=True)
+            tmp = f"{destino}.{os.getpid()}.tmp"
+            _ESCRITORES[formato](leitura, tmp)
+            os.replace(tmp, destino)
+        finally:
+            leitura.fechar()
+        for nome in os.listdir(pasta):   # versões antigas do mesmo formato
+            if nome.startswith(f"{base}_v") and nome.endswith(f".{ext}") and os.path.join(pasta, nome) != destino:
+                try: os.remove(os.path.join(pasta, nome))
+                except OSError: pass
+        return destino
+
+def main():
+    import argparse
+    import shutil
+    ap = argparse.ArgumentParser(description="Exporta o banco completo.")
+    ap.add_argument("formato", choices=list(FORMATOS))
+    ap.add_argument("destino")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    args = ap.parse_args()
+    shutil.copyfile(arquivo_exportado(args.formato, args.banco), args.destino)
+    print(f"Exportado em {args.destino}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Fila de gravação durável para o "FINALIZAR E SALVAR".
+
+Salvar só grava o registro num arquivo pequeno da fila (``<banco>.fila/``,
+um JSON por registro, escrito com fsync e renomeado no lugar) e já confirma
+para quem transcreve. Uma única thread de fundo esvazia a fila no banco em
+lotes de até ``LOTE`` registros por transação:
+
+* banco travado/sem permissão (ex.: aberto em outro programa) – o lote fica na
+  fila e é tentado de novo com espera crescente, até ``ESPERA_MAXIMA_S``;
+* registro que o banco recusa – vai para ``falhas/`` com o motivo ao lado,
+  sem travar os demais (``reenviar_falhas`` devolve para a fila).
+
+O arquivo só sai da fila depois do COMMIT, e o reenvio pula Registro_IDs já
+gravados; uma queda no meio do caminho não perde nem duplica nada. Ao
+reiniciar, ``iniciar`` esvazia o que ficou.
+
+Uso:  python -m sac_core.fila [--banco respostas_sac_deq.sqlite3]   # situação e esvaziamento
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from sac_core.armazenamento import ARQUIVO_DB, inserir_registros
+
+LOTE = 200
+ESPERA_MAXIMA_S = 60.0
+INTERVALO_S = 5.0                                 # varredura periódica, além do aviso de cada salvar
+_TRANSITORIOS = (sqlite3.OperationalError, OSError)   # banco travado, sem permissão, disco
+
+_lock_drenagem = threading.Lock()
+_lock_gravadores = threading.Lock()
+_gravadores = {}   # caminho -> threading.Event que acorda a thread
+_erros = {}        # caminho -> último erro transitório (None depois de um lote bem-sucedido)
+
+def pasta_fila(caminho: str = ARQUIVO_DB) -> str:
+    return caminho + ".fila"
+
+def _arquivos(pasta: str) -> list:
+    """JSONs da pasta, na ordem de chegada (o nome começa pelo instante em ns)."""
+    try:
+        return [os.path.join(pasta, n) for n in sorted(os.listdir(pasta)) if n.endswith(".json")]
+    except FileNotFoundError:
+        return []
+
+def _fsync_pasta(pasta: str):
+    if hasattr(os, "O_DIRECTORY"):   # POSIX; no Windows o os.replace já basta
+        fd = os.open(pasta, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+# ==============================================================================
+# ENFILEIRAR (caminho do botão de salvar)
+# ==============================================================================
+def enfileirar(dados: dict, caminho: str = ARQUIVO_DB) -> str:
+    """Grava o registro na fila, durável no disco, e acorda a thread; devolve o Registro_ID."""
+    dados = {**dados, "Registro_ID": dados.get("Registro_ID") or str(uuid.uuid4())}
+    pasta = pasta_fila(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, f"{time.time_ns():020d}-{dados['Registro_ID']}.json")
+    tmp = destino + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, destino)
+    _fsync_pasta(pasta)
+    iniciar(caminho)
+    _gravadores[caminho].set()
+    return dados["Registro_ID"]
+
+# ==============================================================================
+# ESVAZIAR (thread de fundo)
+# ==============================================================================
+def _para_falhas(arquivo: str, erro: Exception):
+    pasta = os.path.join(os.path.dirname(arquivo), "falhas")
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, os.path.basename(arquivo))
+    with open(destino + ".erro", "w", encoding="utf-8") as f:
+        f.write(f"{type(erro).__name__}: {erro}")
+    os.replace(arquivo, destino)
+
+def _gravar(lote: dict, caminho: str) -> int:
+    """Grava ``{arquivo: dados}`` numa transação; se o banco recusar o lote, isola o registro culpado."""
+    try:
+        gravados = len(inserir_registros(list(lote.values()), caminho, ignorar_existentes=True))
+    except _TRANSITORIOS:
+        raise
+    except Exception as e:
+        if len(lote) == 1:
+            _para_falhas(next(iter(lote)), e)
+            return 0
+        return sum(_gravar({arquivo: dados}, caminho) for arquivo, dados in lote.items())
+    for arquivo in lote:
+        os.remove(arquivo)
+    return gravados
+
+def drenar(caminho: str = ARQUIVO_DB) -> int:
+    """Passa tudo o que está na fila para o banco; devolve quantos registros entraram.
+
+    Erros transitórios sobem para quem chamou (a fila fica como estava).
+    """
+    total = 0
+    with _lock_drenagem:
+        while True:
+            lote = {}
+            for arquivo in _arquivos(pasta_fila(caminho))[:LOTE]:
+                try:
+                    with open(arquivo, encoding="utf-8") as f:
+                        lote[arquivo] = json.load(f)
+                except ValueError as e:   # ilegível: não adianta tentar de novo
+                    _para_falhas(arquivo, e)
+            if not lote:
+                return total
+            total += _gravar(lote, caminho)
+
+def _laco_gravador(caminho: str, acordar: threading.Event):
+    tentativas = 0
+    while True:
+        acordar.wait(min(2 ** tentativas, ESPERA_MAXIMA_S) if tentativas else INTERVALO_S)
+        acordar.clear()
+        try:
+            drenar(caminho)
+            tentativas, _erros[caminho] = 0, None
+        except Exception as e:
+            tentativas += 1
+            _erros[caminho] = f"{type(e).__name__}: {e}"
+
+def iniciar(caminho: str = ARQUIVO_DB):
+    """Sobe a thread que esvazia a fila deste banco (uma por processo); o que sobrou de antes entra já."""
+    if caminho in _gravadores:
+        return
+    with _lock_gravadores:
+        if caminho in _gravadores:
+            return
+        acordar = threading.Event()
+        acordar.set()
+        threading.Thread(target=_laco_gravador, args=(caminho, acordar), name="sac-fila-gravacao", daemon=True).start()
+        _gravadores[caminho] = acordar
+
+# ==============================================================================
+# SITUAÇÃO
+# ==============================================================================
+def situacao(caminho: str = ARQUIVO_DB) -> dict:
+    """``{"pendentes": n, "falhas": n, "erro": último erro transitório ou None}``."""
+    pasta = pasta_fila(caminho)
+    return {"pendentes": len(_arquivos(pasta)), "falhas": len(_arquivos(os.path.join(pasta, "falhas"))),
+            "erro": _erros.get(caminho)}
+
+def falhas(caminho: str = ARQUIVO_DB) -> list:
+    """``[(Nome, motivo)]`` dos registros que o banco recusou."""
+    achados = []
+    for arquivo in _arquivos(os.path.join(pasta_fila(caminho), "falhas")):
+        try:
+            with open(arquivo, encoding="utf-8") as f:
+                nome = json.load(f).get("Nome") or os.path.basename(arquivo)
+        except ValueError:
+            nome = os.path.basename(arquivo)
+        try:
+            with open(arquivo + ".erro", encoding="utf-8") as f:
+                motivo = f.read()
+        except FileNotFoundError:
+            motivo = ""
+        achados.append((nome, motivo))
+    return achados
+
+def reenviar_falhas(caminho: str = ARQUIVO_DB) -> int:
+    """Devolve as falhas para a fila (ex.: depois de corrigir o banco); devolve quantas."""
+    pasta = pasta_fila(caminho)
+    arquivos = _arquivos(os.path.join(pasta, "falhas"))
+    for arquivo in arquivos:
+        os.replace(arquivo, os.path.join(pasta, os.path.basename(arquivo)))
+        if os.path.exists(arquivo + ".erro"):
+            os.remove(arquivo + ".erro")
+    if arquivos:
+        iniciar(caminho)
+        _gravadores[caminho].set()
+    return len(arquivos)
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Situação da fila de gravação; grava no banco o que estiver pendente.")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--reenviar-falhas", action="store_true", help="devolve as falhas para a fila antes de esvaziar")
+    args = ap.parse_args()
+    if args.reenviar_falhas:
+        print(f"{reenviar_falhas(args.banco)} falha(s) devolvida(s) para a fila")
+    print(f"{drenar(args.banco)} registro(s) gravado(s) no banco")
+    s = situacao(args.banco)
+    print(f"pendentes: {s['pendentes']}  falhas: {s['falhas']}")
+    for nome, motivo in falhas(args.banco):
+        print(f"  ❌ {nome}: {motivo}")
+
+if __name__ == "__main__":
+    main()
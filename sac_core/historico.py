@@ -0,0 +1,204 @@
+"""Histórico das gravações: log só de inclusão, com reconstrução em qualquer momento.
+
+Toda gravação em ``registros`` deixa eventos na tabela ``historico``, na mesma
+transação: uma inclusão vira um evento ``*`` com o registro completo; uma
+edição, um evento por campo alterado (valor antigo e novo, em JSON). Gatilhos
+do SQLite recusam UPDATE/DELETE no log.
+
+Para reconstruir o banco inteiro num momento sem reaplicar o log todo, há fotos
+periódicas (``historico_fotos``: o estado completo, comprimido, até um evento);
+a reconstrução parte da última foto anterior ao momento e aplica só os eventos
+seguintes. Uma foto nova sai quando os eventos desde a última passam do nº de
+registros (mínimo ``FOTO_MINIMO``), então o custo das fotos acompanha o das
+gravações; ela é tirada fora da transação de quem salvou. Um registro sozinho
+sai direto dos seus eventos (índice por registro).
+
+Registros gravados antes do histórico entram como inclusões datadas pelo
+próprio Data_Registro; edições anteriores a isso não são conhecidas. Quando
+uma campanha é arquivada, cada registro dela ganha um evento ``-`` (sai do
+banco); ao reabrir, volta com uma nova inclusão.
+
+Uso:
+    python -m sac_core.historico --registro <Registro_ID>
+    python -m sac_core.historico --em "2025-03-01 18:00" --saida estado.csv
+"""
+import json
+import sqlite3
+import zlib
+
+from sac_core.registro import obter_hora_ceara
+
+ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS historico (
+    evento      INTEGER PRIMARY KEY AUTOINCREMENT,
+    registro_id TEXT NOT NULL,
+    momento     TEXT NOT NULL,
+    autor       TEXT,
+    campo       TEXT NOT NULL,
+    antigo      TEXT,
+    novo        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_historico_registro ON historico(registro_id, evento);
+CREATE INDEX IF NOT EXISTS idx_historico_momento ON historico(momento);
+CREATE TRIGGER IF NOT EXISTS historico_sem_update BEFORE UPDATE ON historico
+BEGIN SELECT RAISE(ABORT, 'historico é somente de inclusão'); END;
+CREATE TRIGGER IF NOT EXISTS historico_sem_delete BEFORE DELETE ON historico
+BEGIN SELECT RAISE(ABORT, 'historico é somente de inclusão'); END;
+CREATE TABLE IF NOT EXISTS historico_fotos (
+    evento    INTEGER PRIMARY KEY,
+    momento   TEXT NOT NULL,
+    registros INTEGER NOT NULL,
+    dados     BLOB NOT NULL
+);
+"""
+
+INCLUSAO = "*"      # campo do evento de inclusão (``novo`` = registro completo)
+ARQUIVAMENTO = "-"  # campo do evento de saída para o arquivo da campanha (``novo`` = campanha)
+FOTO_MINIMO = 2000  # eventos entre fotos, no mínimo
+
+def _json(valor):
+    return None if valor is None else json.dumps(valor, ensure_ascii=False)
+
+def _valor(texto):
+    return None if texto is None else json.loads(texto)
+
+def ate(momento: str) -> str:
+    """Completa um momento parcial até o fim do período ("2025-03-01" → "2025-03-01 23:59:59")."""
+    momento = momento.strip()
+    return momento + " 23:59:59"[len(momento) - 10:] if 10 <= len(momento) < 19 else momento
+
+# ==============================================================================
+# GRAVAÇÃO (dentro da transação de quem grava o registro)
+# ==============================================================================
+def registrar_inclusoes(con: sqlite3.Connection, registros):
+    agora = obter_hora_ceara()
+    con.executemany(
+        f"INSERT INTO historico (registro_id, momento, autor, campo, novo) VALUES (?, ?, ?, '{INCLUSAO}', ?)",
+        ((d["Registro_ID"], agora, d.get("Petiano_Responsavel"), _json(d)) for d in registros))
+
+def registrar_alteracao(con: sqlite3.Connection, antigo: dict, novo: dict, autor: str = None):
+    """Um evento por campo que mudou, com quem editou (NULL quando não se sabe; nunca o transcritor do registro)."""
+    campos = [k for k in novo if antigo.get(k) != novo[k]] + [k for k in antigo if k not in novo]
+    agora = obter_hora_ceara()
+    con.executemany(
+        "INSERT INTO historico (registro_id, momento, autor, campo, antigo, novo) VALUES (?, ?, ?, ?, ?, ?)",
+        ((novo["Registro_ID"], agora, autor, k, _json(antigo.get(k)), _json(novo.get(k))) for k in campos))
+
+def registrar_arquivamento(con: sqlite3.Connection, registro_ids, campanha: str):
+    agora = obter_hora_ceara()
+    con.executemany(
+        f"INSERT INTO historico (registro_id, momento, campo, novo) VALUES (?, ?, '{ARQUIVAMENTO}', ?)",
+        ((r, agora, _json(campanha)) for r in registro_ids))
+
+def registrar_existentes(con: sqlite3.Connection):
+    """Inclusões para os registros gravados antes do histórico (uma vez, na migração)."""
+    con.execute(
+        f"INSERT INTO historico (registro_id, momento, autor, campo, novo) "
+        f"SELECT registro_id, COALESCE(NULLIF(data_registro, ''), ?), json_extract(dados, '$.Petiano_Responsavel'), '{INCLUSAO}', dados "
+        f"FROM registros ORDER BY seq", (obter_hora_ceara(),))
+
+# ==============================================================================
+# FOTOS
+# ==============================================================================
+def foto_pendente(con: sqlite3.Connection) -> bool:
+    """Já há eventos demais desde a última foto? (três consultas O(1))."""
+    ultimo = con.execute("SELECT COALESCE(MAX(evento), 0) FROM historico").fetchone()[0]
+    ultima_foto = con.execute("SELECT COALESCE(MAX(evento), 0) FROM historico_fotos").fetchone()[0]
+    registros = con.execute("SELECT COALESCE(MAX(seq), 0) FROM registros").fetchone()[0]   # sem exclusões: ~nº de registros
+    return ultimo - ultima_foto >= max(FOTO_MINIMO, registros)
+
+def fotografar(con: sqlite3.Connection):
+    """Guarda o estado atual como foto do último evento.
+
+    A leitura é uma transação só de leitura (no modo WAL não trava quem grava
+    nesse meio-tempo) e a gravação da foto é um único INSERT; por isso pode
+    rodar fora da transação de quem salvou (ver ``armazenamento``).
+    """
+    con.execute("BEGIN")
+    try:
+        evento, momento = con.execute("SELECT COALESCE(MAX(evento), 0), MAX(momento) FROM historico").fetchone()
+        linhas = [d for (d,) in con.execute("SELECT dados FROM registros ORDER BY seq")] if evento else []
+    finally:
+        con.execute("COMMIT")
+    if evento:
+        con.execute("INSERT OR IGNORE INTO historico_fotos (evento, momento, registros, dados) VALUES (?, ?, ?, ?)",
+                    (evento, momento, len(linhas), zlib.compress(("[" + ",".join(linhas) + "]").encode("utf-8"))))
+
+# ==============================================================================
+# LEITURA / RECONSTRUÇÃO
+# ==============================================================================
+def eventos(con: sqlite3.Connection, registro_id: str) -> list:
+    """Eventos de um registro, do mais antigo ao mais recente (valores já decodificados)."""
+    return [{"evento": e, "momento": m, "autor": a, "campo": c, "antigo": _valor(v0), "novo": _valor(v1)}
+            for e, m, a, c, v0, v1 in con.execute(
+                "SELECT evento, momento, autor, campo, antigo, novo FROM historico WHERE registro_id = ? ORDER BY evento", (registro_id,))]
+
+def _aplicar(estado: dict, registro_id: str, campo: str, novo):
+    if campo == INCLUSAO:
+        estado[registro_id] = json.loads(novo)
+    elif campo == ARQUIVAMENTO:
+        estado.pop(registro_id, None)
+    elif registro_id in estado:
+        if novo is None:
+            estado[registro_id].pop(campo, None)
+        else:
+            estado[registro_id][campo] = json.loads(novo)
+
+def registro_em(con: sqlite3.Connection, registro_id: str, momento: str):
+    """O registro como estava em ``momento`` (None se ainda não existia ou estava arquivado)."""
+    estado = {}
+    for campo, novo in con.execute(
+            "SELECT campo, novo FROM historico WHERE registro_id = ? AND momento <= ? ORDER BY evento", (registro_id, ate(momento))):
+        _aplicar(estado, registro_id, campo, novo)
+    return estado.get(registro_id)
+
+def estado_em(con: sqlite3.Connection, momento: str) -> list:
+    """Todos os registros do banco como estavam em ``momento``, na ordem de inclusão: última foto + eventos seguintes.
+
+    Campanhas arquivadas naquele momento ficam de fora, como ficavam no banco.
+    """
+    momento = ate(momento)
+    foto = con.execute("SELECT evento, dados FROM historico_fotos WHERE momento <= ? ORDER BY evento DESC LIMIT 1",
+                       (momento,)).fetchone()
+    estado, desde = {}, 0
+    if foto:
+        estado = {d["Registro_ID"]: d for d in json.loads(zlib.decompress(foto[1]))}
+        desde = foto[0]
+    for registro_id, campo, novo in con.execute(
+            "SELECT registro_id, campo, novo FROM historico WHERE evento > ? AND momento <= ? ORDER BY evento", (desde, momento)):
+        _aplicar(estado, registro_id, campo, novo)
+    return list(estado.values())
+
+def main():
+    import argparse
+    import csv
+    from sac_core.armazenamento import ARQUIVO_DB, CSV_ENCODING, conectar, registros_em
+    from sac_core.esquema import COLUNAS_REGISTRO
+    ap = argparse.ArgumentParser(description="Histórico de gravações: eventos de um registro ou o banco num momento.")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--registro", help="lista os eventos deste Registro_ID")
+    ap.add_argument("--em", help='momento ("AAAA-MM-DD[ HH:MM[:SS]]") para reconstruir o banco')
+    ap.add_argument("--saida", help="CSV com o banco reconstruído (padrão: só o resumo)")
+    args = ap.parse_args()
+    con = conectar(args.banco)
+    if args.registro:
+        for ev in eventos(con, args.registro):
+            if ev["campo"] == INCLUSAO:
+                mudanca = "inclusão"
+            elif ev["campo"] == ARQUIVAMENTO:
+                mudanca = f"arquivado com a campanha {ev['novo']}"
+            else:
+                mudanca = f"{ev['campo']}: {ev['antigo']!r} -> {ev['novo']!r}"
+            print(f"{ev['momento']}  {ev['autor'] or '—'}  {mudanca}")
+    if args.em:
+        registros = registros_em(args.em, args.banco)   # já migrados para o esquema atual
+        print(f"{len(registros)} registro(s) em {ate(args.em)}")
+        if args.saida:
+            with open(args.saida, "w", newline="", encoding=CSV_ENCODING) as f:
+                w = csv.DictWriter(f, fieldnames=COLUNAS_REGISTRO, extrasaction="ignore")
+                w.writeheader()
+                w.writerows(registros)
+            print(f"Banco reconstruído em {args.saida}")
+
+if __name__ == "__main__":
+    main()
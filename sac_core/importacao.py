@@ -0,0 +1,194 @@
+"""Importação em lote de planilhas transcritas offline (XLSX ou CSV).
+
+As linhas são lidas uma a uma (openpyxl em modo somente-leitura; CSV em
+blocos), os cabeçalhos são casados com os ids de ``ORDEM_QUESTOES`` e com os
+campos de identificação, cada linha passa pela mesma validação do botão de
+salvar e as válidas entram no banco em transações de ``TAMANHO_LOTE``. A
+memória fica limitada a um lote, qualquer que seja o tamanho do arquivo: as
+rejeitadas vão direto para o relatório (só as ``ERROS_GUARDADOS`` primeiras
+voltam no resultado) e Registro_IDs repetidos são conferidos no banco, lote a
+lote, numa consulta só.
+
+As rejeições são identificadas pelo nº do registro no arquivo (cabeçalho = 1,
+linhas em branco contam): é a linha da planilha no Excel; num editor de texto,
+um campo com quebra de linha desloca a numeração dos seguintes.
+
+Uso:  python -m sac_core.importacao planilha.xlsx [--relatorio erros.csv]
+"""
+import codecs
+import csv
+import os
+import uuid
+
+from sac_core.armazenamento import ARQUIVO_DB, CSV_ENCODING, ids_existentes, inserir_registros
+from sac_core.esquema import ID_PARA_LABEL, ROTULOS_REFLEXAO
+from sac_core.registro import normalizar, normalizar_nota, obter_hora_ceara, validar_registro
+
+TAMANHO_LOTE = 500
+TAMANHO_BLOCO_CSV = 5000
+ERROS_GUARDADOS = 20   # rejeições devolvidas no resultado; as demais só no relatório
+CABECALHO_RELATORIO = ["Arquivo", "Registro", "Problemas"]
+
+# cabeçalho normalizado -> coluna do banco
+_APELIDOS = {
+    "registro_id": "Registro_ID",
+    "nome": "Nome", "nome do discente": "Nome", "discente": "Nome", "aluno": "Nome",
+    "matricula": "Matricula",
+    "semestre": "Semestre",
+    "curriculo": "Curriculo", "matriz": "Curriculo",
+    "petiano_responsavel": "Petiano_Responsavel", "petiano responsavel": "Petiano_Responsavel",
+    "responsavel": "Petiano_Responsavel", "petiano": "Petiano_Responsavel",
+    "data_registro": "Data_Registro",
+}
+for _coluna, _rotulo in ROTULOS_REFLEXAO.items():
+    _APELIDOS[normalizar(_coluna)] = _coluna
+    _APELIDOS[normalizar(_rotulo)] = _coluna
+for _id in ID_PARA_LABEL:
+    _APELIDOS[normalizar(_id)] = _id
+    _APELIDOS[normalizar(ID_PARA_LABEL[_id])] = _id      # "Questão 12"
+    _APELIDOS[normalizar(f"Obs_{_id}")] = f"Obs_{_id}"
+
+def mapear_cabecalho(cabecalho) -> list:
+    """Coluna do banco para cada posição do cabeçalho (None = ignorada)."""
+    return [_APELIDOS.get(normalizar(h)) if h is not None else None for h in cabecalho]
+
+def _texto(valor) -> str:
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)   # matrícula lida pelo Excel como número
+    return str(valor).strip()
+
+def montar_registro(colunas: list, valores) -> dict:
+    dados = {}
+    for coluna, valor in zip(colunas, valores):
+        if coluna is None:
+            continue
+        dados[coluna] = normalizar_nota(valor) if coluna in ID_PARA_LABEL else _texto(valor)
+    for q in ID_PARA_LABEL:
+        dados.setdefault(q, "N/A")
+    if not dados.get("Registro_ID"):
+        dados["Registro_ID"] = str(uuid.uuid4())
+    if not dados.get("Data_Registro"):
+        dados["Data_Registro"] = obter_hora_ceara()
+    return dados
+
+# ==============================================================================
+# LEITORES (linha a linha)
+# ==============================================================================
+def _linhas_xlsx(origem):
+    from openpyxl import load_workbook
+    wb = load_workbook(origem, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+def _linhas_csv(origem, encoding: str):
+    import pandas as pd
+    # linhas em branco vêm vazias (e são puladas adiante) para a numeração bater com a do Excel
+    blocos = pd.read_csv(origem, dtype=str, keep_default_na=False, header=None, skip_blank_lines=False,
+                         chunksize=TAMANHO_BLOCO_CSV, encoding=encoding)
+    for bloco in blocos:
+        yield from bloco.to_numpy(dtype=object).tolist()
+
+def ler_linhas(origem, nome: str = None):
+    """Gera as linhas (cabeçalho primeiro) de um .xlsx ou .csv; ``origem`` pode ser caminho ou arquivo aberto."""
+    nome = (nome or getattr(origem, "name", None) or str(origem)).lower()
+    if nome.endswith((".xlsx", ".xlsm")):
+        return _linhas_xlsx(origem)
+    if hasattr(origem, "read"):
+        return _linhas_csv(origem, CSV_ENCODING)
+    return _linhas_csv(origem, _detectar_encoding(origem))
+
+def _detectar_encoding(caminho: str) -> str:
+    """UTF-8 se o arquivo inteiro decodifica (lido em blocos); senão latin-1, que aceita qualquer byte."""
+    decodificador = codecs.getincrementaldecoder(CSV_ENCODING)()
+    try:
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                decodificador.decode(bloco)
+            decodificador.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return CSV_ENCODING
+
+# ==============================================================================
+# PIPELINE
+# ==============================================================================
+def importar_planilha(origem, caminho: str = ARQUIVO_DB, nome: str = None, tamanho_lote: int = TAMANHO_LOTE,
+                      relatorio=None) -> dict:
+    """Importa um arquivo; devolve ``{"importados", "rejeitados", "erros": [(registro, [problemas])], "ignoradas": [cabeçalhos]}``.
+
+    ``erros`` traz só as ``ERROS_GUARDADOS`` primeiras rejeições; todas vão
+    para ``relatorio`` (``escritor_relatorio``), se houver, à medida que surgem.
+    """
+    arquivo = os.path.basename(nome or getattr(origem, "name", None) or str(origem))
+    linhas = iter(ler_linhas(origem, nome))
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        return {"importados": 0, "rejeitados": 0, "erros": [], "ignoradas": []}
+    colunas = mapear_cabecalho(cabecalho)
+    ignoradas = [str(h) for h, c in zip(cabecalho, colunas) if c is None and h not in (None, "")]
+    importados, rejeitados, erros, pendentes = 0, 0, [], []
+
+    def processar():
+        """Confere os IDs do lote no banco (os lotes anteriores já estão lá), grava as válidas e relata as demais."""
+        nonlocal importados, rejeitados
+        existentes, vistos, validos = ids_existentes([d["Registro_ID"] for _, d, _ in pendentes], caminho), set(), []
+        for n_registro, dados, problemas in pendentes:
+            rid = dados["Registro_ID"]
+            if rid in existentes or rid in vistos:
+                problemas.append(f"Registro_ID {rid} já existe")
+            vistos.add(rid)
+            if not problemas:
+                validos.append(dados)
+                continue
+            rejeitados += 1
+            if len(erros) < ERROS_GUARDADOS:
+                erros.append((n_registro, problemas))
+            if relatorio is not None:
+                relatorio.writerow([arquivo, n_registro, "; ".join(problemas)])
+        if validos:
+            importados += len(inserir_registros(validos, caminho))
+        pendentes.clear()
+
+    for n_registro, valores in enumerate(linhas, start=2):
+        if not any(_texto(v) for v in valores):
+            continue   # linha em branco
+        dados = montar_registro(colunas, valores)
+        pendentes.append((n_registro, dados, validar_registro(dados)))
+        if len(pendentes) >= tamanho_lote:
+            processar()
+    if pendentes:
+        processar()
+    return {"importados": importados, "rejeitados": rejeitados, "erros": erros, "ignoradas": ignoradas}
+
+def escritor_relatorio(arquivo):
+    """``csv.writer`` do relatório de rejeições sobre um arquivo de texto aberto, já com o cabeçalho."""
+    w = csv.writer(arquivo)
+    w.writerow(CABECALHO_RELATORIO)
+    return w
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Importa planilhas (XLSX/CSV) transcritas offline.")
+    ap.add_argument("arquivos", nargs="+")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--relatorio", help="CSV com as linhas rejeitadas e o motivo")
+    args = ap.parse_args()
+    from contextlib import nullcontext
+    with open(args.relatorio, "w", newline="", encoding=CSV_ENCODING) if args.relatorio else nullcontext() as f:
+        relatorio = escritor_relatorio(f) if f else None
+        for arq in args.arquivos:
+            r = importar_planilha(arq, args.banco, relatorio=relatorio)
+            print(f"{os.path.basename(arq)}: {r['importados']} importado(s), {r['rejeitados']} rejeitado(s)")
+            if r["ignoradas"]:
+                print(f"  colunas ignoradas: {', '.join(r['ignoradas'])}")
+            for n_registro, problemas in r["erros"]:
+                print(f"  registro {n_registro}: {', '.join(problemas)}")
+            if r["rejeitados"] > len(r["erros"]):
+                print(f"  ... e mais {r['rejeitados'] - len(r['erros'])}" + (f" (todas em {args.relatorio})" if f else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Migrações dos registros entre versões do esquema (``esquema.VERSAO_ESQUEMA``).
+
+Cada migração é uma função ``dados -> dados`` registrada com ``@migracao(n)``:
+leva um registro da versão ``n - 1`` para a ``n``. Ela precisa ser idempotente
+(aplicada a um registro já na versão ``n``, não muda nada), porque entradas
+sem versão conhecida – importações, versões antigas vindas do histórico –
+passam por todas.
+
+Nada é regravado de uma vez: quem lê do banco recebe o registro já migrado
+(``decodificar``, em memória) e toda gravação guarda a versão atual. Para
+trazer o banco inteiro para a versão atual há uma passada única em lotes,
+que também acerta agregados, chaves de duplicata e histórico:
+
+    python -m sac_core.migracoes [--banco ...]
+"""
+import json
+import zlib
+
+from sac_core.esquema import IDS_QUESTOES, LISTA_CURRICULOS, VERSAO_ESQUEMA
+from sac_core.registro import normalizar, normalizar_nota
+
+MIGRACOES = {}   # versão de destino -> função
+
+def migracao(versao: int):
+    def registrar(funcao):
+        if versao in MIGRACOES:
+            raise ValueError(f"Migração para a versão {versao} registrada duas vezes.")
+        MIGRACOES[versao] = funcao
+        return funcao
+    return registrar
+
+def migrar(dados: dict, versao: int = 0) -> dict:
+    """O registro (gravado na ``versao``) levado até ``VERSAO_ESQUEMA``; o dict recebido não é alterado."""
+    for destino in range(versao + 1, VERSAO_ESQUEMA + 1):
+        dados = MIGRACOES[destino](dict(dados))
+    return dados
+
+def decodificar(texto: str, versao: int) -> dict:
+    """JSON da coluna ``dados`` (comprimido nas campanhas arquivadas) → registro na versão atual (sem custo extra se já está nela)."""
+    dados = json.loads(zlib.decompress(texto) if isinstance(texto, bytes) else texto)
+    return dados if versao >= VERSAO_ESQUEMA else migrar(dados, versao)
+
+# ==============================================================================
+# MIGRAÇÕES
+# ==============================================================================
+# currículo como aparecia em planilhas e no CSV antigo (1ª palavra normalizada) -> rótulo atual
+_CURRICULOS_ANTIGOS = {normalizar(c).split()[0]: c for c in LISTA_CURRICULOS}
+
+@migracao(1)
+def _v1_notas_e_curriculo(dados: dict) -> dict:
+    """Registros anteriores ao esquema versionado (CSV antigo): notas como "3.0"/"nan"/vazio e currículos abreviados."""
+    for q in IDS_QUESTOES:
+        if q in dados:
+            dados[q] = normalizar_nota(dados[q])
+    curriculo = dados.get("Curriculo")
+    if curriculo and curriculo not in LISTA_CURRICULOS:
+        palavras = normalizar(curriculo).split()
+        dados["Curriculo"] = _CURRICULOS_ANTIGOS.get(palavras[0], curriculo) if palavras else curriculo
+    return dados
+
+def main():
+    import argparse
+    from sac_core.armazenamento import ARQUIVO_DB, migrar_registros, registros_desatualizados
+    ap = argparse.ArgumentParser(description="Leva todos os registros para a versão atual do esquema.")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--lote", type=int, default=500, help="registros por transação")
+    args = ap.parse_args()
+    print(f"Esquema v{VERSAO_ESQUEMA}: {registros_desatualizados(args.banco)} registro(s) em versões anteriores.")
+    print(f"{migrar_registros(args.banco, args.lote)} registro(s) migrado(s).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Retratos do Painel: resumo, médias por questão e gráfico prontos por (versão do banco, semestre).
+
+O resumo dos agregados, a tabela de médias e a figura do gráfico “Média por
+Questão” são montados uma vez por versão do banco e filtro de semestre
+(``armazenamento.retrato_painel``) e ficam no cache do processo: reruns e
+sessões diferentes reaproveitam o mesmo retrato, e digitar num filtro da
+tabela não remonta o gráfico. Depois de cada gravação, uma thread de fundo
+remonta os retratos dos filtros já abertos neste processo, então o Painel
+aberto depois de um salvar já encontra o retrato pronto.
+
+A figura fica como objeto ``plotly`` já montado (o ``st.plotly_chart`` valida
+de novo um JSON ou dict a cada rerun; a figura pronta passa direto). pandas e
+plotly só são importados aqui, por quem abre o Painel.
+"""
+from sac_core.agregados import resumo as resumo_agregados
+
+ESCALA_CORES = [(0, '#cfd8dc'), (0.5, '#dba800'), (1, '#002060')]
+
+def figura_medias(medias):
+    """Barras horizontais das médias por questão, com o texto completo no hover."""
+    import plotly.express as px
+    fig = px.bar(
+        medias,
+        x="Média", y="Questão",
+        orientation="h",
+        text="Média",
+        hover_data={"Questão": True, "Média": True, "Descrição Completa": True},
+        labels={"Média": "Média (0–5)", "Questão": ""},
+        color="Média",
+        color_continuous_scale=ESCALA_CORES,
+    )
+    fig.update_layout(
+        height=max(420, len(medias) * 26),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        coloraxis_showscale=False
+    )
+    fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+    return fig
+
+def montar(con, semestre: str = None) -> dict:
+    """``{"resumo", "medias", "figura"}``; sem médias, ``medias``/``figura`` ficam None."""
+    from sac_core.analise import medias_por_questao
+    resumo = resumo_agregados(con, semestre)
+    if not resumo["medias_por_questao"]:
+        return {"resumo": resumo, "medias": None, "figura": None}
+    medias = medias_por_questao(resumo)
+    return {"resumo": resumo, "medias": medias, "figura": figura_medias(medias)}
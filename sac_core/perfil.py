@@ -0,0 +1,158 @@
+"""Perfil opcional dos reruns: tempo por trecho nomeado + contadores.
+
+Desligado, cada ``trecho``/``cronometrado`` custa uma consulta a um
+``threading.local``. Liga-se com ``SAC_PERFIL=1`` (todas as sessões) ou pelo
+interruptor oculto da barra lateral (``?admin=1`` na URL). Cada rerun vira um
+dicionário ``{"inicio", "modo", "total_ms", "trechos": {nome: [ms, chamadas]},
+"contadores": {...}}`` guardado numa janela circular do processo e, se
+``SAC_PERFIL_ARQUIVO`` apontar um caminho, anexado como uma linha JSONL (o
+caminho vem só do ambiente do servidor, nunca da interface). Etapas
+(``etapa``) fatiam o script em sequência; trechos (``trecho``/``cronometrado``)
+podem estar dentro delas.
+"""
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+JANELA = 200
+
+ATIVO_POR_AMBIENTE = os.environ.get("SAC_PERFIL", "") not in ("", "0")
+_arquivo = os.environ.get("SAC_PERFIL_ARQUIVO") or None
+
+_local = threading.local()     # rerun em andamento na thread do script
+_reruns = deque(maxlen=JANELA)
+_lock = threading.Lock()
+
+def _atual():
+    return getattr(_local, "rerun", None)
+
+def _acumular(rerun: dict, nome: str, ms: float):
+    soma = rerun["trechos"].setdefault(nome, [0.0, 0])
+    soma[0] += ms
+    soma[1] += 1
+
+@contextmanager
+def _medir(rerun: dict, nome: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _acumular(rerun, nome, (time.perf_counter() - t0) * 1000)
+
+@contextmanager
+def _nada():
+    yield
+
+def trecho(nome: str):
+    """``with perfil.trecho("grafico"): ...`` – mede só se houver um rerun sendo perfilado."""
+    rerun = _atual()
+    return _medir(rerun, nome) if rerun is not None else _nada()
+
+def cronometrado(nome: str = None):
+    """Decorador equivalente a envolver a função inteira em ``trecho``."""
+    def decorar(f):
+        rotulo = nome or f.__name__
+        @functools.wraps(f)
+        def envolvida(*args, **kw):
+            rerun = _atual()
+            if rerun is None:
+                return f(*args, **kw)
+            with _medir(rerun, rotulo):
+                return f(*args, **kw)
+        return envolvida
+    return decorar
+
+def anotar(**campos):
+    """Campos descritivos do rerun atual (ex.: ``modo``)."""
+    rerun = _atual()
+    if rerun is not None:
+        rerun.update(campos)
+
+def etapa(nome: str):
+    """Marca o início de uma etapa do script; a anterior é encerrada aqui (sem reindentar blocos inteiros)."""
+    rerun = _atual()
+    if rerun is None:
+        return
+    agora = time.perf_counter()
+    anterior = rerun.get("_etapa")
+    if anterior:
+        _acumular(rerun, anterior[0], (agora - anterior[1]) * 1000)
+    rerun["_etapa"] = (nome, agora) if nome else None
+
+def contar(nome: str, valor: int = 1, somar: bool = True):
+    """Contador do rerun atual (``somar=False`` guarda o último valor)."""
+    rerun = _atual()
+    if rerun is not None:
+        c = rerun["contadores"]
+        c[nome] = c.get(nome, 0) + valor if somar else valor
+
+# ==============================================================================
+# CICLO DO RERUN
+# ==============================================================================
+def iniciar_rerun(ativo: bool, **contexto):
+    """Chamado no topo do script. Um rerun anterior não encerrado (``st.rerun``) é fechado como interrompido."""
+    if _atual() is not None:
+        finalizar_rerun(interrompido=True)
+    if ativo:
+        _local.rerun = {"inicio": datetime.now().isoformat(timespec="milliseconds"), "_t0": time.perf_counter(),
+                        **contexto, "trechos": {}, "contadores": {}}
+
+def finalizar_rerun(interrompido: bool = False, **contadores):
+    etapa(None)
+    rerun = _atual()
+    _local.rerun = None
+    if rerun is None:
+        return None
+    rerun.pop("_etapa", None)
+    rerun["total_ms"] = round((time.perf_counter() - rerun.pop("_t0")) * 1000, 3)
+    rerun["contadores"].update(contadores)
+    rerun["trechos"] = {k: [round(ms, 3), n] for k, (ms, n) in rerun["trechos"].items()}
+    if interrompido:
+        rerun["interrompido"] = True
+    with _lock:
+        _reruns.append(rerun)
+        if _arquivo:
+            try:
+                with open(_arquivo, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rerun, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+    return rerun
+
+# ==============================================================================
+# RESUMO
+# ==============================================================================
+def reruns_recentes(n: int = JANELA) -> list:
+    with _lock:
+        return list(_reruns)[-n:]
+
+def limpar():
+    with _lock:
+        _reruns.clear()
+
+def _p90(valores: list) -> float:
+    v = sorted(valores)
+    return v[int(0.9 * (len(v) - 1))]
+
+def resumo() -> list:
+    """Por trecho (e "total"), sobre a janela: reruns em que apareceu, mediana/p90/máx em ms, chamadas por rerun."""
+    reruns = reruns_recentes()
+    por_trecho = {"total": ([r["total_ms"] for r in reruns], [1] * len(reruns))}
+    for r in reruns:
+        for nome, (ms, n) in r["trechos"].items():
+            tempos, chamadas = por_trecho.setdefault(nome, ([], []))
+            tempos.append(ms)
+            chamadas.append(n)
+    linhas = [
+        {"trecho": nome, "reruns": len(tempos), "mediana_ms": round(statistics.median(tempos), 2),
+         "p90_ms": round(_p90(tempos), 2), "max_ms": round(max(tempos), 2),
+         "chamadas_por_rerun": round(sum(chamadas) / len(chamadas), 1)}
+        for nome, (tempos, chamadas) in por_trecho.items() if tempos
+    ]
+    return sorted(linhas, key=lambda l: -l["mediana_ms"])
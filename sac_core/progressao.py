@@ -0,0 +1,58 @@
+"""Progressão de um discente ao longo dos semestres.
+
+As avaliações saem do índice por discente (matrícula normalizada → registros
+em ordem de semestre e data; ver ``armazenamento.avaliacoes_discente``),
+mantido a cada gravação, então a consulta lê só as linhas do discente. Para
+cada avaliação: média por seção (``relatorios.medias_do_registro``); entre
+avaliações seguidas: a variação por seção.
+
+Uso:
+    python -m sac_core.progressao 0512345
+    python -m sac_core.progressao --listar [--curriculo "Troca de Matriz (Velha -> Nova)"]
+"""
+import math
+
+from sac_core.armazenamento import ARQUIVO_DB, avaliacoes_discente, discentes_acompanhados
+from sac_core.esquema import SECOES
+from sac_core.relatorios import medias_do_registro
+
+COLUNAS_AVALIACAO = ["Registro_ID", "Semestre", "Curriculo", "Data_Registro", "Petiano_Responsavel"]
+
+def progressao(matricula: str, caminho: str = ARQUIVO_DB) -> dict:
+    """``{"nome", "avaliacoes": [{colunas + seção: média}], "variacoes": [{"De", "Para", seção: delta}]}``.
+
+    Variação NaN quando uma das duas avaliações não tem nota válida na seção.
+    """
+    registros = avaliacoes_discente(matricula, caminho)
+    avaliacoes = [{**{c: d.get(c, "") for c in COLUNAS_AVALIACAO}, **medias_do_registro(d)} for d in registros]
+    variacoes = [{"De": a["Semestre"], "Para": b["Semestre"], **{sec: b[sec] - a[sec] for sec in SECOES}}
+                 for a, b in zip(avaliacoes, avaliacoes[1:])]
+    return {"nome": registros[-1].get("Nome", "") if registros else None, "avaliacoes": avaliacoes, "variacoes": variacoes}
+
+def _fmt(v, sinal: bool = False) -> str:
+    return "—" if v is None or math.isnan(v) else (f"{v:+.2f}" if sinal else f"{v:.2f}")
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Progressão de um discente entre avaliações.")
+    ap.add_argument("matricula", nargs="?")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--listar", action="store_true", help="discentes com duas ou mais avaliações")
+    ap.add_argument("--curriculo", help="com --listar: só quem tem alguma avaliação neste currículo")
+    args = ap.parse_args()
+    if args.listar:
+        for discente, nome, n in discentes_acompanhados(args.banco, args.curriculo):
+            print(f"{discente:>12}  {n:>2} avaliação(ões)  {nome}")
+    if args.matricula:
+        p = progressao(args.matricula, args.banco)
+        if not p["avaliacoes"]:
+            raise SystemExit(f"Nenhuma avaliação para a matrícula {args.matricula}.")
+        print(p["nome"])
+        print("  ".join(["Semestre".ljust(14)] + [s.split(". ")[0].rjust(5) for s in SECOES]))
+        for a in p["avaliacoes"]:
+            print("  ".join([a["Semestre"].ljust(14)] + [_fmt(a[s]).rjust(5) for s in SECOES]))
+        for v in p["variacoes"]:
+            print("  ".join([f"Δ {v['Para']}".ljust(14)] + [_fmt(v[s], sinal=True).rjust(5) for s in SECOES]))
+
+if __name__ == "__main__":
+    main()
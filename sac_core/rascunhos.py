@@ -0,0 +1,133 @@
+"""Rascunhos por sessão da Nova Transcrição.
+
+Cada aba do navegador tem seu ``rascunho_id``; só as chaves que mudaram são
+enviadas para cá e uma thread de fundo agrupa as alterações e grava a cada
+``ATRASO_GRAVACAO_S`` segundos, fora do caminho de renderização. Rascunhos
+abandonados expiram após ``VALIDADE_S``.
+"""
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+ARQUIVO_RASCUNHOS = "_rascunhos.sqlite3"
+ATRASO_GRAVACAO_S = 2.0
+VALIDADE_S = 7 * 24 * 3600
+INTERVALO_EXPURGO_S = 3600
+
+_ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS rascunhos (
+    rascunho_id   TEXT NOT NULL,
+    chave         TEXT NOT NULL,
+    valor         TEXT,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (rascunho_id, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_rascunhos_atualizado ON rascunhos(atualizado_em);
+"""
+
+_local = threading.local()
+_pendentes = {}                      # (caminho, rascunho_id) -> {chave: valor}
+_lock_pendentes = threading.Lock()
+_lock_gravacao = threading.Lock()    # gravação e descarte não se intercalam
+_gravador = None
+_ultimo_expurgo = 0.0
+_log = logging.getLogger(__name__)
+
+def _conectar(caminho: str) -> sqlite3.Connection:
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+    con = conexoes.get(caminho)
+    if con is None:
+        con = sqlite3.connect(caminho, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(_ESQUEMA_SQL)
+        conexoes[caminho] = con
+    return con
+
+def carregar_rascunho(rascunho_id: str, caminho: str = ARQUIVO_RASCUNHOS) -> dict:
+    """Estado salvo do rascunho (incluindo alterações ainda não gravadas)."""
+    cur = _conectar(caminho).execute("SELECT chave, valor FROM rascunhos WHERE rascunho_id = ?", (rascunho_id,))
+    dados = {chave: json.loads(valor) for chave, valor in cur}
+    with _lock_pendentes:
+        dados.update(_pendentes.get((caminho, rascunho_id), {}))
+    return dados
+
+def agendar_gravacao(rascunho_id: str, alteracoes: dict, caminho: str = ARQUIVO_RASCUNHOS):
+    """Enfileira as chaves alteradas; várias chamadas seguidas viram uma gravação."""
+    if not alteracoes:
+        return
+    with _lock_pendentes:
+        _pendentes.setdefault((caminho, rascunho_id), {}).update(alteracoes)
+    _iniciar_gravador()
+
+def gravar_pendentes():
+    """Grava agora tudo o que está na fila (usado pela thread e pelo botão de rascunho).
+
+    Se uma gravação falhar, o que ainda não foi gravado volta para a fila (sem
+    passar por cima de alterações mais novas) e o erro sobe para quem chamou.
+    """
+    with _lock_gravacao:
+        with _lock_pendentes:
+            lote = dict(_pendentes)
+            _pendentes.clear()
+        agora = time.time()
+        faltam = list(lote)
+        try:
+            for chave in list(faltam):
+                caminho, rascunho_id = chave
+                con = _conectar(caminho)
+                with con:
+                    con.executemany(
+                        "INSERT INTO rascunhos (rascunho_id, chave, valor, atualizado_em) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(rascunho_id, chave) DO UPDATE SET valor = excluded.valor, atualizado_em = excluded.atualizado_em",
+                        [(rascunho_id, k, json.dumps(v, ensure_ascii=False), agora) for k, v in lote[chave].items()],
+                    )
+                faltam.remove(chave)
+        except BaseException:
+            with _lock_pendentes:
+                for chave in faltam:
+                    _pendentes[chave] = {**lote[chave], **_pendentes.get(chave, {})}
+            raise
+
+def descartar_rascunho(rascunho_id: str, caminho: str = ARQUIVO_RASCUNHOS):
+    with _lock_gravacao:
+        with _lock_pendentes:
+            _pendentes.pop((caminho, rascunho_id), None)
+        con = _conectar(caminho)
+        with con:
+            con.execute("DELETE FROM rascunhos WHERE rascunho_id = ?", (rascunho_id,))
+
+def expurgar_rascunhos(caminho: str = ARQUIVO_RASCUNHOS, validade_s: float = VALIDADE_S) -> int:
+    """Apaga rascunhos sem nenhuma alteração há mais de ``validade_s``; devolve quantos."""
+    con = _conectar(caminho)
+    limite = time.time() - validade_s
+    with con:
+        ids = [r for (r,) in con.execute(
+            "SELECT rascunho_id FROM rascunhos GROUP BY rascunho_id HAVING MAX(atualizado_em) < ?", (limite,))]
+        con.executemany("DELETE FROM rascunhos WHERE rascunho_id = ?", [(r,) for r in ids])
+    return len(ids)
+
+def _laco_gravador():
+    global _ultimo_expurgo
+    while True:
+        time.sleep(ATRASO_GRAVACAO_S)
+        try:
+            gravar_pendentes()
+            if time.time() - _ultimo_expurgo > INTERVALO_EXPURGO_S:
+                _ultimo_expurgo = time.time()
+                expurgar_rascunhos()
+        except Exception:
+            _log.exception("Falha ao gravar rascunhos; nova tentativa em %.0f s", ATRASO_GRAVACAO_S)
+
+def _iniciar_gravador():
+    global _gravador
+    if _gravador is None:
+        with _lock_pendentes:
+            if _gravador is None:
+                _gravador = threading.Thread(target=_laco_gravador, name="sac-rascunhos", daemon=True)
+                _gravador.start()
+                atexit.register(gravar_pendentes)
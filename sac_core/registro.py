@@ -0,0 +1,117 @@
+"""Montagem e validação de um registro (mesmas regras para a tela e para importações)."""
+import hashlib
+import re
+import unicodedata
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sac_core.esquema import CAMPO_VERSAO, COLUNAS_REFLEXAO, ID_PARA_LABEL, IDS_QUESTOES, NOTA_LABELS, ORDEM_QUESTOES, VERSAO_ESQUEMA
+
+# campo obrigatório -> nome mostrado na mensagem de erro
+CAMPOS_OBRIGATORIOS = {
+    "Nome": "Nome do Discente",
+    "Petiano_Responsavel": "Petiano Responsável",
+    "Autoavaliação: Pontos Fortes": "Pontos Fortes (Obrigatório)",
+    "Autoavaliação: Pontos a Desenvolver": "Pontos a Desenvolver (Obrigatório)",
+    "Observações Finais": "Comentários Finais (Obrigatório)",
+}
+
+# campo de reflexão -> chave do widget na tela (obs_{chave}{sufixo})
+CHAVES_REFLEXAO = {
+    "Autoavaliação: Pontos Fortes": "fortes",
+    "Autoavaliação: Pontos a Desenvolver": "fracos",
+    "Contribuição Prática": "prat",
+    "Exemplos de Aplicação": "ex",
+    "Competências Futuras": "fut1",
+    "Plano de Desenvolvimento": "fut2",
+    "Observações Finais": "final",
+}
+
+# campo de identificação -> chave do widget na tela (ident_{chave}{sufixo})
+CHAVES_IDENTIFICACAO = {
+    "Petiano_Responsavel": "pet",
+    "Nome": "nome",
+    "Matricula": "mat",
+    "Semestre": "sem",
+    "Curriculo": "curr",
+}
+
+def normalizar(texto) -> str:
+    """Sem acentos, minúsculo e sem espaços nas pontas (buscas, cabeçalhos, duplicatas)."""
+    if texto is None:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower().strip()
+
+_NA = {"", "n/a", "na", "nan", "none", "-"}
+
+def normalizar_nota(valor) -> str:
+    """Nota digitada/lida de planilha → rótulo de ``NOTA_LABELS`` quando possível (3.0 → "3", vazio → "N/A")."""
+    if valor is None:
+        return "N/A"
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor).strip()
+    if texto.lower() in _NA:
+        return "N/A"
+    if texto.endswith(".0") and texto[:-2].isdigit():
+        texto = texto[:-2]
+    return texto
+
+def obter_hora_ceara():
+    fuso = timezone(timedelta(hours=-3))
+    return datetime.now(fuso).strftime("%Y-%m-%d %H:%M:%S")
+
+def validar_registro(dados: dict) -> list:
+    """Lista de problemas que impedem salvar (vazia = ok)."""
+    erros = [rotulo for campo, rotulo in CAMPOS_OBRIGATORIOS.items() if not str(dados.get(campo) or "").strip()]
+    for q in ID_PARA_LABEL:
+        if q in dados and dados[q] not in NOTA_LABELS:
+            erros.append(f"{ID_PARA_LABEL[q]}: nota inválida '{dados[q]}'")
+    return erros
+
+def registro_do_formulario(estado, sufixo: str) -> dict:
+    """Monta o registro a partir do estado da tela (``ident_*``, ``nota_*``, ``obs_*`` + ``sufixo``).
+
+    ``estado`` é qualquer mapeamento (``st.session_state`` ou um dict); notas de
+    seções que não chegaram a ser abertas ficam de fora, como antes.
+    """
+    dados = {"Registro_ID": str(uuid.uuid4()), CAMPO_VERSAO: VERSAO_ESQUEMA}
+    for campo, chave in CHAVES_IDENTIFICACAO.items():
+        dados[campo] = estado.get(f"ident_{chave}{sufixo}", "")
+    dados["Data_Registro"] = obter_hora_ceara()
+    for campo, chave in CHAVES_REFLEXAO.items():
+        dados[campo] = (estado.get(f"obs_{chave}{sufixo}") or "").strip()
+    for q, _ in ORDEM_QUESTOES:
+        if f"nota_{q}{sufixo}" in estado:
+            dados[q] = estado[f"nota_{q}{sufixo}"]
+        if f"obs_{q}{sufixo}" in estado:
+            dados[f"Obs_{q}"] = estado[f"obs_{q}{sufixo}"]
+    return dados
+
+# ==============================================================================
+# CHAVES DE DUPLICATA
+# ==============================================================================
+def normalizar_matricula(matricula) -> str:
+    """Só os dígitos, sem zeros à esquerda ("0512.345-6" → "5123456"); sem dígitos, o texto normalizado."""
+    texto = normalizar(matricula)
+    digitos = re.sub(r"\D", "", texto)
+    return digitos.lstrip("0") or ("0" if digitos else re.sub(r"\s+", "", texto))
+
+def chave_identidade(dados: dict):
+    """Matrícula normalizada + Semestre: o mesmo discente no mesmo semestre (None sem matrícula)."""
+    mat = normalizar_matricula(dados.get("Matricula"))
+    return f"{mat}|{dados.get('Semestre') or ''}" if mat else None
+
+def impressao_conteudo(dados: dict):
+    """Hash das notas (na ordem do questionário) e das reflexões normalizadas; None se o formulário está vazio.
+
+    Acentos, caixa e espaços não contam, então a mesma folha digitada por duas
+    pessoas bate mesmo com pequenas diferenças de digitação desse tipo.
+    """
+    notas = [str(dados.get(q) or "N/A") for q in IDS_QUESTOES]
+    textos = [" ".join(normalizar(dados.get(c)).split()) for c in COLUNAS_REFLEXAO]
+    if all(n == "N/A" for n in notas) and not any(textos):
+        return None
+    conteudo = "\x1f".join(notas) + "\x1e" + "\x1f".join(textos)
+    return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,195 @@
+"""Relatórios individuais de competências (HTML autocontido), em lote.
+
+Para cada formulário: nota média do discente em cada seção de ``SECOES``
+contra a média da coorte (todos os formulários) e a do seu semestre, o
+detalhe por questão e as reflexões transcritas. As médias de referência saem
+dos agregados (``estatisticas_coorte``), calculadas uma vez e entregues a
+cada processo do pool no ``initializer`` – as tarefas levam só Registro_IDs.
+
+Uso:  python -m sac_core.relatorios relatorios/ [--semestre "3º Semestre"] [--processos 4]
+"""
+import html
+import math
+import multiprocessing
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+from sac_core import agregados
+from sac_core.armazenamento import ARQUIVO_DB, conectar, listar_ids, obter_registros
+from sac_core.esquema import ID_PARA_LABEL, NOTA_LABELS, QUESTOES_POR_SECAO, ROTULOS_REFLEXAO, SECOES
+
+TAMANHO_TAREFA = 200
+_NOTAS = {lab: int(lab) for lab in NOTA_LABELS[1:]}
+
+# ==============================================================================
+# ESTATÍSTICAS DE REFERÊNCIA
+# ==============================================================================
+def _media(pares) -> float:
+    n = sum(p[0] for p in pares)
+    return sum(p[1] for p in pares) / n if n else math.nan
+
+def estatisticas_coorte(caminho: str = ARQUIVO_DB) -> dict:
+    """Médias por questão e por seção: ``{"coorte": {...}, "semestres": {semestre: {...}}}``.
+
+    Cada bloco é ``{"questoes": {id: média}, "secoes": {seção: média}}``; a
+    média de uma seção é a de todas as notas válidas das suas questões.
+    """
+    somas = agregados.somas_por_semestre(conectar(caminho))
+    semestres = sorted({s for _, s in somas})
+
+    def bloco(filtro) -> dict:
+        por_q = {}
+        for (q, s), par in somas.items():
+            if filtro(s):
+                n, soma = por_q.get(q, (0, 0))
+                por_q[q] = (n + par[0], soma + par[1])
+        return {
+            "questoes": {q: _media([p]) for q, p in por_q.items()},
+            "secoes": {sec: _media([por_q.get(q, (0, 0)) for q, _ in QUESTOES_POR_SECAO[sec]]) for sec in SECOES},
+        }
+    return {"coorte": bloco(lambda s: True), "semestres": {sem: bloco(lambda s, sem=sem: s == sem) for sem in semestres}}
+
+def medias_do_registro(dados: dict) -> dict:
+    """Seção -> média das notas válidas do próprio formulário (NaN se só N/A)."""
+    medias = {}
+    for sec in SECOES:
+        notas = [_NOTAS[dados.get(q)] for q, _ in QUESTOES_POR_SECAO[sec] if dados.get(q) in _NOTAS]
+        medias[sec] = sum(notas) / len(notas) if notas else math.nan
+    return medias
+
+# ==============================================================================
+# HTML
+# ==============================================================================
+_CSS = """
+body{font-family:'Segoe UI',Roboto,sans-serif;max-width:900px;margin:24px auto;color:#222;padding:0 16px}
+h1,h2{color:#002060;text-transform:uppercase;letter-spacing:.04em}h1{font-size:1.5rem;margin-bottom:4px}
+h2{font-size:1.05rem;border-bottom:2px solid #e0e0e0;padding-bottom:4px;margin-top:28px}
+.sub{opacity:.7;margin-bottom:16px}table{border-collapse:collapse;width:100%;font-size:.9rem}
+th,td{border-bottom:1px solid #eee;padding:5px 8px;text-align:left}th{background:#f0f2f6}
+td.n{text-align:right;font-variant-numeric:tabular-nums}.legenda span{display:inline-block;margin-right:14px}
+.refl{background:#fcfcfc;border-left:4px solid #002060;padding:8px 12px;margin:8px 0;white-space:pre-wrap}
+"""
+_CORES = {"Discente": "#002060", "Semestre": "#dba800", "Coorte": "#9e9e9e"}
+
+def _fmt(v) -> str:
+    return "–" if v is None or v != v else f"{v:.2f}"
+
+def _grafico_secoes(linhas) -> str:
+    """Barras horizontais em SVG (sem JavaScript): uma barra por série em cada seção."""
+    alt_grupo, largura, x0 = 54, 620, 150
+    partes = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura + 40}" height="{alt_grupo * len(linhas) + 10}" font-size="11">']
+    for i, (sec, valores) in enumerate(linhas):
+        y = i * alt_grupo + 6
+        partes.append(f'<text x="0" y="{y + 24}">{html.escape(sec)}</text>')
+        for j, (serie, v) in enumerate(valores.items()):
+            w = 0 if v != v else v / 5 * (largura - x0)
+            partes.append(f'<rect x="{x0}" y="{y + j * 15}" width="{w:.1f}" height="12" fill="{_CORES[serie]}"/>'
+                          f'<text x="{x0 + w + 4:.1f}" y="{y + j * 15 + 10}">{_fmt(v)}</text>')
+    partes.append("</svg>")
+    return "".join(partes)
+
+def gerar_html(dados: dict, estatisticas: dict) -> str:
+    """Relatório autocontido (CSS e gráfico embutidos) de um formulário."""
+    e = html.escape
+    sem = dados.get("Semestre") or ""
+    ref_sem = estatisticas["semestres"].get(sem, {"questoes": {}, "secoes": {}})
+    ref = estatisticas["coorte"]
+    proprias = medias_do_registro(dados)
+    linhas = [(sec, {"Discente": proprias[sec], "Semestre": ref_sem["secoes"].get(sec, math.nan),
+                     "Coorte": ref["secoes"].get(sec, math.nan)}) for sec in SECOES]
+    tabela_secoes = "".join(
+        f"<tr><td>{e(sec)}</td>" + "".join(f'<td class="n">{_fmt(v)}</td>' for v in valores.values()) + "</tr>"
+        for sec, valores in linhas)
+    detalhe = []
+    for sec in SECOES:
+        detalhe.append(f'<tr><th colspan="5">{e(sec)}</th></tr>')
+        for q, titulo in QUESTOES_POR_SECAO[sec]:
+            detalhe.append(
+                f"<tr><td>{e(ID_PARA_LABEL[q])}</td><td>{e(titulo)}</td><td class='n'>{e(str(dados.get(q, 'N/A')))}</td>"
+                f"<td class='n'>{_fmt(ref_sem['questoes'].get(q))}</td><td class='n'>{_fmt(ref['questoes'].get(q))}</td></tr>")
+    reflexoes = "".join(
+        f"<h3>{e(rotulo)}</h3><div class='refl'>{e(str(dados.get(campo) or '–'))}</div>"
+        for campo, rotulo in ROTULOS_REFLEXAO.items())
+    legenda = "".join(f'<span style="color:{c}">■ {s}</span>' for s, c in _CORES.items())
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>S.A.C. – {e(dados.get('Nome') or '')}</title><style>{_CSS}</style></head>
+<body>
+<h1>{e(dados.get('Nome') or 'Discente')}</h1>
+<div class="sub">Matrícula {e(dados.get('Matricula') or '–')} · {e(sem or '–')} · {e(dados.get('Curriculo') or '–')} · registrado em {e(dados.get('Data_Registro') or '–')}</div>
+<h2>Competências por seção (0–5)</h2>
+<div class="legenda">{legenda}</div>
+{_grafico_secoes(linhas)}
+<table><tr><th>Seção</th><th>Discente</th><th>Média do semestre</th><th>Média da coorte</th></tr>{tabela_secoes}</table>
+<h2>Detalhe por questão</h2>
+<table><tr><th></th><th>Questão</th><th>Nota</th><th>Semestre</th><th>Coorte</th></tr>{''.join(detalhe)}</table>
+<h2>Reflexão do discente</h2>
+{reflexoes}
+<p class="sub">S.A.C. – PET Engenharia Química / UFC</p>
+</body></html>"""
+
+def _slug(texto) -> str:
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "_", texto).strip("_").lower()
+
+def nome_arquivo(dados: dict) -> str:
+    return (f"{_slug(dados.get('Nome')) or 'discente'}_{_slug(dados.get('Matricula')) or 'sem_matricula'}_"
+            f"{_slug(dados['Registro_ID'])[-8:]}.html")
+
+# ==============================================================================
+# LOTE (pool de processos)
+# ==============================================================================
+_worker = {}
+
+def _iniciar_worker(estatisticas: dict, caminho: str, destino: str):
+    _worker.update(estatisticas=estatisticas, caminho=caminho, destino=destino)
+
+def _gerar_lote(ids: list) -> int:
+    registros = obter_registros(ids, _worker["caminho"])
+    for dados in registros:
+        with open(os.path.join(_worker["destino"], nome_arquivo(dados)), "w", encoding="utf-8") as f:
+            f.write(gerar_html(dados, _worker["estatisticas"]))
+    return len(registros)
+
+def gerar_relatorios(destino: str, caminho: str = ARQUIVO_DB, semestre: str = None, ids: list = None,
+                     processos: int = None, tamanho_tarefa: int = TAMANHO_TAREFA) -> dict:
+    """Gera um HTML por formulário (todos, de um semestre ou ``ids``) em ``destino``.
+
+    Devolve ``{"gerados", "segundos", "por_segundo", "processos"}``. Com
+    ``processos=1`` roda no próprio processo (útil dentro de outras ferramentas).
+    """
+    t0 = time.perf_counter()
+    os.makedirs(destino, exist_ok=True)
+    caminho = os.path.abspath(caminho)
+    ids = list(ids) if ids is not None else listar_ids(caminho, semestre)
+    estatisticas = estatisticas_coorte(caminho)
+    tarefas = [ids[i:i + tamanho_tarefa] for i in range(0, len(ids), tamanho_tarefa)]
+    processos = max(1, min(processos or os.cpu_count() or 1, len(tarefas) or 1))
+    if processos == 1:
+        _iniciar_worker(estatisticas, caminho, destino)
+        gerados = sum(_gerar_lote(t) for t in tarefas)
+    else:
+        # spawn: o processo chamador pode ser o servidor do Streamlit, cheio de threads
+        with ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_iniciar_worker, initargs=(estatisticas, caminho, destino)) as pool:
+            gerados = sum(pool.map(_gerar_lote, tarefas))
+    segundos = time.perf_counter() - t0
+    return {"gerados": gerados, "segundos": segundos, "por_segundo": gerados / segundos if segundos else math.inf,
+            "processos": processos}
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Gera os relatórios individuais em HTML.")
+    ap.add_argument("destino")
+    ap.add_argument("--banco", default=ARQUIVO_DB)
+    ap.add_argument("--semestre")
+    ap.add_argument("--ids", nargs="+", help="só estes Registro_IDs")
+    ap.add_argument("--processos", type=int, help="padrão: nº de CPUs")
+    args = ap.parse_args()
+    r = gerar_relatorios(args.destino, args.banco, args.semestre, args.ids, args.processos)
+    print(f"{r['gerados']} relatório(s) em {r['segundos']:.1f}s – {r['por_segundo']:.0f}/s com {r['processos']} processo(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Formulários sintéticos realistas para benchmarks e testes de carga.
+
+Cada registro tem todas as questões de ``ORDEM_QUESTOES`` (notas de
+``NOTA_LABELS`` com uma taxa de N/A), observações esparsas, reflexões em
+português e semestres/currículos distribuídos como numa campanha real
+(mais discentes nos semestres iniciais, maioria no currículo novo).
+Determinístico para a mesma semente.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sac_core.esquema import (
+    COLUNAS_REFLEXAO, IDS_QUESTOES, LISTA_CURRICULOS, LISTA_PETIANOS, LISTA_SEMESTRES, NOTA_LABELS,
+)
+
+TAXA_NA = 0.12
+TAXA_OBS = 0.08
+
+PESOS_SEMESTRES = [14, 13, 12, 11, 10, 10, 9, 8, 7, 6]
+PESOS_CURRICULOS = [60, 30, 10]
+PESOS_NOTAS = [3, 5, 10, 22, 33, 27]   # 0..5: concentradas em 3–4
+
+_NOMES = ["Ana", "Bruno", "Carla", "Davi", "Éricka", "Francisco", "Gabriela", "Heitor", "Íris", "João",
+          "Larissa", "Marcos", "Natália", "Otávio", "Priscila", "Raimundo", "Sâmia", "Tiago", "Vitória", "Yuri"]
+_SOBRENOMES = ["Araújo", "Barbosa", "Cavalcante", "Damasceno", "Façanha", "Gonçalves", "Holanda", "Lima",
+               "Magalhães", "Nogueira", "Oliveira", "Pinheiro", "Queiroz", "Rocha", "Sampaio", "Teixeira"]
+_INICIOS = ["Tenho facilidade em", "Preciso melhorar em", "Me sinto inseguro(a) com", "Gostei bastante de",
+            "Ainda tenho dificuldade com", "Consegui evoluir em", "Pretendo me aprofundar em"]
+_TEMAS = ["balanços de massa e energia", "termodinâmica", "operações unitárias", "cálculo numérico",
+          "projetos em equipe", "relatórios de laboratório", "programação em Python", "fenômenos de transporte",
+          "cinética e reatores", "apresentações orais", "controle de processos", "segurança de processos"]
+_FINAIS = ["durante o semestre.", "nas aulas práticas.", "no estágio.", "com a ajuda dos monitores.",
+           "ao longo do curso.", "em projetos de extensão.", "nas listas de exercícios."]
+_OBS = ["Rasura no formulário.", "Marcou duas opções; considerada a mais legível.", "[ILEGÍVEL]",
+        "Comentou que a disciplina foi remota.", "Deixou nota a lápis."]
+
+def _frase(rnd: random.Random) -> str:
+    return f"{rnd.choice(_INICIOS)} {rnd.choice(_TEMAS)} {rnd.choice(_FINAIS)}"
+
+def _texto(rnd: random.Random, frases: int) -> str:
+    return " ".join(_frase(rnd) for _ in range(frases))
+
+def gerar_registro(i: int, rnd: random.Random, taxa_na: float = TAXA_NA, inicio: datetime = datetime(2024, 3, 1)) -> dict:
+    """Um formulário completo; ``i`` define Registro_ID/Matrícula (únicos por gerador)."""
+    r = {
+        "Registro_ID": f"sint-{i:08d}",
+        "Petiano_Responsavel": rnd.choice(LISTA_PETIANOS[1:]),
+        "Nome": f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} {rnd.choice(_SOBRENOMES)}",
+        "Matricula": str(500000 + i),
+        "Semestre": rnd.choices(LISTA_SEMESTRES, PESOS_SEMESTRES)[0],
+        "Curriculo": rnd.choices(LISTA_CURRICULOS, PESOS_CURRICULOS)[0],
+        "Data_Registro": (inicio + timedelta(minutes=7 * i + rnd.randrange(7))).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    for c in COLUNAS_REFLEXAO:
+        r[c] = _texto(rnd, rnd.randint(1, 3))
+    for q in IDS_QUESTOES:
+        r[q] = "N/A" if rnd.random() < taxa_na else rnd.choices(NOTA_LABELS[1:], PESOS_NOTAS)[0]
+        r[f"Obs_{q}"] = rnd.choice(_OBS) if rnd.random() < TAXA_OBS else ""
+    return r
+
+def gerar_registros(n: int, semente: int = 42, inicio_id: int = 0, **kw):
+    """Gera ``n`` formulários (iterador: memória constante)."""
+    rnd = random.Random(semente)
+    for i in range(inicio_id, inicio_id + n):
+        yield gerar_registro(i, rnd, **kw)